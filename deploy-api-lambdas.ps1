@@ -0,0 +1,78 @@
+param(
+    # Lambda layer providing numpy for python3.12, used by the browse snapshot
+    # and the route planner (e.g. the AWSSDKPandas-Python312 layer)
+    [Parameter(Mandatory=$true)]
+    [string]$NumpyLayerArn
+)
+
+$ErrorActionPreference = "Continue"
+
+# Configuration
+$region = "ap-south-1"
+$roleArn = "arn:aws:iam::036338177433:role/JunkWunkLambdaExecutionRole"
+
+Write-Host "Deploying API Lambda functions..." -ForegroundColor Green
+
+# Every function routed by setup-api-gateway.ps1; the item writes are
+# deployed by deploy-item-lambdas.ps1. Modules lists the shared helper files
+# bundled into each function's zip (<file>.zip, as checked in).
+$functions = @(
+    @{Name="junkwunk-user-get"; File="user_get.py"; Modules=@("resilience.py"); Layers=@()},
+    @{Name="junkwunk-user-update"; File="user_update.py"; Modules=@("resilience.py"); Layers=@()},
+    @{Name="junkwunk-items-list"; File="items_list.py"; Modules=@("image_renditions.py", "image_urls.py", "resilience.py"); Layers=@()},
+    @{Name="junkwunk-items-get"; File="items_get.py"; Modules=@("trending.py", "resilience.py"); Layers=@()},
+    @{Name="junkwunk-items-suggest"; File="items_suggest.py"; Modules=@("artifacts.py", "suggest_index.py"); Layers=@()},
+    @{Name="junkwunk-items-trending"; File="items_trending.py"; Modules=@("image_renditions.py", "image_urls.py", "trending.py", "resilience.py"); Layers=@()},
+    @{Name="junkwunk-items-browse"; File="items_browse.py"; Modules=@("artifacts.py", "catalog_delta.py", "catalog_snapshot.py", "image_renditions.py", "image_urls.py", "resilience.py"); Layers=@($NumpyLayerArn)},
+    @{Name="junkwunk-cart-list"; File="cart_list.py"; Modules=@("image_renditions.py", "image_urls.py", "resilience.py"); Layers=@()},
+    @{Name="junkwunk-cart-add"; File="cart_add.py"; Modules=@("idempotency.py", "trending.py", "resilience.py"); Layers=@()},
+    @{Name="junkwunk-cart-remove"; File="cart_remove.py"; Modules=@("resilience.py"); Layers=@()},
+    @{Name="junkwunk-cart-checkout"; File="cart_checkout.py"; Modules=@("idempotency.py", "resilience.py"); Layers=@()},
+    @{Name="junkwunk-purchases-list"; File="purchases_list.py"; Modules=@("image_renditions.py", "image_urls.py", "purchase_archive.py", "resilience.py"); Layers=@()},
+    @{Name="junkwunk-images-upload-url"; File="images_upload_url.py"; Modules=@("image_renditions.py"); Layers=@()},
+    @{Name="junkwunk-saved-searches-list"; File="saved_searches_list.py"; Modules=@("resilience.py"); Layers=@()},
+    @{Name="junkwunk-saved-searches-create"; File="saved_searches_create.py"; Modules=@("saved_search_index.py", "geo.py", "resilience.py"); Layers=@()},
+    @{Name="junkwunk-saved-searches-delete"; File="saved_searches_delete.py"; Modules=@("resilience.py"); Layers=@()},
+    @{Name="junkwunk-routes-plan"; File="routes_plan.py"; Modules=@("route_planner.py", "geo.py", "resilience.py"); Layers=@($NumpyLayerArn)}
+)
+
+Set-Location "lambda_functions"
+
+foreach ($func in $functions) {
+    Write-Host "+ Deploying $($func.Name)..." -ForegroundColor Cyan
+
+    # Zip the function
+    $zip = "$($func.File.Replace('.py', '')).zip"
+    if (Test-Path $zip) { Remove-Item $zip }
+    Compress-Archive -Path (@($func.File) + $func.Modules) -DestinationPath $zip
+
+    # Check if function exists
+    $existingFunction = aws lambda get-function --function-name $func.Name --region $region 2>$null
+
+    if ($existingFunction) {
+        Write-Host "  Updating existing function..." -ForegroundColor Yellow
+        aws lambda update-function-code `
+            --function-name $func.Name `
+            --zip-file "fileb://$zip" `
+            --region $region | Out-Null
+    } else {
+        Write-Host "  Creating new function..." -ForegroundColor Yellow
+        $layerArgs = @()
+        if ($func.Layers.Count -gt 0) { $layerArgs = @("--layers") + $func.Layers }
+        aws lambda create-function `
+            --function-name $func.Name `
+            --runtime python3.12 `
+            --role $roleArn `
+            --handler $($func.File.Replace('.py', '')).lambda_handler `
+            --zip-file "fileb://$zip" `
+            --timeout 30 `
+            --memory-size 256 `
+            @layerArgs `
+            --region $region | Out-Null
+    }
+}
+
+Set-Location ..
+
+Write-Host "`n=== DEPLOYMENT COMPLETE ===" -ForegroundColor Green
+Write-Host "Run setup-api-gateway.ps1 to route the API to these functions" -ForegroundColor Yellow
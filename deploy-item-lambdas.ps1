@@ -9,10 +9,11 @@ $authorizerId = "gr0cdp"
 Write-Host "Deploying Item Management Lambda Functions..." -ForegroundColor Green
 
 # Create and deploy Lambda functions
+# Modules lists the shared helper files bundled into each function's zip
 $functions = @(
-    @{Name="junkwunk-items-create"; File="items_create.py"; Method="POST"; Resource="/items"},
-    @{Name="junkwunk-items-update"; File="items_update.py"; Method="PUT"; Resource="/items/{itemId}"},
-    @{Name="junkwunk-items-delete"; File="items_delete.py"; Method="DELETE"; Resource="/items/{itemId}"}
+    @{Name="junkwunk-items-create"; File="items_create.py"; Method="POST"; Resource="/items"; Modules=@("image_renditions.py", "idempotency.py", "resilience.py")},
+    @{Name="junkwunk-items-update"; File="items_update.py"; Method="PUT"; Resource="/items/{itemId}"; Modules=@("image_renditions.py", "resilience.py")},
+    @{Name="junkwunk-items-delete"; File="items_delete.py"; Method="DELETE"; Resource="/items/{itemId}"; Modules=@("resilience.py")}
 )
 
 Set-Location "lambda_functions"
@@ -22,7 +23,7 @@ foreach ($func in $functions) {
     
     # Zip the function
     if (Test-Path "$($func.File).zip") { Remove-Item "$($func.File).zip" }
-    Compress-Archive -Path $func.File -DestinationPath "$($func.File).zip"
+    Compress-Archive -Path (@($func.File) + $func.Modules) -DestinationPath "$($func.File).zip"
     
     # Check if function exists
     $existingFunction = aws lambda get-function --function-name $func.Name --region $region 2>$null
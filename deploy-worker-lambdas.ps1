@@ -0,0 +1,276 @@
+param(
+    # Lambda layer providing Pillow for python3.12 (the runtime does not ship it)
+    [Parameter(Mandatory=$true)]
+    [string]$PillowLayerArn,
+    # Lambda layer providing numpy for python3.12, for the catalog builder
+    [Parameter(Mandatory=$true)]
+    [string]$NumpyLayerArn
+)
+
+$ErrorActionPreference = "Continue"
+
+# Configuration
+$region = "ap-south-1"
+$accountId = "036338177433"
+$roleArn = "arn:aws:iam::${accountId}:role/JunkWunkLambdaExecutionRole"
+$imagesBucket = "junkwunk-images-ap-south-1"
+$archiveBucket = "junkwunk-purchase-archive-ap-south-1"
+
+Write-Host "Deploying background Lambda functions..." -ForegroundColor Green
+
+# Tables added alongside the Users/Items/Cart/Purchases tables of
+# AWS_MIGRATION_PLAN.md; creating an existing table fails harmlessly
+Write-Host "+ Creating tables..." -ForegroundColor Cyan
+$tables = @(
+    @{Name="JunkWunk-ImageRenditions"; Keys=@("imageKey"); Ttl=$null},
+    @{Name="JunkWunk-Idempotency"; Keys=@("idempotencyKey"); Ttl="expiresAt"},
+    @{Name="JunkWunk-SavedSearches"; Keys=@("userId", "searchId"); Ttl=$null},
+    @{Name="JunkWunk-SearchMatches"; Keys=@("userId", "matchId"); Ttl="ttl"},
+    @{Name="JunkWunk-Trending"; Keys=@("listKey"); Ttl="expiresAt"},
+    @{Name="JunkWunk-TrendingCounters"; Keys=@("counterId"); Ttl="expiresAt"},
+    @{Name="JunkWunk-CatalogDelta"; Keys=@("bucket", "itemId"); Ttl="expiresAt"}
+)
+foreach ($table in $tables) {
+    $attributes = @("AttributeName=$($table.Keys[0]),AttributeType=S")
+    $keySchema = @("AttributeName=$($table.Keys[0]),KeyType=HASH")
+    if ($table.Keys.Count -gt 1) {
+        $attributes += "AttributeName=$($table.Keys[1]),AttributeType=S"
+        $keySchema += "AttributeName=$($table.Keys[1]),KeyType=RANGE"
+    }
+    aws dynamodb create-table `
+        --table-name $table.Name `
+        --attribute-definitions @attributes `
+        --key-schema @keySchema `
+        --billing-mode PAY_PER_REQUEST `
+        --region $region 2>$null | Out-Null
+    if ($table.Ttl) {
+        aws dynamodb wait table-exists --table-name $table.Name --region $region
+        aws dynamodb update-time-to-live `
+            --table-name $table.Name `
+            --time-to-live-specification "Enabled=true,AttributeName=$($table.Ttl)" `
+            --region $region 2>$null | Out-Null
+    }
+}
+
+# The outbox written by cart_checkout; its stream feeds the checkout worker
+$ordersIndex = '[{\"IndexName\":\"UserIdIndex\",\"KeySchema\":[{\"AttributeName\":\"userId\",\"KeyType\":\"HASH\"}],\"Projection\":{\"ProjectionType\":\"ALL\"}}]'
+aws dynamodb create-table `
+    --table-name JunkWunk-Orders `
+    --attribute-definitions AttributeName=orderId,AttributeType=S AttributeName=userId,AttributeType=S `
+    --key-schema AttributeName=orderId,KeyType=HASH `
+    --global-secondary-indexes $ordersIndex `
+    --stream-specification StreamEnabled=true,StreamViewType=NEW_IMAGE `
+    --billing-mode PAY_PER_REQUEST `
+    --region $region 2>$null | Out-Null
+
+# Archived purchases (written by purchase_archiver, read by purchases_list)
+# hold buyer details: a private bucket, encrypted, never public
+Write-Host "+ Creating $archiveBucket bucket..." -ForegroundColor Cyan
+aws s3api create-bucket `
+    --bucket $archiveBucket `
+    --create-bucket-configuration LocationConstraint=$region `
+    --region $region 2>$null | Out-Null
+aws s3api put-public-access-block `
+    --bucket $archiveBucket `
+    --public-access-block-configuration BlockPublicAcls=true,IgnorePublicAcls=true,BlockPublicPolicy=true,RestrictPublicBuckets=true `
+    --region $region
+$encryption = '{\"Rules\":[{\"ApplyServerSideEncryptionByDefault\":{\"SSEAlgorithm\":\"AES256\"}}]}'
+aws s3api put-bucket-encryption `
+    --bucket $archiveBucket `
+    --server-side-encryption-configuration $encryption `
+    --region $region
+
+# Modules lists the shared helper files bundled into each function's zip
+$functions = @(
+    @{Name="junkwunk-image-processor"; File="image_processor.py"; Modules=@("image_renditions.py", "resilience.py"); Timeout=60; Memory=1024; Layers=@($PillowLayerArn)},
+    @{Name="junkwunk-checkout-worker"; File="checkout_worker.py"; Modules=@("trending.py", "resilience.py"); Timeout=60; Memory=256; Layers=@()},
+    @{Name="junkwunk-saved-search-matcher"; File="saved_search_matcher.py"; Modules=@("saved_search_index.py", "geo.py", "resilience.py"); Timeout=60; Memory=512; Layers=@()},
+    @{Name="junkwunk-catalog-delta"; File="catalog_delta.py"; Modules=@("resilience.py"); Timeout=30; Memory=128; Layers=@()},
+    @{Name="junkwunk-trending-compactor"; File="trending_compactor.py"; Modules=@("trending.py", "resilience.py"); Timeout=300; Memory=512; Layers=@()},
+    @{Name="junkwunk-suggest-builder"; File="suggest_builder.py"; Modules=@("suggest_index.py", "resilience.py"); Timeout=900; Memory=1024; Layers=@()},
+    @{Name="junkwunk-catalog-builder"; File="catalog_builder.py"; Modules=@("catalog_snapshot.py", "resilience.py"); Timeout=900; Memory=1024; Layers=@($NumpyLayerArn)},
+    @{Name="junkwunk-purchase-archiver"; File="purchase_archiver.py"; Modules=@("purchase_archive.py", "resilience.py"); Timeout=900; Memory=1024; Layers=@()}
+)
+
+Set-Location "lambda_functions"
+
+foreach ($func in $functions) {
+    Write-Host "+ Creating $($func.Name)..." -ForegroundColor Cyan
+
+    # Zip the function
+    if (Test-Path "$($func.File).zip") { Remove-Item "$($func.File).zip" }
+    Compress-Archive -Path (@($func.File) + $func.Modules) -DestinationPath "$($func.File).zip"
+
+    # Check if function exists
+    $existingFunction = aws lambda get-function --function-name $func.Name --region $region 2>$null
+
+    if ($existingFunction) {
+        Write-Host "  Updating existing function..." -ForegroundColor Yellow
+        aws lambda update-function-code `
+            --function-name $func.Name `
+            --zip-file "fileb://$($func.File).zip" `
+            --region $region | Out-Null
+    } else {
+        Write-Host "  Creating new function..." -ForegroundColor Yellow
+        $layerArgs = @()
+        if ($func.Layers.Count -gt 0) { $layerArgs = @("--layers") + $func.Layers }
+        aws lambda create-function `
+            --function-name $func.Name `
+            --runtime python3.12 `
+            --role $roleArn `
+            --handler $($func.File.Replace('.py', '')).lambda_handler `
+            --zip-file "fileb://$($func.File).zip" `
+            --timeout $func.Timeout `
+            --memory-size $func.Memory `
+            @layerArgs `
+            --region $region | Out-Null
+    }
+}
+
+Set-Location ..
+
+# S3 trigger: originals uploaded under images/ are rendered. Renditions go to
+# renditions/, outside the filter, so the processor never triggers itself.
+# NOTE: this replaces the bucket's whole notification configuration.
+Write-Host "`nConfiguring S3 trigger for junkwunk-image-processor..." -ForegroundColor Green
+aws lambda add-permission `
+    --function-name junkwunk-image-processor `
+    --statement-id s3-images-created `
+    --action lambda:InvokeFunction `
+    --principal s3.amazonaws.com `
+    --source-arn "arn:aws:s3:::${imagesBucket}" `
+    --source-account $accountId `
+    --region $region 2>$null | Out-Null
+
+$notification = @{
+    LambdaFunctionConfigurations = @(
+        @{
+            Id = "image-renditions"
+            LambdaFunctionArn = "arn:aws:lambda:${region}:${accountId}:function:junkwunk-image-processor"
+            Events = @("s3:ObjectCreated:*")
+            Filter = @{ Key = @{ FilterRules = @(@{ Name = "prefix"; Value = "images/" }) } }
+        }
+    )
+}
+$notificationJson = ($notification | ConvertTo-Json -Depth 10 -Compress).Replace('"', '\"')
+aws s3api put-bucket-notification-configuration `
+    --bucket $imagesBucket `
+    --notification-configuration $notificationJson `
+    --region $region
+
+# Checkout worker: fed by the JunkWunk-Orders stream (the outbox written by
+# cart_checkout). A batch is retried up to 5 times, with only the failed
+# orders re-sent (ReportBatchItemFailures); orders that still fail go to the
+# junkwunk-checkout-dlq queue for inspection and replay.
+Write-Host "`nConfiguring JunkWunk-Orders stream for junkwunk-checkout-worker..." -ForegroundColor Green
+aws dynamodb update-table `
+    --table-name JunkWunk-Orders `
+    --stream-specification StreamEnabled=true,StreamViewType=NEW_IMAGE `
+    --region $region 2>$null | Out-Null
+$ordersStreamArn = aws dynamodb describe-table `
+    --table-name JunkWunk-Orders `
+    --query "Table.LatestStreamArn" `
+    --output text `
+    --region $region
+
+$dlqUrl = aws sqs create-queue `
+    --queue-name junkwunk-checkout-dlq `
+    --attributes MessageRetentionPeriod=1209600 `
+    --query "QueueUrl" `
+    --output text `
+    --region $region
+$dlqArn = aws sqs get-queue-attributes `
+    --queue-url $dlqUrl `
+    --attribute-names QueueArn `
+    --query "Attributes.QueueArn" `
+    --output text `
+    --region $region
+
+$existingMapping = aws lambda list-event-source-mappings `
+    --function-name junkwunk-checkout-worker `
+    --event-source-arn $ordersStreamArn `
+    --query "EventSourceMappings[0].UUID" `
+    --output text `
+    --region $region
+if (-not $existingMapping -or $existingMapping -eq "None") {
+    aws lambda create-event-source-mapping `
+        --function-name junkwunk-checkout-worker `
+        --event-source-arn $ordersStreamArn `
+        --starting-position LATEST `
+        --batch-size 10 `
+        --maximum-retry-attempts 5 `
+        --bisect-batch-on-function-error `
+        --function-response-types ReportBatchItemFailures `
+        --destination-config "OnFailure={Destination=$dlqArn}" `
+        --region $region | Out-Null
+    Write-Host "+ Created stream mapping with DLQ $dlqArn" -ForegroundColor Green
+} else {
+    Write-Host "+ Stream mapping already exists: $existingMapping" -ForegroundColor Yellow
+}
+# Saved-search matcher and catalog delta: both read the JunkWunk-Items stream
+Write-Host "`nConfiguring JunkWunk-Items stream consumers..." -ForegroundColor Green
+aws dynamodb update-table `
+    --table-name JunkWunk-Items `
+    --stream-specification StreamEnabled=true,StreamViewType=NEW_AND_OLD_IMAGES `
+    --region $region 2>$null | Out-Null
+$itemsStreamArn = aws dynamodb describe-table `
+    --table-name JunkWunk-Items `
+    --query "Table.LatestStreamArn" `
+    --output text `
+    --region $region
+foreach ($consumer in @("junkwunk-saved-search-matcher", "junkwunk-catalog-delta")) {
+    $existingMapping = aws lambda list-event-source-mappings `
+        --function-name $consumer `
+        --event-source-arn $itemsStreamArn `
+        --query "EventSourceMappings[0].UUID" `
+        --output text `
+        --region $region
+    if (-not $existingMapping -or $existingMapping -eq "None") {
+        aws lambda create-event-source-mapping `
+            --function-name $consumer `
+            --event-source-arn $itemsStreamArn `
+            --starting-position LATEST `
+            --batch-size 100 `
+            --maximum-retry-attempts 3 `
+            --bisect-batch-on-function-error `
+            --region $region | Out-Null
+        Write-Host "+ Created Items stream mapping for $consumer" -ForegroundColor Green
+    } else {
+        Write-Host "+ Items stream mapping already exists for ${consumer}: $existingMapping" -ForegroundColor Yellow
+    }
+}
+
+# Scheduled jobs. The catalog snapshot must be rebuilt well within the
+# CatalogDelta TTL (3 hours) so browse never misses a change.
+Write-Host "`nConfiguring schedules..." -ForegroundColor Green
+$schedules = @(
+    @{Function="junkwunk-trending-compactor"; Rule="junkwunk-trending-compactor-schedule"; Expression="rate(5 minutes)"},
+    @{Function="junkwunk-suggest-builder"; Rule="junkwunk-suggest-builder-schedule"; Expression="rate(1 hour)"},
+    @{Function="junkwunk-catalog-builder"; Rule="junkwunk-catalog-builder-schedule"; Expression="rate(1 hour)"},
+    @{Function="junkwunk-purchase-archiver"; Rule="junkwunk-purchase-archiver-schedule"; Expression="rate(1 day)"}
+)
+foreach ($schedule in $schedules) {
+    $ruleArn = aws events put-rule `
+        --name $schedule.Rule `
+        --schedule-expression $schedule.Expression `
+        --query "RuleArn" `
+        --output text `
+        --region $region
+    aws lambda add-permission `
+        --function-name $schedule.Function `
+        --statement-id "$($schedule.Rule)-invoke" `
+        --action lambda:InvokeFunction `
+        --principal events.amazonaws.com `
+        --source-arn $ruleArn `
+        --region $region 2>$null | Out-Null
+    aws events put-targets `
+        --rule $schedule.Rule `
+        --targets "Id=1,Arn=arn:aws:lambda:${region}:${accountId}:function:$($schedule.Function)" `
+        --region $region | Out-Null
+    Write-Host "+ $($schedule.Function): $($schedule.Expression)" -ForegroundColor Green
+}
+
+Write-Host "  JunkWunkLambdaExecutionRole needs s3:GetObject/PutObject on $archiveBucket for purchase_archiver and junkwunk-purchases-list" -ForegroundColor Yellow
+Write-Host "  JunkWunkLambdaExecutionRole needs dynamodb:GetRecords/GetShardIterator/DescribeStream/ListStreams on the Orders and Items streams and sqs:SendMessage on the DLQ" -ForegroundColor Yellow
+
+Write-Host "`n=== DEPLOYMENT COMPLETE ===" -ForegroundColor Green
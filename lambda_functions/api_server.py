@@ -0,0 +1,480 @@
+import asyncio
+import base64
+import importlib
+import json
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from resilience import Overloaded, error_response, size_retry_quota
+
+# Serves every API handler from one long-lived process, for on-prem and
+# staging environments that have no API Gateway or Lambda in front:
+#
+#   cd lambda_functions && uvicorn api_server:app --workers <cores>
+#
+# Each request is translated into the API Gateway proxy event the handler
+# already expects, with the Cognito claims supplied by a pluggable verifier.
+# Handlers are imported once per process, so their module caches serve every
+# request, and they share one DynamoDB client (resilience.dynamodb_resource)
+# whose connection pool has a connection per worker thread. Handlers are
+# blocking, so they run on a bounded thread pool; the retry quota is sized for
+# the pool. Requests past API_MAX_PENDING are shed with a 429 instead of
+# queueing without limit.
+
+# (method, resource path, Lambda function), as in setup-api-gateway.ps1 and,
+# for the item writes, deploy-item-lambdas.ps1
+ROUTES = [
+    ('GET', '/users/{userId}', 'junkwunk-user-get'),
+    ('PUT', '/users/{userId}', 'junkwunk-user-update'),
+    ('GET', '/items', 'junkwunk-items-list'),
+    ('POST', '/items', 'junkwunk-items-create'),
+    ('GET', '/items/{itemId}', 'junkwunk-items-get'),
+    ('PUT', '/items/{itemId}', 'junkwunk-items-update'),
+    ('DELETE', '/items/{itemId}', 'junkwunk-items-delete'),
+    ('GET', '/items/suggest', 'junkwunk-items-suggest'),
+    ('GET', '/items/trending', 'junkwunk-items-trending'),
+    ('GET', '/items/browse', 'junkwunk-items-browse'),
+    ('GET', '/cart', 'junkwunk-cart-list'),
+    ('POST', '/cart', 'junkwunk-cart-add'),
+    ('DELETE', '/cart/{itemId}', 'junkwunk-cart-remove'),
+    ('POST', '/cart/checkout', 'junkwunk-cart-checkout'),
+    ('GET', '/purchases', 'junkwunk-purchases-list'),
+    ('POST', '/images/upload-url', 'junkwunk-images-upload-url'),
+    ('GET', '/saved-searches', 'junkwunk-saved-searches-list'),
+    ('POST', '/saved-searches', 'junkwunk-saved-searches-create'),
+    ('DELETE', '/saved-searches/{searchId}', 'junkwunk-saved-searches-delete'),
+    ('POST', '/routes/plan', 'junkwunk-routes-plan')
+]
+
+WORKER_THREADS = int(os.environ.get('API_WORKER_THREADS', '32'))
+# Requests admitted at once (running + waiting for a thread)
+MAX_PENDING = int(os.environ.get('API_MAX_PENDING', str(WORKER_THREADS * 4)))
+# API Gateway's integration timeout
+REQUEST_TIMEOUT = 29
+MAX_BODY = 10 * 1024 * 1024
+STAGE = 'prod'
+
+USER_POOL_ID = os.environ.get('COGNITO_USER_POOL_ID', 'ap-south-1_KEGPzHo0I')
+CLIENT_ID = os.environ.get('COGNITO_CLIENT_ID', 'os5urmu6qi4k96ascqt5m2re0')
+
+# Same values as the OPTIONS mock integration (Enable-CORS)
+CORS_HEADERS = {
+    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,Idempotency-Key',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
+    'Access-Control-Allow-Origin': '*'
+}
+
+
+class Unauthorized(Exception):
+    pass
+
+
+class CognitoVerifier:
+    """Checks Cognito ID tokens like the COGNITO_USER_POOLS authorizer."""
+
+    def __init__(self, user_pool_id=USER_POOL_ID, client_id=CLIENT_ID, region='ap-south-1'):
+        import jwt  # PyJWT[crypto], only needed when serving
+        self.jwt = jwt
+        self.issuer = f'https://cognito-idp.{region}.amazonaws.com/{user_pool_id}'
+        self.client_id = client_id
+        # Signing keys are fetched once and cached for the process
+        self.keys = jwt.PyJWKClient(self.issuer + '/.well-known/jwks.json', cache_keys=True)
+
+    def __call__(self, token):
+        try:
+            key = self.keys.get_signing_key_from_jwt(token).key
+            claims = self.jwt.decode(token, key, algorithms=['RS256'], issuer=self.issuer,
+                                     audience=self.client_id, options={'verify_aud': bool(self.client_id)})
+        except self.jwt.PyJWTError as e:
+            raise Unauthorized(str(e)) from e
+        if claims.get('token_use') != 'id':
+            raise Unauthorized('Not an ID token')
+        return claims
+
+
+def unverified_claims(token):
+    # Local runs only: reads a JWT's claims without checking its signature
+    try:
+        payload = token.split('.')[1]
+        return json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+    except (IndexError, ValueError) as e:
+        raise Unauthorized('Malformed token') from e
+
+
+def load_verifier(spec=None):
+    # API_CLAIMS_VERIFIER: 'cognito' (default), 'unverified', or
+    # 'module:callable' for any callable mapping a token to its claims
+    spec = spec or os.environ.get('API_CLAIMS_VERIFIER', 'cognito')
+    if spec == 'cognito':
+        return CognitoVerifier()
+    if spec == 'unverified':
+        return unverified_claims
+    module, _, name = spec.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def gateway_claims(claims):
+    # The authorizer hands claims to the integration as strings
+    def text(value):
+        if isinstance(value, bool):
+            return str(value).lower()
+        if isinstance(value, (list, tuple)):
+            return ','.join(str(v) for v in value)
+        return str(value)
+    return {name: text(value) for name, value in claims.items()}
+
+
+class InvocationContext:
+    """The parts of the Lambda context object the handlers use."""
+
+    def __init__(self, function_name, request_id, timeout=REQUEST_TIMEOUT):
+        self.function_name = function_name
+        self.aws_request_id = request_id
+        self.deadline = time.monotonic() + timeout
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self.deadline - time.monotonic()) * 1000))
+
+
+class Route:
+
+    def __init__(self, method, resource, function_name):
+        self.method = method
+        self.resource = resource
+        self.function_name = function_name
+        self.module = function_name[len('junkwunk-'):].replace('-', '_')
+        self.segments = resource.strip('/').split('/')
+        self.params = sum(1 for s in self.segments if s.startswith('{'))
+        self.handler = None
+
+    def match(self, segments):
+        if len(segments) != len(self.segments):
+            return None
+        params = {}
+        for pattern, value in zip(self.segments, segments):
+            if pattern.startswith('{'):
+                params[pattern[1:-1]] = value
+            elif pattern != value:
+                return None
+        return params
+
+
+def build_event(route, method, path, params, scope, headers, body, request_id):
+    # API Gateway REST proxy event; claims are added once the token is verified
+    single_headers, multi_headers = {}, {}
+    for name, value in headers:
+        name, value = name.decode('latin-1'), value.decode('latin-1')
+        multi_headers.setdefault(name, []).append(value)
+        single_headers[name] = value
+    query, multi_query = {}, {}
+    for name, value in parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True):
+        multi_query.setdefault(name, []).append(value)
+        query[name] = value
+
+    is_base64 = False
+    if body:
+        try:
+            body = body.decode('utf-8')
+        except UnicodeDecodeError:
+            body, is_base64 = base64.b64encode(body).decode('ascii'), True
+    else:
+        body = None
+
+    client = scope.get('client') or ('', 0)
+    return {
+        'resource': route.resource,
+        'path': path,
+        'httpMethod': method,
+        'headers': single_headers or None,
+        'multiValueHeaders': multi_headers or None,
+        'queryStringParameters': query or None,
+        'multiValueQueryStringParameters': multi_query or None,
+        'pathParameters': params or None,
+        'stageVariables': None,
+        'requestContext': {
+            'resourcePath': route.resource,
+            'httpMethod': method,
+            'path': f'/{STAGE}{path}',
+            'stage': STAGE,
+            'requestId': request_id,
+            'requestTimeEpoch': int(time.time() * 1000),
+            'identity': {'sourceIp': client[0]},
+            'authorizer': {}
+        },
+        'body': body,
+        'isBase64Encoded': is_base64
+    }
+
+
+def gateway_response(status, message, headers=None):
+    return {
+        'statusCode': status,
+        'headers': dict({'Content-Type': 'application/json'}, **(headers or {})),
+        'body': json.dumps({'message': message})
+    }
+
+
+class ApiServer:
+    """ASGI application mounting the Lambda handlers on their API routes."""
+
+    def __init__(self, routes=ROUTES, verifier=None, workers=WORKER_THREADS, max_pending=MAX_PENDING):
+        # Literal resources win over parameterised ones (/items/suggest
+        # before /items/{itemId}), as in API Gateway
+        self.routes = sorted((Route(*r) for r in routes), key=lambda r: r.params)
+        self.verifier = verifier
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.executor = None
+
+    def load(self):
+        if self.executor is not None:
+            return
+        # One pooled connection per worker thread on the shared client
+        os.environ.setdefault('DYNAMODB_POOL_SIZE', str(self.workers))
+        # Each worker thread stands in for a Lambda container's retry quota
+        size_retry_quota(self.workers)
+        if self.verifier is None:
+            self.verifier = load_verifier()
+        for route in self.routes:
+            route.handler = importlib.import_module(route.module).lambda_handler
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='handler')
+
+    def resolve(self, method, path):
+        segments = path.strip('/').split('/')
+        resource = None
+        for route in self.routes:
+            params = route.match(segments)
+            if params is None or (resource is not None and route.resource != resource):
+                continue
+            resource = route.resource
+            if route.method == method:
+                return route, params, resource
+        return None, None, resource
+
+    def invoke(self, route, event, token):
+        # Runs on a worker thread: token verification may fetch signing keys
+        try:
+            claims = self.verifier(token) if token else None
+        except Unauthorized:
+            claims = None
+        if not claims:
+            return gateway_response(401, 'Unauthorized')
+        event['requestContext']['authorizer'] = {'claims': gateway_claims(claims)}
+        context = InvocationContext(route.function_name, event['requestContext']['requestId'])
+        try:
+            return route.handler(event, context)
+        except Exception as e:
+            # An unhandled error fails the invocation; API Gateway answers 502
+            print(f"Error: {route.function_name}: {str(e)}")
+            return gateway_response(502, 'Internal server error')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        self.load()
+        response = await self.handle(scope, receive)
+        await self.respond(send, response)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.load()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.executor is not None:
+                    self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def handle(self, scope, receive):
+        method = scope['method']
+        path = '/' + scope['path'].strip('/')
+        route, params, resource = self.resolve(method, path)
+        if resource is not None and method == 'OPTIONS':
+            return {'statusCode': 200, 'headers': CORS_HEADERS, 'body': ''}
+        if route is None:
+            return gateway_response(403, 'Missing Authentication Token')
+
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if len(body) > MAX_BODY:
+                return gateway_response(413, 'Request Too Long')
+            if not message.get('more_body'):
+                break
+
+        if self.pending >= self.max_pending:
+            return error_response(Overloaded('Server is at capacity'))
+        self.pending += 1
+        try:
+            headers = scope.get('headers', [])
+            token = next((v.decode('latin-1') for k, v in headers if k == b'authorization'), None)
+            event = build_event(route, method, path, params, scope, headers, body, str(uuid.uuid4()))
+            call = asyncio.get_running_loop().run_in_executor(self.executor, self.invoke, route, event, token)
+            try:
+                return await asyncio.wait_for(call, REQUEST_TIMEOUT)
+            except asyncio.TimeoutError:
+                return gateway_response(504, 'Endpoint request timed out')
+        finally:
+            self.pending -= 1
+
+    async def respond(self, send, response):
+        try:
+            status = int(response['statusCode'])
+            headers = [(k.lower().encode('latin-1'), str(v).encode('latin-1'))
+                       for k, v in (response.get('headers') or {}).items()]
+            for name, values in (response.get('multiValueHeaders') or {}).items():
+                headers += [(name.lower().encode('latin-1'), str(v).encode('latin-1')) for v in values]
+            body = response.get('body') or ''
+            body = base64.b64decode(body) if response.get('isBase64Encoded') else body.encode('utf-8')
+        except (KeyError, TypeError, ValueError, AttributeError):
+            # A malformed proxy response is a 502 at API Gateway too
+            return await self.respond(send, gateway_response(502, 'Internal server error'))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def routes_in_scripts(root):
+    # (method, resource, function) for each route the deploy scripts create
+    with open(os.path.join(root, 'setup-api-gateway.ps1')) as f:
+        routes = [(method, resource, function) for method, function, resource in re.findall(
+            r'^Add-LambdaMethod .*-HttpMethod "(\w+)" -LambdaFunctionName "([\w-]+)" -ResourcePath "([^"]+)"',
+            f.read(), re.MULTILINE)]
+    with open(os.path.join(root, 'deploy-item-lambdas.ps1')) as f:
+        routes += [(method, resource, function) for function, method, resource in re.findall(
+            r'@\{Name="([\w-]+)";.* Method="(\w+)"; Resource="([^"]+)"', f.read())]
+    return routes
+
+
+app = ApiServer()
+
+
+if __name__ == '__main__':
+    # Throughput of the server on one core against one-at-a-time Lambda
+    # invocations, on a mix of read endpoints backed by the stand-ins. The
+    # gain comes from overlapping the simulated DynamoDB waits, not from less
+    # CPU per request; both are reported:
+    #   python api_server.py --requests 3000 --latency-ms 5 --concurrency 64
+    import argparse
+    import contextlib
+    import io
+    import random
+    from decimal import Decimal
+    import resilience
+    from local_stores import LocalDynamoDB
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=WORKER_THREADS)
+    args = parser.parse_args()
+
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    if os.path.isfile(os.path.join(root, 'setup-api-gateway.ps1')):
+        assert sorted(routes_in_scripts(root)) == sorted(ROUTES), 'ROUTES differ from the deploy scripts'
+
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')  # signing image URLs needs credentials
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+
+    random.seed(3)
+    local = LocalDynamoDB(latency=args.latency_ms / 1000)
+    users = local.create_table('JunkWunk-Users', 'userId')
+    items = local.create_table('JunkWunk-Items', 'itemId')
+    cart = local.create_table('JunkWunk-Cart', 'userId', 'itemId')
+    local.create_table('JunkWunk-TrendingCounters', 'counterId')
+    # Every handler imported from here on builds its tables from the stand-in
+    resilience._dynamodb = local
+
+    user_ids = [f'user-{n}' for n in range(200)]
+    item_ids = [f'item-{n}' for n in range(2000)]
+    for user_id in user_ids:
+        users.items[(user_id,)] = {'userId': user_id, 'name': 'Seller', 'city': 'Pune', 'role': 'seller'}
+    for n, item_id in enumerate(item_ids):
+        items.items[(item_id,)] = {
+            'itemId': item_id, 'title': f'Listing {n}', 'price': Decimal(n % 500 + 10), 'city': 'Pune',
+            'categories': ['furniture'], 'imageUrl': f'images/seller/{item_id}.jpg', 'status': 'active',
+            'sellerId': random.choice(user_ids), 'timestamp': '2026-10-01T10:00:00'
+        }
+    for user_id in user_ids:
+        for item_id in random.sample(item_ids, 3):
+            cart.items[(user_id, item_id)] = dict(items.items[(item_id,)], userId=user_id, quantity=1)
+
+    def token_for(user_id):
+        claims = base64.urlsafe_b64encode(json.dumps({'sub': user_id, 'token_use': 'id'}).encode()).decode()
+        return f'e30.{claims.rstrip("=")}.local'
+
+    bench_routes = [r for r in ROUTES if r[2] in ('junkwunk-user-get', 'junkwunk-items-get', 'junkwunk-cart-list')]
+    server = ApiServer(routes=bench_routes, verifier=unverified_claims, workers=args.workers,
+                       max_pending=args.concurrency * 2)
+    server.load()
+    requests = []
+    for _ in range(args.requests):
+        user_id = random.choice(user_ids)
+        path = random.choice([f'/users/{user_id}', f"/items/{random.choice(item_ids)}", '/cart'])
+        requests.append(('GET', path, token_for(user_id)))
+
+    def lambda_run():
+        # One execution environment handles one request at a time; the event
+        # arrives ready-made from API Gateway
+        statuses = []
+        for method, path, token in requests:
+            route, params, _ = server.resolve(method, path)
+            event = build_event(route, method, path, params, {}, [], b'', str(uuid.uuid4()))
+            event['requestContext']['authorizer'] = {'claims': gateway_claims(unverified_claims(token))}
+            statuses.append(route.handler(event, InvocationContext(route.function_name, 'bench'))['statusCode'])
+        return statuses
+
+    async def server_run():
+        queue = list(reversed(requests))
+        statuses = []
+
+        async def client():
+            while queue:
+                method, path, token = queue.pop()
+                scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'',
+                         'headers': [(b'authorization', token.encode())], 'client': ('127.0.0.1', 0)}
+                sent = []
+
+                async def receive():
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+                async def send(message):
+                    sent.append(message)
+
+                await server(scope, receive, send)
+                statuses.append(sent[0]['status'])
+
+        await asyncio.gather(*(client() for _ in range(args.concurrency)))
+        return statuses
+
+    def measure(run):
+        wall, cpu = time.perf_counter(), time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            statuses = run()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        assert set(statuses) == {200}, f'unexpected statuses {sorted(set(statuses))}'
+        return len(statuses) / wall, cpu / len(statuses) * 1000
+
+    lambda_rps, lambda_cpu = measure(lambda_run)
+    server_rps, server_cpu = measure(lambda: asyncio.run(server_run()))
+    server.executor.shutdown()
+    print(f"{args.requests} GETs over /users/{{userId}}, /items/{{itemId}} and /cart, "
+          f"{args.latency_ms:.0f}ms per DynamoDB call, one core:")
+    print(f"  Lambda, one request per environment: {lambda_rps:7.0f} req/s, {lambda_cpu:.2f} CPU ms per request")
+    print(f"  api_server, {args.workers} threads, {args.concurrency} clients: "
+          f"{server_rps:7.0f} req/s, {server_cpu:.2f} CPU ms per request")
+    print(f"  {server_rps / lambda_rps:.1f}x throughput from serving requests concurrently while they wait on "
+          f"DynamoDB; {(server_cpu / lambda_cpu - 1) * 100:+.0f}% CPU per request")
@@ -0,0 +1,55 @@
+import os
+import threading
+import time
+import boto3
+
+ARTIFACT_BUCKET = os.environ.get('ARTIFACT_BUCKET', 'junkwunk-images-ap-south-1')
+
+s3 = boto3.client('s3', region_name='ap-south-1')
+
+
+class ArtifactLoader:
+    """Keeps a prebuilt S3 artifact downloaded to /tmp and opened.
+
+    A warm container checks the object's ETag every refresh_interval seconds
+    and swaps in a rebuilt artifact. If a check or download fails once an
+    artifact is loaded, the loaded one keeps being served until the next check.
+    """
+
+    def __init__(self, key, local_path, opener, refresh_interval, bucket=ARTIFACT_BUCKET):
+        self.bucket = bucket
+        self.key = key
+        self.local_path = local_path
+        self.opener = opener
+        self.refresh_interval = refresh_interval
+        self.artifact = None
+        self.etag = None
+        self.checked_at = 0
+        # One refresh at a time when requests share the process (api_server)
+        self.lock = threading.Lock()
+
+    def _fresh(self, now):
+        return self.artifact is not None and now - self.checked_at < self.refresh_interval
+
+    def get(self):
+        now = time.time()
+        if self._fresh(now):
+            return self.artifact
+        with self.lock:
+            if self._fresh(now):
+                return self.artifact
+            self.checked_at = now
+            try:
+                etag = s3.head_object(Bucket=self.bucket, Key=self.key)['ETag']
+                if etag != self.etag:
+                    # Download beside the live file and swap it in; the old
+                    # mapping stays valid for any reader still holding it
+                    s3.download_file(self.bucket, self.key, self.local_path + '.new')
+                    os.replace(self.local_path + '.new', self.local_path)
+                    self.artifact = self.opener(self.local_path)
+                    self.etag = etag
+            except Exception as e:
+                if self.artifact is None:
+                    raise
+                print(f"Could not refresh {self.key}, serving the loaded artifact: {str(e)}")
+        return self.artifact
@@ -1,12 +1,15 @@
 import json
-import boto3
 from decimal import Decimal
 from datetime import datetime, timedelta
 from boto3.dynamodb.conditions import Key
 
-dynamodb = boto3.resource('dynamodb', region_name='ap-south-1')
-cart_table = dynamodb.Table('JunkWunk-Cart')
-items_table = dynamodb.Table('JunkWunk-Items')
+from idempotency import idempotent
+from resilience import ResilientTable, dynamodb_resource, error_response, with_retry_budget
+from trending import record_event
+
+dynamodb = dynamodb_resource()
+cart_table = ResilientTable(dynamodb.Table('JunkWunk-Cart'))
+items_table = ResilientTable(dynamodb.Table('JunkWunk-Items'))
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -14,6 +17,8 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super(DecimalEncoder, self).default(obj)
 
+@with_retry_budget
+@idempotent('cart_add')
 def lambda_handler(event, context):
     try:
         # Get userId from Cognito
@@ -85,18 +90,28 @@ def lambda_handler(event, context):
         # Add to cart (or update quantity if exists)
         try:
             # Try to get existing cart item
-            existing = cart_table.get_item(Key={'userId': user_id, 'itemId': item_id})
+            existing = cart_table.get_item(Key={'userId': user_id, 'itemId': item_id}).get('Item')
             
-            if 'Item' in existing:
+            # A line claimed by a pending checkout belongs to that order (the
+            # checkout worker deletes it); adding the item again starts a new line
+            if existing and not existing.get('checkoutOrderId'):
                 # Update quantity
-                new_quantity = existing['Item'].get('quantity', 0) + quantity
-                cart_table.update_item(
-                    Key={'userId': user_id, 'itemId': item_id},
-                    UpdateExpression='SET quantity = :q, #ttl = :ttl',
-                    ExpressionAttributeNames={'#ttl': 'ttl'},
-                    ExpressionAttributeValues={':q': new_quantity, ':ttl': ttl}
-                )
+                new_quantity = existing.get('quantity', 0) + quantity
+                try:
+                    cart_table.update_item(
+                        Key={'userId': user_id, 'itemId': item_id},
+                        UpdateExpression='SET quantity = :q, #ttl = :ttl',
+                        ConditionExpression='attribute_exists(itemId) AND attribute_not_exists(checkoutOrderId)',
+                        ExpressionAttributeNames={'#ttl': 'ttl'},
+                        ExpressionAttributeValues={':q': new_quantity, ':ttl': ttl}
+                    )
+                except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+                    # Checked out or removed since it was read
+                    existing = None
             else:
+                existing = None
+            
+            if existing is None:
                 # Create new cart item
                 cart_table.put_item(Item={
                     'userId': user_id,
@@ -109,6 +124,7 @@ def lambda_handler(event, context):
                     'title': item.get('title', ''),
                     'description': item.get('description', ''),
                     'imageUrl': item.get('imageUrl', ''),
+                    'imageRenditions': item.get('imageRenditions', {}),
                     'categories': item.get('categories', []),
                     'price': item.get('price', 0),
                     'sellerName': item.get('sellerName', 'Unknown Seller'),
@@ -116,9 +132,11 @@ def lambda_handler(event, context):
                     'coordinates': item.get('coordinates', {})
                 })
         except Exception as e:
-            debugPrint(f"Error updating cart: {str(e)}")
+            print(f"Error updating cart: {str(e)}")
             raise
         
+        record_event(item, 'cart_add')
+        
         return {
             'statusCode': 200,
             'headers': {
@@ -129,12 +147,4 @@ def lambda_handler(event, context):
         }
         
     except Exception as e:
-        debugPrint(f"Error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': str(e)})
-        }
+        return error_response(e)
@@ -1,14 +1,26 @@
 import json
-import boto3
 import uuid
 from decimal import Decimal
 from datetime import datetime
 from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeSerializer
 
-dynamodb = boto3.resource('dynamodb', region_name='ap-south-1')
-cart_table = dynamodb.Table('JunkWunk-Cart')
-items_table = dynamodb.Table('JunkWunk-Items')
-purchases_table = dynamodb.Table('JunkWunk-Purchases')
+from idempotency import idempotent
+from resilience import ResilientTable, current_budget, dynamodb_resource, error_response, with_retry_budget
+
+dynamodb = dynamodb_resource()
+cart_table = ResilientTable(dynamodb.Table('JunkWunk-Cart'))
+
+CART_TABLE = 'JunkWunk-Cart'
+ITEMS_TABLE = 'JunkWunk-Items'
+ORDERS_TABLE = 'JunkWunk-Orders'
+# One transaction holds a stock update and a cart claim per line plus the
+# outbox row, within DynamoDB's 100 actions per transaction
+MAX_ITEMS_PER_CHECKOUT = 49
+# Each failed attempt drops the lines it rejected
+MAX_COMMIT_ATTEMPTS = 3
+
+serializer = TypeSerializer()
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -16,6 +28,45 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super(DecimalEncoder, self).default(obj)
 
+def typed(values):
+    return {k: serializer.serialize(v) for k, v in values.items()}
+
+def commit_order(order, lines):
+    # Stock for every line, a claim on every cart line and the outbox row
+    # commit atomically. The claim makes a second checkout of the same cart
+    # fail until checkout_worker has cleared the lines; the JunkWunk-Orders
+    # stream feeds the worker, which writes the purchase records, clears the
+    # cart and runs the other side effects.
+    transact_items = [
+        {'Update': {
+            'TableName': ITEMS_TABLE,
+            'Key': typed({'itemId': line['itemId']}),
+            'UpdateExpression': 'SET quantity = quantity - :q',
+            'ConditionExpression': '#status = :active AND quantity >= :q',
+            'ExpressionAttributeNames': {'#status': 'status'},
+            'ExpressionAttributeValues': typed({':q': line['quantity'], ':active': 'active'})
+        }}
+        for line in lines
+    ]
+    transact_items += [
+        {'Update': {
+            'TableName': CART_TABLE,
+            'Key': typed({'userId': order['userId'], 'itemId': line['itemId']}),
+            'UpdateExpression': 'SET checkoutOrderId = :orderId',
+            'ConditionExpression': 'attribute_exists(itemId) AND attribute_not_exists(checkoutOrderId)',
+            'ExpressionAttributeValues': typed({':orderId': order['orderId']})
+        }}
+        for line in lines
+    ]
+    transact_items.append({'Put': {
+        'TableName': ORDERS_TABLE,
+        'Item': typed(dict(order, lines=lines)),
+        'ConditionExpression': 'attribute_not_exists(orderId)'
+    }})
+    current_budget().call(dynamodb.meta.client.transact_write_items, TransactItems=transact_items)
+
+@with_retry_budget
+@idempotent('cart_checkout')
 def lambda_handler(event, context):
     try:
         # Get userId from Cognito
@@ -32,16 +83,16 @@ def lambda_handler(event, context):
             }
         
         body = json.loads(event.get('body', '{}'))
-        item_ids = body.get('itemIds', [])  # List of itemIds to checkout
+        item_ids = list(dict.fromkeys(body.get('itemIds', [])))  # List of itemIds to checkout
         
-        if not item_ids:
+        if not item_ids or len(item_ids) > MAX_ITEMS_PER_CHECKOUT:
             return {
                 'statusCode': 400,
                 'headers': {
                     'Content-Type': 'application/json',
                     'Access-Control-Allow-Origin': '*'
                 },
-                'body': json.dumps({'error': 'itemIds array is required'})
+                'body': json.dumps({'error': f'itemIds array of 1-{MAX_ITEMS_PER_CHECKOUT} items is required'})
             }
         
         # Get all cart items for user
@@ -50,69 +101,62 @@ def lambda_handler(event, context):
         )
         cart_items = {item['itemId']: item for item in cart_response.get('Items', [])}
         
-        # Process each item
-        purchases_created = []
-        errors = []
+        errors = [f"Item {item_id} not in cart" for item_id in item_ids if item_id not in cart_items]
+        in_checkout = [item_id for item_id in item_ids if cart_items.get(item_id, {}).get('checkoutOrderId')]
+        errors.extend(f"Item {item_id} is already being checked out" for item_id in in_checkout)
         
+        # Denormalized purchase details travel with the order so the worker
+        # never has to re-read the cart
+        timestamp = int(datetime.now().timestamp())
+        lines = []
         for item_id in item_ids:
-            if item_id not in cart_items:
-                errors.append(f"Item {item_id} not in cart")
+            if item_id not in cart_items or item_id in in_checkout:
                 continue
-            
             cart_item = cart_items[item_id]
-            quantity_requested = cart_item.get('quantity', 1)
-            
-            # Get current item from Items table
-            item_response = items_table.get_item(Key={'itemId': item_id})
-            if 'Item' not in item_response:
-                errors.append(f"Item {item_id} not found")
-                continue
-            
-            item = item_response['Item']
-            current_quantity = item.get('quantity', 0)
-            
-            # Update item quantity
-            new_quantity = current_quantity - quantity_requested
-            
-            if new_quantity <= 0:
-                # Mark as inactive
-                items_table.update_item(
-                    Key={'itemId': item_id},
-                    UpdateExpression='SET quantity = :q, #status = :status',
-                    ExpressionAttributeNames={'#status': 'status'},
-                    ExpressionAttributeValues={':q': 0, ':status': 'inactive'}
-                )
-            else:
-                items_table.update_item(
-                    Key={'itemId': item_id},
-                    UpdateExpression='SET quantity = :q',
-                    ExpressionAttributeValues={':q': new_quantity}
-                )
-            
-            # Create purchase record
-            purchase_id = str(uuid.uuid4())
-            purchase = {
-                'purchaseId': purchase_id,
-                'userId': user_id,
-                'sellerId': cart_item.get('sellerId', ''),
+            lines.append({
+                'purchaseId': str(uuid.uuid4()),
                 'itemId': item_id,
-                'timestamp': int(datetime.now().timestamp()),
-                'status': 'completed',
+                'sellerId': cart_item.get('sellerId', ''),
+                'quantity': cart_item.get('quantity', 1),
                 'title': cart_item.get('title', ''),
                 'description': cart_item.get('description', ''),
                 'categories': cart_item.get('categories', []),
                 'imageUrl': cart_item.get('imageUrl', ''),
-                'quantity': quantity_requested,
+                'imageRenditions': cart_item.get('imageRenditions', {}),
                 'price': cart_item.get('price', 0),
                 'sellerName': cart_item.get('sellerName', 'Unknown Seller'),
                 'city': cart_item.get('city', '')
-            }
-            
-            purchases_table.put_item(Item=purchase)
-            purchases_created.append(purchase_id)
-            
-            # Remove from cart
-            cart_table.delete_item(Key={'userId': user_id, 'itemId': item_id})
+            })
+        
+        order = {
+            'orderId': str(uuid.uuid4()),
+            'userId': user_id,
+            'timestamp': timestamp,
+            'status': 'pending'
+        }
+        
+        # A line whose stock check or cart claim fails cancels the whole
+        # transaction; drop those lines and retry with the rest
+        for attempt in range(MAX_COMMIT_ATTEMPTS):
+            if not lines:
+                break
+            try:
+                commit_order(order, lines)
+                break
+            except dynamodb.meta.client.exceptions.TransactionCanceledException as e:
+                reasons = e.response.get('CancellationReasons', [])
+                failed = [i for i, reason in enumerate(reasons) if reason.get('Code') == 'ConditionalCheckFailed']
+                sold_out = {lines[i]['itemId'] for i in failed if i < len(lines)}
+                claimed = {lines[i - len(lines)]['itemId'] for i in failed if len(lines) <= i < 2 * len(lines)}
+                if not sold_out and not claimed:
+                    raise
+                errors.extend(f"Item {item_id} is no longer available in the requested quantity" for item_id in sold_out)
+                errors.extend(f"Item {item_id} is already being checked out" for item_id in claimed - sold_out)
+                lines = [line for line in lines if line['itemId'] not in sold_out | claimed]
+        else:
+            # Still contended after every attempt: nothing was committed
+            errors.extend(f"Item {line['itemId']} could not be checked out, please retry" for line in lines)
+            lines = []
         
         return {
             'statusCode': 200,
@@ -122,18 +166,11 @@ def lambda_handler(event, context):
             },
             'body': json.dumps({
                 'message': 'Checkout completed',
-                'purchasesCreated': purchases_created,
+                'orderId': order['orderId'] if lines else None,
+                'purchasesCreated': [line['purchaseId'] for line in lines],
                 'errors': errors
             })
         }
         
     except Exception as e:
-        debugPrint(f"Error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': str(e)})
-        }
+        return error_response(e)
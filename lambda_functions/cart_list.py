@@ -1,10 +1,13 @@
 import json
-import boto3
 from decimal import Decimal
 from boto3.dynamodb.conditions import Key
 
-dynamodb = boto3.resource('dynamodb', region_name='ap-south-1')
-table = dynamodb.Table('JunkWunk-Cart')
+from image_renditions import select_image
+from image_urls import attach_signed_urls
+from resilience import ResilientTable, dynamodb_resource, error_response, with_retry_budget
+
+dynamodb = dynamodb_resource()
+table = ResilientTable(dynamodb.Table('JunkWunk-Cart'))
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -12,6 +15,7 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super(DecimalEncoder, self).default(obj)
 
+@with_retry_budget
 def lambda_handler(event, context):
     try:
         # Get userId from Cognito
@@ -32,7 +36,8 @@ def lambda_handler(event, context):
             KeyConditionExpression=Key('userId').eq(user_id)
         )
         
-        items = response.get('Items', [])
+        items = [select_image(item) for item in response.get('Items', [])]
+        attach_signed_urls(items)
         
         return {
             'statusCode': 200,
@@ -47,12 +52,4 @@ def lambda_handler(event, context):
         }
         
     except Exception as e:
-        debugPrint(f"Error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': str(e)})
-        }
+        return error_response(e)
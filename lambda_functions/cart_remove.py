@@ -1,9 +1,10 @@
 import json
-import boto3
 from decimal import Decimal
 
-dynamodb = boto3.resource('dynamodb', region_name='ap-south-1')
-table = dynamodb.Table('JunkWunk-Cart')
+from resilience import ResilientTable, dynamodb_resource, error_response, with_retry_budget
+
+dynamodb = dynamodb_resource()
+table = ResilientTable(dynamodb.Table('JunkWunk-Cart'))
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -11,6 +12,7 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super(DecimalEncoder, self).default(obj)
 
+@with_retry_budget
 def lambda_handler(event, context):
     try:
         # Get userId from Cognito
@@ -51,12 +53,4 @@ def lambda_handler(event, context):
         }
         
     except Exception as e:
-        debugPrint(f"Error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': str(e)})
-        }
+        return error_response(e)
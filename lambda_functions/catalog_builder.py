@@ -0,0 +1,58 @@
+import json
+import os
+import time
+import boto3
+from boto3.dynamodb.conditions import Key
+
+from catalog_snapshot import build
+from resilience import ResilientTable, TokenBucket, dynamodb_resource
+
+ARTIFACT_BUCKET = os.environ.get('ARTIFACT_BUCKET', 'junkwunk-images-ap-south-1')
+ARTIFACT_KEY = os.environ.get('CATALOG_ARTIFACT_KEY', 'artifacts/catalog/snapshot.bin')
+
+dynamodb = dynamodb_resource()
+items_table = ResilientTable(dynamodb.Table('JunkWunk-Items'))
+s3 = boto3.client('s3', region_name='ap-south-1')
+
+page_pacer = TokenBucket(float(os.environ.get('SCAN_PAGES_PER_SECOND', '5')), 2)
+
+FIELDS = ['itemId', 'price', 'city', 'categories', 'timestamp']
+
+
+def active_items():
+    query_kwargs = {
+        'IndexName': 'StatusIndex',
+        'KeyConditionExpression': Key('status').eq('active'),
+        'ProjectionExpression': ', '.join(f'#{f}' for f in FIELDS),
+        'ExpressionAttributeNames': {f'#{f}': f for f in FIELDS}
+    }
+    while True:
+        page_pacer.acquire()
+        response = items_table.query(**query_kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def lambda_handler(event, context):
+    # Scheduled rebuild; items_browse picks the new artifact up by ETag and
+    # covers writes since the build start from JunkWunk-CatalogDelta
+    start = time.time()
+    items = list(active_items())
+    artifact = build(items, built_at=start)
+
+    s3.put_object(
+        Bucket=ARTIFACT_BUCKET,
+        Key=ARTIFACT_KEY,
+        Body=artifact,
+        ContentType='application/octet-stream'
+    )
+
+    summary = {
+        'items': len(items),
+        'bytes': len(artifact),
+        'seconds': round(time.time() - start, 2)
+    }
+    print(json.dumps(summary))
+    return summary
@@ -0,0 +1,45 @@
+import json
+import os
+import time
+from boto3.dynamodb.types import TypeDeserializer
+
+from resilience import dynamodb_resource
+
+dynamodb = dynamodb_resource()
+# bucket (always RECENT) + itemId; TTL on expiresAt. Listing writes are rare
+# enough for one partition, and items_browse reads it with a single query.
+delta_table = dynamodb.Table(os.environ.get('CATALOG_DELTA_TABLE', 'JunkWunk-CatalogDelta'))
+
+RECENT = 'recent'
+# Must outlast the catalogue snapshot schedule plus a failed run or two
+DELTA_TTL = 3 * 3600
+CARD_FIELDS = ['itemId', 'title', 'price', 'imageUrl', 'imageRenditions', 'city',
+               'categories', 'sellerName', 'status', 'timestamp']
+
+deserializer = TypeDeserializer()
+
+
+def lambda_handler(event, context):
+    # Triggered by the JunkWunk-Items stream (NEW_IMAGE), next to the saved
+    # search matcher. Records the latest state of every changed listing.
+    now = int(time.time())
+    changes = {}
+    for record in event.get('Records', []):
+        data = record.get('dynamodb', {})
+        item_id = deserializer.deserialize(data['Keys']['itemId'])
+        image = data.get('NewImage')
+        item = {k: deserializer.deserialize(v) for k, v in image.items()} if image else None
+        change = {'bucket': RECENT, 'itemId': item_id, 'changedAt': now, 'expiresAt': now + DELTA_TTL}
+        if record.get('eventName') == 'REMOVE' or not item or item.get('status', 'active') != 'active':
+            change['removed'] = True
+        else:
+            change['item'] = {f: item[f] for f in CARD_FIELDS if f in item}
+        # Later records in the batch win
+        changes[item_id] = change
+
+    with delta_table.batch_writer(overwrite_by_pkeys=['bucket', 'itemId']) as batch:
+        for change in changes.values():
+            batch.put_item(Item=change)
+
+    print(json.dumps({'changes': len(changes)}))
+    return {'changes': len(changes)}
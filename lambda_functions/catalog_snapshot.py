@@ -0,0 +1,347 @@
+import hashlib
+import json
+import mmap
+import struct
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import numpy as np
+
+# Columnar, memory-mappable snapshot of the active catalogue for faceted
+# browsing. Rows are sorted newest first; each facet is a flat array so a
+# filter is a handful of vectorized passes instead of a loop over dicts.
+#
+# Layout (little endian, every section 8-byte aligned):
+#   header | prices f8[n] | id hashes u8[n] (sorted) | category bits u8[n*w]
+#   | timestamps u4[n] | id rows u4[n] | id offsets u4[n+1] | city codes u2[n]
+#   | id blob | dictionaries (JSON: cities, categories)
+
+MAGIC = b'JWCS'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIIIII')
+
+# Upper edges of the price facet buckets; the last bucket is open ended
+PRICE_EDGES = [0, 100, 500, 1000, 5000, 10000, float('inf')]
+NO_CITY = 0xFFFF
+
+
+def parse_timestamp(value):
+    # Listings store ISO strings (items_create); older rows may be epochs
+    if isinstance(value, (int, float, Decimal)):
+        return int(value)
+    if not value:
+        return 0
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def id_hash(item_id):
+    return int.from_bytes(hashlib.blake2b(item_id.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _pad(data):
+    return data + b'\0' * (-len(data) % 8)
+
+
+def _lookup(names):
+    return {name.strip().lower(): code for code, name in enumerate(names)}
+
+
+def build(items, built_at):
+    items = sorted(items, key=lambda item: -parse_timestamp(item.get('timestamp')))
+    n = len(items)
+
+    # Dictionaries keep the first spelling seen and match case-insensitively
+    cities, city_codes = [], {}
+    categories, category_bits = [], {}
+    for item in items:
+        city = (item.get('city') or '').strip()
+        if city and city.lower() not in city_codes:
+            city_codes[city.lower()] = len(cities)
+            cities.append(city)
+        for category in item.get('categories') or []:
+            category = category.strip()
+            if category and category.lower() not in category_bits:
+                category_bits[category.lower()] = len(categories)
+                categories.append(category)
+    if len(cities) >= NO_CITY:
+        raise ValueError('Too many cities for 16-bit codes')
+    words = max(1, (len(categories) + 63) // 64)
+
+    prices = np.array([float(item.get('price') or 0) for item in items], dtype='<f8')
+    timestamps = np.array([parse_timestamp(item.get('timestamp')) for item in items], dtype='<u4')
+    codes = np.array([city_codes.get((item.get('city') or '').strip().lower(), NO_CITY) for item in items],
+                     dtype='<u2')
+    bits = np.zeros((n, words), dtype='<u8')
+    for row, item in enumerate(items):
+        for category in item.get('categories') or []:
+            bit = category_bits.get(category.strip().lower())
+            if bit is not None:
+                bits[row, bit // 64] |= np.uint64(1 << (bit % 64))
+
+    encoded_ids = [item['itemId'].encode('utf-8') for item in items]
+    id_offsets = np.zeros(n + 1, dtype='<u4')
+    np.cumsum([len(e) for e in encoded_ids], out=id_offsets[1:])
+    hashes = np.array([id_hash(item['itemId']) for item in items], dtype='<u8')
+    id_rows = np.argsort(hashes, kind='stable').astype('<u4')
+
+    id_blob = b''.join(encoded_ids)
+    dictionaries = json.dumps({'cities': cities, 'categories': categories}).encode('utf-8')
+
+    return b''.join([
+        _pad(HEADER.pack(MAGIC, VERSION, n, len(cities), len(categories), words,
+                         int(built_at), len(id_blob))),
+        prices.tobytes(),
+        hashes[id_rows].tobytes(),
+        bits.tobytes(),
+        _pad(timestamps.tobytes()),
+        _pad(id_rows.tobytes()),
+        _pad(id_offsets.tobytes()),
+        _pad(codes.tobytes()),
+        _pad(id_blob),
+        dictionaries
+    ])
+
+
+class CatalogSnapshot:
+
+    def __init__(self, buf):
+        magic, version, n, n_cities, n_categories, words, built_at, id_blob_len = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Not a catalogue snapshot')
+
+        self._buf = buf
+        self.rows = n
+        self.words = words
+        self.built_at = built_at
+
+        pos = HEADER.size + (-HEADER.size % 8)
+
+        def take(dtype, count):
+            nonlocal pos
+            section = np.frombuffer(buf, dtype=dtype, count=count, offset=pos)
+            pos += section.nbytes + (-section.nbytes % 8)
+            return section
+
+        self.prices = take('<f8', n)
+        self._id_hashes = take('<u8', n)
+        self.category_bits = take('<u8', n * words).reshape(n, words)
+        self.timestamps = take('<u4', n)
+        self._id_rows = take('<u4', n)
+        self._id_offsets = take('<u4', n + 1)
+        self.city_codes = take('<u2', n)
+        self._id_blob = memoryview(buf)[pos:pos + id_blob_len]
+        pos += id_blob_len + (-id_blob_len % 8)
+        dictionaries = json.loads(bytes(memoryview(buf)[pos:]))
+
+        self.cities = dictionaries['cities']
+        self.categories = dictionaries['categories']
+        self._city_lookup = _lookup(self.cities)
+        self._category_lookup = _lookup(self.categories)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def city_name(self, city):
+        # The snapshot's spelling of a city, so fresh listings count under it
+        code = self._city_lookup.get(city.strip().lower())
+        return self.cities[code] if code is not None else city.strip()
+
+    def category_name(self, category):
+        bit = self._category_lookup.get(category.strip().lower())
+        return self.categories[bit] if bit is not None else category.strip()
+
+    def item_id(self, row):
+        return bytes(self._id_blob[self._id_offsets[row]:self._id_offsets[row + 1]]).decode('utf-8')
+
+    def rows_for(self, item_ids):
+        # Snapshot rows of the given ids (ids not in the snapshot are skipped)
+        if not item_ids:
+            return np.zeros(0, dtype=np.int64)
+        wanted = np.array([id_hash(i) for i in item_ids], dtype='<u8')
+        positions = np.searchsorted(self._id_hashes, wanted)
+        inside = positions < self.rows
+        positions, wanted = positions[inside], wanted[inside]
+        found = positions[self._id_hashes[positions] == wanted]
+        return self._id_rows[found].astype(np.int64)
+
+    def _category_mask(self, names):
+        mask = np.zeros(self.rows, dtype=bool)
+        for name in names:
+            bit = self._category_lookup.get(name.strip().lower())
+            if bit is not None:
+                mask |= (self.category_bits[:, bit // 64] & np.uint64(1 << (bit % 64))) != 0
+        return mask
+
+    def query(self, min_price=None, max_price=None, cities=(), categories=(), exclude=(), offset=0, limit=20):
+        """Filter, count facets and page through the snapshot.
+
+        cities and categories match any of the given values. Each facet is
+        counted with every filter applied except its own, so the counts say
+        how many results picking that value would give.
+        """
+        live = np.ones(self.rows, dtype=bool)
+        live[self.rows_for(list(exclude))] = False
+
+        price_mask = live.copy()
+        if min_price is not None:
+            price_mask &= self.prices >= min_price
+        if max_price is not None:
+            price_mask &= self.prices <= max_price
+        city_mask = np.ones(self.rows, dtype=bool)
+        if cities:
+            codes = [self._city_lookup[c.strip().lower()] for c in cities if c.strip().lower() in self._city_lookup]
+            city_mask = np.isin(self.city_codes, np.array(codes, dtype='<u2'))
+        category_mask = self._category_mask(categories) if categories else np.ones(self.rows, dtype=bool)
+
+        matched = np.flatnonzero(price_mask & city_mask & category_mask)
+
+        without_city = price_mask & category_mask
+        city_counts = np.bincount(self.city_codes[without_city], minlength=NO_CITY + 1)[:len(self.cities)]
+
+        without_category = np.flatnonzero(price_mask & city_mask)
+        selected_bits = self.category_bits[without_category]
+        category_counts = [
+            int(np.count_nonzero(selected_bits[:, bit // 64] & np.uint64(1 << (bit % 64))))
+            for bit in range(len(self.categories))
+        ]
+
+        without_price = self.prices[live & city_mask & category_mask]
+        price_counts = np.bincount(np.searchsorted(PRICE_EDGES[1:-1], without_price, side='right'),
+                                   minlength=len(PRICE_EDGES) - 1)
+
+        return {
+            'rows': matched[offset:offset + limit].tolist(),
+            'total': int(len(matched)),
+            'facets': {
+                'city': {name: int(count) for name, count in zip(self.cities, city_counts) if count},
+                'category': {name: count for name, count in zip(self.categories, category_counts) if count},
+                'price': [int(count) for count in price_counts]
+            }
+        }
+
+
+def item_matches(item, min_price=None, max_price=None, cities=(), categories=()):
+    # Same filters as CatalogSnapshot.query, for the handful of listings
+    # written since the snapshot was built
+    price = float(item.get('price') or 0)
+    city = (item.get('city') or '').strip().lower()
+    item_categories = {c.strip().lower() for c in item.get('categories') or []}
+    return {
+        'price': (min_price is None or price >= min_price) and (max_price is None or price <= max_price),
+        'city': not cities or city in {c.strip().lower() for c in cities},
+        'category': not categories or bool(item_categories & {c.strip().lower() for c in categories})
+    }
+
+
+def price_bucket(price):
+    for index, edge in enumerate(PRICE_EDGES[1:]):
+        if price < edge:
+            return index
+    return len(PRICE_EDGES) - 2
+
+
+if __name__ == '__main__':
+    # Compare a faceted query on the snapshot with the current approach (read
+    # every active listing, then filter and count in Python):
+    #   python catalog_snapshot.py --items 100000
+    #   python catalog_snapshot.py --items 1000000
+    import argparse
+    import os
+    import random
+    import tempfile
+    import time
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cities = ['Bengaluru', 'Mumbai', 'Pune', 'Delhi', 'Chennai', 'Hyderabad', 'Kolkata', 'Jaipur']
+    categories = ['Plastic', 'Paper', 'Metal', 'E-Waste', 'Glass', 'Furniture', 'Textile', 'Other']
+    now = int(time.time())
+    items = [
+        {
+            'itemId': f'item-{n:07d}',
+            'price': Decimal(rng.choice([49, 99, 250, 499, 999, 1500, 4999, 12000])),
+            'city': rng.choice(cities),
+            'categories': rng.sample(categories, rng.randint(1, 3)),
+            'timestamp': now - rng.randint(0, 180 * 24 * 3600)
+        }
+        for n in range(args.items)
+    ]
+
+    start = time.perf_counter()
+    artifact = build(items, built_at=now)
+    build_time = time.perf_counter() - start
+
+    queries = []
+    for _ in range(args.queries):
+        low = rng.choice([None, 100, 500])
+        queries.append({
+            'min_price': low,
+            'max_price': rng.choice([None, 5000]) if low else None,
+            'cities': rng.sample(cities, rng.randint(0, 2)),
+            'categories': rng.sample(categories, rng.randint(0, 2))
+        })
+
+    def python_query(filters, limit=20):
+        # What items_list would have to do per request for the same answer
+        matched, city_counts, category_counts, price_counts = [], {}, {}, [0] * (len(PRICE_EDGES) - 1)
+        for item in items:
+            match = item_matches(item, **filters)
+            if match['price'] and match['category']:
+                city_counts[item['city']] = city_counts.get(item['city'], 0) + 1
+            if match['price'] and match['city']:
+                for category in item['categories']:
+                    category_counts[category] = category_counts.get(category, 0) + 1
+            if match['city'] and match['category']:
+                price_counts[price_bucket(float(item['price']))] += 1
+            if all(match.values()):
+                matched.append(item)
+        matched.sort(key=lambda item: -item['timestamp'])
+        return {'ids': [item['itemId'] for item in matched[:limit]], 'total': len(matched),
+                'facets': {'city': city_counts, 'category': category_counts, 'price': price_counts}}
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'catalog.bin')
+        with open(path, 'wb') as f:
+            f.write(artifact)
+        start = time.perf_counter()
+        snapshot = CatalogSnapshot.open(path)
+        open_time = time.perf_counter() - start
+
+        def timed(fn):
+            samples = []
+            for filters in queries:
+                started = time.perf_counter()
+                fn(filters)
+                samples.append(time.perf_counter() - started)
+            samples.sort()
+            return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.99)] * 1000
+
+        # Same answers from both paths
+        for filters in queries[:10]:
+            expected = python_query(filters)
+            got = snapshot.query(**filters)
+            assert got['total'] == expected['total'], filters
+            assert [snapshot.item_id(r) for r in got['rows']] == expected['ids'], filters
+            assert got['facets']['price'] == expected['facets']['price'], filters
+            assert got['facets']['city'] == expected['facets']['city'], filters
+            assert got['facets']['category'] == expected['facets']['category'], filters
+
+        snapshot_p50, snapshot_p99 = timed(lambda filters: snapshot.query(**filters))
+        queries = queries[:20]
+        python_p50, python_p99 = timed(python_query)
+
+    print(f"Built a {len(artifact) / 1e6:.1f} MB snapshot of {args.items} listings in {build_time:.2f}s, "
+          f"opened in {open_time * 1e3:.2f}ms")
+    print(f"Faceted query p50/p99: snapshot {snapshot_p50:.2f}/{snapshot_p99:.2f}ms, "
+          f"Python over already-fetched items {python_p50:.1f}/{python_p99:.1f}ms "
+          f"(which also needs a full StatusIndex read of {args.items} items per request)")
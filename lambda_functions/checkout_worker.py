@@ -0,0 +1,209 @@
+import json
+import time
+from boto3.dynamodb.types import TypeDeserializer
+
+from resilience import ResilientTable, dynamodb_resource
+from trending import record_event
+
+dynamodb = dynamodb_resource()
+cart_table = ResilientTable(dynamodb.Table('JunkWunk-Cart'))
+items_table = ResilientTable(dynamodb.Table('JunkWunk-Items'))
+# Raw table for batch_writer, which retries unprocessed items itself
+purchases_table = dynamodb.Table('JunkWunk-Purchases')
+orders_table = ResilientTable(dynamodb.Table('JunkWunk-Orders'))
+
+deserializer = TypeDeserializer()
+
+# Consumes the JunkWunk-Orders stream written by cart_checkout. The event
+# source mapping (deploy-worker-lambdas.ps1) uses ReportBatchItemFailures
+# with a retry limit and the junkwunk-checkout-dlq queue as the on-failure
+# destination. Every step is idempotent (purchase ids are fixed at
+# checkout), so redelivery is safe.
+
+
+def write_purchases(orders):
+    with purchases_table.batch_writer(overwrite_by_pkeys=['purchaseId']) as batch:
+        for order in orders:
+            for line in order['lines']:
+                batch.put_item(Item=dict(
+                    line,
+                    userId=order['userId'],
+                    orderId=order['orderId'],
+                    timestamp=order['timestamp'],
+                    status='completed'
+                ))
+
+
+def clear_cart_lines(orders):
+    # Only lines still claimed by this order: one the user added again after
+    # checking out is a new line and stays in the cart
+    for order in orders:
+        for line in order['lines']:
+            try:
+                cart_table.delete_item(
+                    Key={'userId': order['userId'], 'itemId': line['itemId']},
+                    ConditionExpression='checkoutOrderId = :orderId',
+                    ExpressionAttributeValues={':orderId': order['orderId']}
+                )
+            except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+                pass
+
+
+def mark_sold_out(orders):
+    # Stock was decremented at checkout; retire listings that hit zero
+    item_ids = {line['itemId'] for order in orders for line in order['lines']}
+    for item_id in item_ids:
+        try:
+            items_table.update_item(
+                Key={'itemId': item_id},
+                UpdateExpression='SET #status = :inactive',
+                ConditionExpression='quantity <= :zero AND #status = :active',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={':zero': 0, ':inactive': 'inactive', ':active': 'active'}
+            )
+        except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+            pass
+
+
+def mark_completed(orders):
+    for order in orders:
+        orders_table.update_item(
+            Key={'orderId': order['orderId']},
+            UpdateExpression='SET #status = :completed, completedAt = :now',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':completed': 'completed', ':now': int(time.time())}
+        )
+
+
+def record_purchases(orders):
+    # Redelivered batches count twice; fine for a popularity signal
+    for order in orders:
+        for line in order['lines']:
+            record_event(line, 'purchase', count=int(line.get('quantity', 1)), now=order['timestamp'])
+
+
+# Run in order for each batch; new post-checkout work (seller
+# notifications, credit points, stats) is added here
+SIDE_EFFECTS = [write_purchases, clear_cart_lines, mark_sold_out, record_purchases, mark_completed]
+
+
+def process(orders):
+    for step in SIDE_EFFECTS:
+        step(orders)
+
+
+def lambda_handler(event, context):
+    pending = []
+    for record in event.get('Records', []):
+        # Status updates to existing orders come back through the stream too
+        if record.get('eventName') != 'INSERT':
+            continue
+        image = record['dynamodb']['NewImage']
+        order = {k: deserializer.deserialize(v) for k, v in image.items()}
+        pending.append((record['dynamodb']['SequenceNumber'], order))
+
+    failures = []
+    try:
+        process([order for _, order in pending])
+    except Exception as e:
+        # Fall back to one order at a time so only the bad ones are retried
+        print(f"Batch failed, retrying orders individually: {str(e)}")
+        for sequence_number, order in pending:
+            try:
+                process([order])
+            except Exception as e:
+                print(f"Error processing order {order.get('orderId')}: {str(e)}")
+                failures.append({'itemIdentifier': sequence_number})
+
+    print(json.dumps({'orders': len(pending), 'failed': len(failures)}))
+    return {'batchItemFailures': failures}
+
+
+if __name__ == '__main__':
+    # Compare checkout latency before and after the split against the
+    # in-process stand-ins, with a fixed round trip per DynamoDB call:
+    #   python checkout_worker.py --lines 5 --latency-ms 8
+    import argparse
+    import uuid
+    from datetime import datetime
+    import cart_checkout
+    import trending
+    from local_stores import LocalDynamoDB, LocalQueue
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--checkouts', type=int, default=20)
+    parser.add_argument('--lines', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=8.0)
+    args = parser.parse_args()
+
+    stream = LocalQueue(max_attempts=3)
+    local = LocalDynamoDB(latency=args.latency_ms / 1000)
+    local.create_table('JunkWunk-Items', 'itemId')
+    local.create_table('JunkWunk-Cart', 'userId', 'itemId')
+    local.create_table('JunkWunk-Purchases', 'purchaseId', indexes={'UserIdIndex': ('userId', 'timestamp')})
+    local.create_table('JunkWunk-Orders', 'orderId', stream=stream)
+    trending.counters_table = local.create_table('JunkWunk-TrendingCounters', 'counterId')
+
+    dynamodb = cart_checkout.dynamodb = local
+    cart_table = cart_checkout.cart_table = local.Table('JunkWunk-Cart')
+    items_table = local.Table('JunkWunk-Items')
+    purchases_table = local.Table('JunkWunk-Purchases')
+    orders_table = local.Table('JunkWunk-Orders')
+
+    def fill_cart(user_id):
+        item_ids = []
+        for _ in range(args.lines):
+            item_id = str(uuid.uuid4())
+            items_table.items[(item_id,)] = {'itemId': item_id, 'status': 'active', 'quantity': 10}
+            cart_table.items[(user_id, item_id)] = {
+                'userId': user_id, 'itemId': item_id, 'sellerId': 'seller', 'quantity': 1,
+                'title': 'Bench item', 'price': 10
+            }
+            item_ids.append(item_id)
+        return item_ids
+
+    def legacy_checkout(user_id, item_ids):
+        # The previous synchronous path: query, then get + update + put +
+        # delete for every line
+        cart_items = {i['itemId']: i for i in cart_table.query(KeyConditionExpression='userId = :u',
+                                                                ExpressionAttributeValues={':u': user_id})['Items']}
+        for item_id in item_ids:
+            cart_item = cart_items[item_id]
+            item = items_table.get_item(Key={'itemId': item_id})['Item']
+            items_table.update_item(Key={'itemId': item_id}, UpdateExpression='SET quantity = :q',
+                                    ExpressionAttributeValues={':q': item['quantity'] - cart_item['quantity']})
+            purchases_table.put_item(Item={'purchaseId': str(uuid.uuid4()), 'userId': user_id, 'itemId': item_id,
+                                           'timestamp': int(datetime.now().timestamp())})
+            cart_table.delete_item(Key={'userId': user_id, 'itemId': item_id})
+
+    def timed(fn):
+        samples = []
+        for n in range(args.checkouts):
+            user_id = f'user-{uuid.uuid4()}'
+            item_ids = fill_cart(user_id)
+            start = time.perf_counter()
+            fn(user_id, item_ids)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        return samples[len(samples) // 2] * 1000
+
+    def split_checkout(user_id, item_ids):
+        event = {
+            'requestContext': {'authorizer': {'claims': {'sub': user_id}}},
+            'body': json.dumps({'itemIds': item_ids})
+        }
+        response = cart_checkout.lambda_handler(event, None)
+        assert response['statusCode'] == 200, response
+
+    before = timed(legacy_checkout)
+    after = timed(split_checkout)
+
+    start = time.perf_counter()
+    delivered = stream.deliver(lambda_handler, batch_size=10)
+    drain = time.perf_counter() - start
+    completed = sum(1 for o in orders_table.items.values() if o['status'] == 'completed')
+
+    print(f"Checkout with {args.lines} lines at {args.latency_ms:.0f}ms per call: "
+          f"synchronous p50 {before:.1f}ms, fast path p50 {after:.1f}ms")
+    print(f"Worker drained {delivered} stream records in {drain * 1000:.1f}ms "
+          f"({completed} orders completed, {len(stream.dead_letters)} dead-lettered)")
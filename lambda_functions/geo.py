@@ -0,0 +1,30 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def parse_coordinates(coordinates, allow_origin=False):
+    # Coordinates are stored as {lat, lng}, sometimes as strings or Decimals.
+    # Profiles and listings hold 0,0 when no location was set, so it reads as
+    # missing unless the caller supplied it explicitly (allow_origin).
+    if not isinstance(coordinates, dict):
+        return None
+    try:
+        lat = float(coordinates.get('lat'))
+        lng = float(coordinates.get('lng'))
+    except (TypeError, ValueError):
+        return None
+    if lat == 0 and lng == 0 and not allow_origin:
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
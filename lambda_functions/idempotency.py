@@ -0,0 +1,164 @@
+import functools
+import hashlib
+import json
+import os
+import time
+
+from resilience import ResilientTable, dynamodb_resource
+
+dynamodb = dynamodb_resource()
+table = ResilientTable(dynamodb.Table(os.environ.get('IDEMPOTENCY_TABLE', 'JunkWunk-Idempotency')))
+
+HEADER = 'idempotency-key'
+# How long a completed response is replayed (also the table's TTL attribute)
+RESPONSE_TTL = int(os.environ.get('IDEMPOTENCY_TTL', str(24 * 3600)))
+# How long an in-flight request holds the key before another attempt may take
+# over; covers an owner that died mid-request (the functions time out at 30s)
+LOCK_TTL = 30
+MAX_KEY_LENGTH = 255
+
+
+def _response(status_code, body, extra_headers=None):
+    headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*'
+    }
+    headers.update(extra_headers or {})
+    return {'statusCode': status_code, 'headers': headers, 'body': json.dumps(body)}
+
+
+def _header(event, name):
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def fingerprint(event):
+    # Compact digest of what the request asks for, so a reused key with a
+    # different payload is rejected instead of replaying the wrong response
+    body = event.get('body') or ''
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, separators=(',', ':'))
+    except ValueError:
+        pass
+    path = json.dumps(event.get('pathParameters') or {}, sort_keys=True)
+    return hashlib.sha256(f"{event.get('httpMethod', '')}|{path}|{body}".encode('utf-8')).hexdigest()[:32]
+
+
+def _acquire(record_key, digest, now):
+    # Conditional lock row: succeeds for a new key, an expired record, or an
+    # in-flight lock whose owner has timed out
+    try:
+        table.put_item(
+            Item={
+                'idempotencyKey': record_key,
+                'fingerprint': digest,
+                'status': 'in_progress',
+                'lockExpiresAt': now + LOCK_TTL,
+                'expiresAt': now + RESPONSE_TTL
+            },
+            ConditionExpression='attribute_not_exists(idempotencyKey) OR expiresAt < :now '
+                                'OR (#status = :in_progress AND lockExpiresAt < :now)',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':now': now, ':in_progress': 'in_progress'}
+        )
+        return None
+    except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+        return table.get_item(Key={'idempotencyKey': record_key}, ConsistentRead=True).get('Item')
+
+
+def is_retryable(response):
+    status = response.get('statusCode', 500)
+    return status >= 500 or status == 429
+
+
+def _release(record_key):
+    try:
+        table.delete_item(Key={'idempotencyKey': record_key})
+    except Exception as e:
+        # The lock expires after LOCK_TTL anyway
+        print(f"Could not release idempotency key {record_key}: {str(e)}")
+
+
+def _complete(record_key, response, expires_at):
+    # The table retries throttles and transient errors under the retry budget
+    try:
+        table.update_item(
+            Key={'idempotencyKey': record_key},
+            UpdateExpression='SET #status = :completed, #response = :response REMOVE lockExpiresAt',
+            ExpressionAttributeNames={'#status': 'status', '#response': 'response'},
+            ExpressionAttributeValues={':completed': 'completed', ':response': json.dumps(response)}
+        )
+        return
+    except Exception as e:
+        print(f"Could not store idempotent response for {record_key}: {str(e)}")
+
+    # The work is done, so the lock must not lapse after LOCK_TTL and let a
+    # retry run it again; hold the key as in progress until the record expires
+    try:
+        table.update_item(
+            Key={'idempotencyKey': record_key},
+            UpdateExpression='SET lockExpiresAt = :expires',
+            ExpressionAttributeValues={':expires': expires_at}
+        )
+    except Exception as e:
+        print(f"Could not hold idempotency key {record_key}: {str(e)}")
+
+
+def _replay(existing, digest):
+    if existing.get('fingerprint') != digest:
+        return _response(422, {'error': 'Idempotency-Key was already used for a different request'})
+    if existing.get('status') == 'completed':
+        stored = json.loads(existing['response'])
+        headers = dict(stored.get('headers') or {}, **{'Idempotent-Replayed': 'true'})
+        return dict(stored, headers=headers)
+    return _response(409, {'error': 'A request with this Idempotency-Key is already in progress'},
+                     {'Retry-After': '1'})
+
+
+def idempotent(scope):
+    """Replay stored responses for requests carrying an Idempotency-Key header.
+
+    Keys are scoped per handler and per user. Requests without the header
+    run as before.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            key = _header(event, HEADER)
+            user_id = event.get('requestContext', {}).get('authorizer', {}).get('claims', {}).get('sub')
+            if not key or not user_id:
+                return handler(event, context)
+            if len(key) > MAX_KEY_LENGTH:
+                return _response(400, {'error': 'Idempotency-Key is too long'})
+
+            record_key = f'{scope}#{user_id}#{key}'
+            digest = fingerprint(event)
+            now = int(time.time())
+
+            try:
+                existing = _acquire(record_key, digest, now)
+            except Exception as e:
+                # The store being unavailable must not take the endpoint down
+                print(f"Idempotency store unavailable, running without it: {str(e)}")
+                return handler(event, context)
+            if existing is not None:
+                return _replay(existing, digest)
+
+            try:
+                response = handler(event, context)
+            except Exception:
+                _release(record_key)
+                raise
+
+            if is_retryable(response):
+                # Server errors and shed requests are not final; free the
+                # key for the retry
+                _release(record_key)
+            else:
+                # The caller gets its answer even if it cannot be stored
+                _complete(record_key, response, now + RESPONSE_TTL)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,153 @@
+import io
+import json
+import os
+import time
+import urllib.parse
+import boto3
+from PIL import Image, ImageOps
+
+from image_renditions import RENDITIONS, RENDITIONS_TABLE, SOURCE_PREFIX, apply_renditions, rendition_keys
+from resilience import ResilientTable, dynamodb_resource
+
+BUCKET_NAME = os.environ.get('IMAGES_BUCKET', 'junkwunk-images-ap-south-1')
+
+s3 = boto3.client('s3', region_name='ap-south-1')
+dynamodb = dynamodb_resource()
+items_table = ResilientTable(dynamodb.Table('JunkWunk-Items'))
+renditions_table = ResilientTable(dynamodb.Table(RENDITIONS_TABLE))
+
+
+def render(image, spec):
+    # Downscale a copy and re-encode it; EXIF is dropped because it is
+    # never passed to save()
+    rendition = image.copy()
+    rendition.thumbnail((spec['size'], spec['size']), Image.LANCZOS)
+    out = io.BytesIO()
+    rendition.save(out, format=spec['format'], quality=spec['quality'])
+    return rendition, out.getvalue()
+
+
+def process_object(client, bucket, key):
+    original = client.get_object(Bucket=bucket, Key=key)['Body'].read()
+    keys = rendition_keys(key)
+    largest = max(spec['size'] for spec in RENDITIONS.values())
+
+    with Image.open(io.BytesIO(original)) as image:
+        # Let the JPEG decoder scale down while decoding instead of
+        # materialising the full-resolution bitmap
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        # Render largest first and feed each result into the next, so
+        # smaller renditions resample less data
+        written = {}
+        for name, spec in sorted(RENDITIONS.items(), key=lambda x: -x[1]['size']):
+            image, data = render(image, spec)
+            client.put_object(
+                Bucket=bucket,
+                Key=keys[name],
+                Body=data,
+                ContentType=spec['contentType'],
+                CacheControl='public, max-age=31536000, immutable'
+            )
+            written[name] = len(data)
+
+    return {'key': key, 'originalBytes': len(original), 'renditionBytes': written}
+
+
+def publish_renditions(key):
+    # Runs once every rendition is in S3; items claiming the image before
+    # this get the renditions here, later ones read them in claim_renditions
+    renditions = rendition_keys(key)
+    response = renditions_table.update_item(
+        Key={'imageKey': key},
+        UpdateExpression='SET renditions = :renditions',
+        ExpressionAttributeValues={':renditions': renditions},
+        ReturnValues='ALL_NEW'
+    )
+    item_ids = response['Attributes'].get('itemIds') or set()
+    return sum(apply_renditions(items_table, item_id, key, renditions) for item_id in item_ids)
+
+
+def lambda_handler(event, context):
+    # S3 ObjectCreated notifications, or {"keys": [...]} for a manual backfill
+    if 'Records' in event:
+        targets = [
+            (r['s3']['bucket']['name'], urllib.parse.unquote_plus(r['s3']['object']['key']))
+            for r in event['Records']
+        ]
+    else:
+        targets = [(BUCKET_NAME, key) for key in event.get('keys', [])]
+
+    processed = []
+    skipped = []
+    errors = []
+
+    for bucket, key in targets:
+        if not key.startswith(SOURCE_PREFIX):
+            skipped.append(key)
+            continue
+        try:
+            result = process_object(s3, bucket, key)
+            result['itemsUpdated'] = publish_renditions(key)
+            processed.append(result)
+        except Exception as e:
+            print(f"Error processing {key}: {str(e)}")
+            errors.append({'key': key, 'error': str(e)})
+
+    print(json.dumps({'processed': len(processed), 'skipped': len(skipped), 'errors': len(errors)}))
+
+    # Raise so S3 retries the invocation when every target failed
+    if errors and not processed:
+        raise RuntimeError(f"Failed to process {len(errors)} image(s)")
+
+    return {'processed': processed, 'skipped': skipped, 'errors': errors}
+
+
+if __name__ == '__main__':
+    # Benchmark against the filesystem-backed store:
+    #   python image_processor.py --images 50 --page-size 20
+    import argparse
+    import tempfile
+    from local_stores import LocalObjectStore
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--images', type=int, default=50)
+    parser.add_argument('--width', type=int, default=3024)
+    parser.add_argument('--height', type=int, default=4032)
+    parser.add_argument('--page-size', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        store = LocalObjectStore(root)
+        bucket = 'bench'
+        keys = []
+        for i in range(args.images):
+            # Noise plus a gradient approximates phone photo entropy
+            noise = Image.effect_noise((args.width, args.height), 24).convert('RGB')
+            gradient = Image.linear_gradient('L').resize((args.width, args.height)).convert('RGB')
+            photo = Image.blend(noise, gradient, 0.6)
+            buf = io.BytesIO()
+            photo.save(buf, format='JPEG', quality=90)
+            key = f'{SOURCE_PREFIX}bench-{i}.jpg'
+            store.put_object(Bucket=bucket, Key=key, Body=buf.getvalue(), ContentType='image/jpeg')
+            keys.append(key)
+
+        start = time.perf_counter()
+        results = [process_object(store, bucket, key) for key in keys]
+        elapsed = time.perf_counter() - start
+
+        original_total = sum(r['originalBytes'] for r in results)
+        thumb_total = sum(r['renditionBytes']['thumb'] for r in results)
+        per_image_original = original_total / len(results)
+        per_image_thumb = thumb_total / len(results)
+
+        print(f"Processed {len(results)} images in {elapsed:.2f}s "
+              f"({len(results) / elapsed:.1f} images/s, "
+              f"{original_total / elapsed / 1e6:.1f} MB/s of originals)")
+        print(f"Listing page of {args.page_size}: "
+              f"{per_image_original * args.page_size / 1e6:.2f} MB originals vs "
+              f"{per_image_thumb * args.page_size / 1e6:.2f} MB thumbnails "
+              f"({(1 - thumb_total / original_total) * 100:.1f}% saved)")
@@ -0,0 +1,84 @@
+import os
+from botocore.exceptions import ClientError
+
+# Originals are uploaded under this prefix; renditions are written elsewhere
+# so the S3 trigger never fires on its own output.
+SOURCE_PREFIX = 'images/'
+RENDITIONS_PREFIX = 'renditions/'
+
+RENDITIONS = {
+    'thumb': {
+        'size': 320,
+        'format': 'WEBP',
+        'extension': 'webp',
+        'contentType': 'image/webp',
+        'quality': 75
+    },
+    'medium': {
+        'size': 1024,
+        'format': 'JPEG',
+        'extension': 'jpg',
+        'contentType': 'image/jpeg',
+        'quality': 82
+    }
+}
+
+DEFAULT_LIST_SIZE = 'thumb'
+
+# imageKey -> itemIds using the image, and the renditions once they exist.
+# Both sides update it atomically, so whichever of items_create/items_update
+# and image_processor finishes second copies the renditions onto the item.
+RENDITIONS_TABLE = os.environ.get('IMAGE_RENDITIONS_TABLE', 'JunkWunk-ImageRenditions')
+
+
+def rendition_keys(original_key):
+    # Where image_processor writes the renditions of an original
+    if not original_key or not original_key.startswith(SOURCE_PREFIX):
+        return {}
+    base, _ = os.path.splitext(original_key)
+    return {
+        name: f"{RENDITIONS_PREFIX}{name}/{base}.{spec['extension']}"
+        for name, spec in RENDITIONS.items()
+    }
+
+
+def claim_renditions(renditions_table, image_key, item_id):
+    # Call after the item row points at image_key. Returns the renditions if
+    # the processor has already written them, otherwise it will set them.
+    if not image_key or not image_key.startswith(SOURCE_PREFIX):
+        return {}
+    response = renditions_table.update_item(
+        Key={'imageKey': image_key},
+        UpdateExpression='ADD itemIds :itemId',
+        ExpressionAttributeValues={':itemId': {item_id}},
+        ReturnValues='ALL_NEW'
+    )
+    return response['Attributes'].get('renditions') or {}
+
+
+def apply_renditions(items_table, item_id, image_key, renditions):
+    # Only while the item still shows this image; False if it has moved on
+    # or been deleted
+    try:
+        items_table.update_item(
+            Key={'itemId': item_id},
+            UpdateExpression='SET imageRenditions = :renditions',
+            ConditionExpression='imageUrl = :imageUrl',
+            ExpressionAttributeValues={':renditions': renditions, ':imageUrl': image_key}
+        )
+        return True
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+        return False
+
+
+def select_image(item, size=DEFAULT_LIST_SIZE):
+    # Point imageUrl at the requested rendition, keeping the original key;
+    # items whose renditions are not ready (or failed) keep the original
+    renditions = item.get('imageRenditions') or {}
+    if size == 'original' or size not in renditions:
+        return item
+    item['originalImageUrl'] = item.get('imageUrl', '')
+    item['imageUrl'] = renditions[size]
+    return item
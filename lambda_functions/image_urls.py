@@ -0,0 +1,67 @@
+import os
+import threading
+import time
+import boto3
+from botocore.config import Config
+
+from image_renditions import RENDITIONS_PREFIX, SOURCE_PREFIX
+
+BUCKET_NAME = os.environ.get('IMAGES_BUCKET', 'junkwunk-images-ap-south-1')
+URL_TTL = int(os.environ.get('IMAGE_URL_TTL', '3600'))  # 1 hour, as the app used
+# Cached URLs are reissued once they have less than this long to live, so
+# every URL handed to a client is good for at least REFRESH_MARGIN seconds
+REFRESH_MARGIN = int(os.environ.get('IMAGE_URL_REFRESH_MARGIN', '600'))
+MAX_CACHED_URLS = 20000
+
+s3 = boto3.client('s3', region_name='ap-south-1', config=Config(signature_version='s3v4'))
+
+# objectKey -> (url, expiresAt), kept for the life of the warm container
+_url_cache = {}
+# Eviction walks the cache, so it is serialised with inserts
+_cache_lock = threading.Lock()
+
+
+def _evict(now):
+    # Drop URLs that are no longer worth serving, then the oldest half if the
+    # cache is still full (dicts keep insertion order)
+    for key in [k for k, (_, expires_at) in _url_cache.items() if expires_at - now <= REFRESH_MARGIN]:
+        del _url_cache[key]
+    if len(_url_cache) >= MAX_CACHED_URLS:
+        for key in list(_url_cache)[:MAX_CACHED_URLS // 2]:
+            del _url_cache[key]
+
+
+def signed_url(key, now=None):
+    now = now if now is not None else time.time()
+    cached = _url_cache.get(key)
+    if cached and cached[1] - now > REFRESH_MARGIN:
+        return cached
+
+    url = s3.generate_presigned_url(
+        'get_object',
+        Params={'Bucket': BUCKET_NAME, 'Key': key},
+        ExpiresIn=URL_TTL
+    )
+    entry = (url, int(now) + URL_TTL)
+
+    with _cache_lock:
+        if len(_url_cache) >= MAX_CACHED_URLS:
+            _evict(now)
+        _url_cache[key] = entry
+    return entry
+
+
+def attach_signed_urls(rows, field='imageUrl'):
+    # Sign every image on the page in one pass so the client needs no
+    # credentials and no per-card presigning
+    now = time.time()
+    for row in rows:
+        key = row.get(field)
+        # imageUrl is client-supplied and the bucket holds more than images;
+        # only listing images are ever signed
+        if not key or not key.startswith((SOURCE_PREFIX, RENDITIONS_PREFIX)) or '..' in key.split('/'):
+            continue
+        url, expires_at = signed_url(key, now)
+        row['signedImageUrl'] = url
+        row['imageUrlExpiresAt'] = expires_at
+    return rows
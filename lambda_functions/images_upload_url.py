@@ -0,0 +1,83 @@
+import json
+import os
+import uuid
+import boto3
+
+from image_renditions import SOURCE_PREFIX
+
+BUCKET_NAME = os.environ.get('IMAGES_BUCKET', 'junkwunk-images-ap-south-1')
+UPLOAD_URL_EXPIRY = 900  # 15 minutes
+
+s3 = boto3.client('s3', region_name='ap-south-1')
+
+ALLOWED_CONTENT_TYPES = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp'
+}
+
+def lambda_handler(event, context):
+    try:
+        # Get userId from Cognito
+        user_id = event.get('requestContext', {}).get('authorizer', {}).get('claims', {}).get('sub')
+
+        if not user_id:
+            return {
+                'statusCode': 401,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': 'Unauthorized'})
+            }
+
+        body = json.loads(event.get('body') or '{}')
+        content_type = body.get('contentType', 'image/jpeg')
+
+        if content_type not in ALLOWED_CONTENT_TYPES:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': f'Unsupported contentType: {content_type}'})
+            }
+
+        # Upload under the processor's source prefix so renditions are generated
+        object_key = f"{SOURCE_PREFIX}{user_id}/{uuid.uuid4()}{ALLOWED_CONTENT_TYPES[content_type]}"
+
+        upload_url = s3.generate_presigned_url(
+            'put_object',
+            Params={
+                'Bucket': BUCKET_NAME,
+                'Key': object_key,
+                'ContentType': content_type
+            },
+            ExpiresIn=UPLOAD_URL_EXPIRY
+        )
+
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({
+                'uploadUrl': upload_url,
+                'key': object_key,
+                'contentType': content_type,
+                'expiresIn': UPLOAD_URL_EXPIRY
+            })
+        }
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return {
+            'statusCode': 500,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'error': str(e)})
+        }
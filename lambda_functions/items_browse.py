@@ -0,0 +1,166 @@
+import json
+import os
+import time
+from decimal import Decimal
+from boto3.dynamodb.conditions import Key
+
+from artifacts import ArtifactLoader
+from catalog_delta import CARD_FIELDS, RECENT
+from catalog_snapshot import PRICE_EDGES, CatalogSnapshot, item_matches, parse_timestamp, price_bucket
+from image_renditions import DEFAULT_LIST_SIZE, select_image
+from image_urls import attach_signed_urls
+from resilience import ResilientTable, batch_get_all, dynamodb_resource, error_response, with_retry_budget
+
+# How often a warm container checks for a rebuilt snapshot / re-reads the delta
+REFRESH_INTERVAL = int(os.environ.get('CATALOG_REFRESH_INTERVAL', '300'))
+DELTA_REFRESH_INTERVAL = int(os.environ.get('CATALOG_DELTA_REFRESH_INTERVAL', '15'))
+ITEMS_TABLE = 'JunkWunk-Items'
+MAX_LIMIT = 50
+
+dynamodb = dynamodb_resource()
+delta_table = ResilientTable(dynamodb.Table(os.environ.get('CATALOG_DELTA_TABLE', 'JunkWunk-CatalogDelta')))
+snapshot_loader = ArtifactLoader(
+    os.environ.get('CATALOG_ARTIFACT_KEY', 'artifacts/catalog/snapshot.bin'),
+    '/tmp/catalog-snapshot.bin',
+    CatalogSnapshot.open,
+    refresh_interval=REFRESH_INTERVAL
+)
+
+_delta = None
+_delta_loaded_at = 0
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+def load_snapshot():
+    return snapshot_loader.get()
+
+def load_delta(built_at):
+    # Listings changed since the snapshot build started: {itemId: change}
+    global _delta, _delta_loaded_at
+    now = time.time()
+    if _delta is None or now - _delta_loaded_at >= DELTA_REFRESH_INTERVAL:
+        changes = {}
+        query_kwargs = {'KeyConditionExpression': Key('bucket').eq(RECENT)}
+        while True:
+            response = delta_table.query(**query_kwargs)
+            for change in response.get('Items', []):
+                changes[change['itemId']] = change
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        _delta = changes
+        _delta_loaded_at = now
+    return {item_id: c for item_id, c in _delta.items() if c['changedAt'] >= built_at}
+
+def split_param(params, name):
+    return [v for v in (params.get(name) or '').split(',') if v.strip()]
+
+def price_param(params, name):
+    value = params.get(name)
+    return float(value) if value not in (None, '') else None
+
+@with_retry_budget
+def lambda_handler(event, context):
+    try:
+        params = event.get('queryStringParameters') or {}
+        image_size = params.get('imageSize', DEFAULT_LIST_SIZE)
+        try:
+            filters = {
+                'min_price': price_param(params, 'minPrice'),
+                'max_price': price_param(params, 'maxPrice'),
+                'cities': split_param(params, 'city'),
+                'categories': split_param(params, 'category')
+            }
+            limit = max(1, min(int(params.get('limit', '20')), MAX_LIMIT))
+            offset = max(0, int(params.get('offset', '0')))
+        except ValueError:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': 'minPrice, maxPrice, limit and offset must be numbers'})
+            }
+
+        snapshot = load_snapshot()
+        delta = load_delta(snapshot.built_at)
+
+        # Snapshot rows of changed listings are replaced by their delta state
+        result = snapshot.query(exclude=delta.keys(), offset=0, limit=offset + limit, **filters)
+        facets = result['facets']
+        total = result['total']
+
+        fresh = []
+        for change in delta.values():
+            if change.get('removed'):
+                continue
+            item = change['item']
+            match = item_matches(item, **filters)
+            if match['price'] and match['category']:
+                city = snapshot.city_name(item.get('city') or '')
+                if city:
+                    facets['city'][city] = facets['city'].get(city, 0) + 1
+            if match['price'] and match['city']:
+                for category in {snapshot.category_name(c) for c in item.get('categories') or []}:
+                    facets['category'][category] = facets['category'].get(category, 0) + 1
+            if match['city'] and match['category']:
+                facets['price'][price_bucket(float(item.get('price') or 0))] += 1
+            if all(match.values()):
+                fresh.append(item)
+                total += 1
+
+        # Both sources are newest first; merge them and cut the page
+        page = [(int(snapshot.timestamps[row]), 'snapshot', row) for row in result['rows']]
+        page += [(parse_timestamp(item.get('timestamp')), 'delta', item) for item in fresh]
+        page.sort(key=lambda entry: -entry[0])
+        page = page[offset:offset + limit]
+
+        # Listing details for the snapshot rows on this page; anything sold
+        # since the snapshot drops out here
+        ids = [snapshot.item_id(ref) for _, source, ref in page if source == 'snapshot']
+        details = {}
+        if ids:
+            responses = batch_get_all(dynamodb, {ITEMS_TABLE: {
+                'Keys': [{'itemId': item_id} for item_id in ids],
+                'ProjectionExpression': ', '.join(f'#{f}' for f in CARD_FIELDS),
+                'ExpressionAttributeNames': {f'#{f}': f for f in CARD_FIELDS}
+            }})
+            details = {item['itemId']: item for item in responses.get(ITEMS_TABLE, [])}
+        items = []
+        for _, source, ref in page:
+            item = details.get(snapshot.item_id(ref)) if source == 'snapshot' else dict(ref)
+            if item and item.get('status', 'active') == 'active':
+                items.append(select_image(item, image_size))
+        attach_signed_urls(items)
+
+        price_facets = [
+            {'min': low, 'max': high if high != float('inf') else None, 'count': count}
+            for low, high, count in zip(PRICE_EDGES, PRICE_EDGES[1:], facets['price'])
+        ]
+
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({
+                'items': items,
+                'count': len(items),
+                'total': total,
+                'facets': {
+                    'city': facets['city'],
+                    'category': facets['category'],
+                    'price': price_facets
+                },
+                'snapshotAt': snapshot.built_at
+            }, cls=DecimalEncoder)
+        }
+
+    except Exception as e:
+        return error_response(e)
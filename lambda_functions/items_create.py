@@ -1,12 +1,16 @@
 import json
-import boto3
 import uuid
 from datetime import datetime
 from decimal import Decimal
 
-dynamodb = boto3.resource('dynamodb')
-items_table = dynamodb.Table('JunkWunk-Items')
-users_table = dynamodb.Table('JunkWunk-Users')
+from image_renditions import RENDITIONS_TABLE, apply_renditions, claim_renditions
+from idempotency import idempotent
+from resilience import ResilientTable, dynamodb_resource, error_response, with_retry_budget
+
+dynamodb = dynamodb_resource()
+items_table = ResilientTable(dynamodb.Table('JunkWunk-Items'))
+users_table = ResilientTable(dynamodb.Table('JunkWunk-Users'))
+renditions_table = ResilientTable(dynamodb.Table(RENDITIONS_TABLE))
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -14,6 +18,8 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super(DecimalEncoder, self).default(obj)
 
+@with_retry_budget
+@idempotent('items_create')
 def lambda_handler(event, context):
     try:
         # Get userId from Cognito authorizer
@@ -32,12 +38,13 @@ def lambda_handler(event, context):
         city = seller_data.get('city', '')
         
         # Create item
+        image_url = body.get('imageUrl', '')
         item = {
             'itemId': item_id,
             'sellerId': user_id,
             'title': body.get('title', ''),
             'description': body.get('description', ''),
-            'imageUrl': body.get('imageUrl', ''),
+            'imageUrl': image_url,
             'categories': body.get('categories', []),
             'price': Decimal(str(body.get('price', 0))),
             'quantity': body.get('quantity', 1),
@@ -49,6 +56,11 @@ def lambda_handler(event, context):
         }
         
         items_table.put_item(Item=item)
+
+        # Thumbnails are only served once image_processor has written them
+        renditions = claim_renditions(renditions_table, image_url, item_id)
+        if renditions and apply_renditions(items_table, item_id, image_url, renditions):
+            item['imageRenditions'] = renditions
         
         return {
             'statusCode': 200,
@@ -59,9 +71,4 @@ def lambda_handler(event, context):
             'body': json.dumps(item, cls=DecimalEncoder)
         }
     except Exception as e:
-        debugPrint(f'Error: {str(e)}')
-        return {
-            'statusCode': 500,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': str(e)})
-        }
+        return error_response(e)
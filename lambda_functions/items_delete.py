@@ -1,9 +1,10 @@
 import json
-import boto3
 from decimal import Decimal
 
-dynamodb = boto3.resource('dynamodb')
-items_table = dynamodb.Table('JunkWunk-Items')
+from resilience import ResilientTable, dynamodb_resource, error_response, with_retry_budget
+
+dynamodb = dynamodb_resource()
+items_table = ResilientTable(dynamodb.Table('JunkWunk-Items'))
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -11,6 +12,7 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super(DecimalEncoder, self).default(obj)
 
+@with_retry_budget
 def lambda_handler(event, context):
     try:
         # Get itemId from path
@@ -41,9 +43,4 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': 'Not authorized to delete this item'})
         }
     except Exception as e:
-        debugPrint(f'Error: {str(e)}')
-        return {
-            'statusCode': 500,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': str(e)})
-        }
+        return error_response(e)
@@ -1,9 +1,11 @@
 import json
-import boto3
 from decimal import Decimal
 
-dynamodb = boto3.resource('dynamodb', region_name='ap-south-1')
-table = dynamodb.Table('JunkWunk-Items')
+from resilience import ResilientTable, dynamodb_resource, error_response, with_retry_budget
+from trending import record_event
+
+dynamodb = dynamodb_resource()
+table = ResilientTable(dynamodb.Table('JunkWunk-Items'))
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -11,6 +13,7 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super(DecimalEncoder, self).default(obj)
 
+@with_retry_budget
 def lambda_handler(event, context):
     try:
         item_id = event.get('pathParameters', {}).get('itemId')
@@ -37,6 +40,8 @@ def lambda_handler(event, context):
                 'body': json.dumps({'error': 'Item not found'})
             }
         
+        record_event(response['Item'], 'view')
+        
         return {
             'statusCode': 200,
             'headers': {
@@ -47,12 +52,4 @@ def lambda_handler(event, context):
         }
         
     except Exception as e:
-        debugPrint(f"Error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': str(e)})
-        }
+        return error_response(e)
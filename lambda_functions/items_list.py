@@ -1,10 +1,13 @@
 import json
-import boto3
 from decimal import Decimal
 from boto3.dynamodb.conditions import Key, Attr
 
-dynamodb = boto3.resource('dynamodb', region_name='ap-south-1')
-table = dynamodb.Table('JunkWunk-Items')
+from image_renditions import DEFAULT_LIST_SIZE, select_image
+from image_urls import attach_signed_urls
+from resilience import ResilientTable, dynamodb_resource, error_response, with_retry_budget
+
+dynamodb = dynamodb_resource()
+table = ResilientTable(dynamodb.Table('JunkWunk-Items'))
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -12,6 +15,7 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super(DecimalEncoder, self).default(obj)
 
+@with_retry_budget
 def lambda_handler(event, context):
     try:
         # Get query parameters
@@ -19,6 +23,7 @@ def lambda_handler(event, context):
         category = params.get('category')
         seller_id = params.get('sellerId')
         status = params.get('status', 'active')
+        image_size = params.get('imageSize', DEFAULT_LIST_SIZE)
         
         # Query by status first (most common query)
         if seller_id:
@@ -43,6 +48,10 @@ def lambda_handler(event, context):
         # Sort by timestamp descending
         items.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
         
+        # Serve thumbnails unless another size (or 'original') is requested
+        items = [select_image(item, image_size) for item in items]
+        attach_signed_urls(items)
+        
         return {
             'statusCode': 200,
             'headers': {
@@ -56,12 +65,4 @@ def lambda_handler(event, context):
         }
         
     except Exception as e:
-        debugPrint(f"Error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': str(e)})
-        }
+        return error_response(e)
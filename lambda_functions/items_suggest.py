@@ -0,0 +1,71 @@
+import json
+import os
+
+from artifacts import ArtifactLoader
+from suggest_index import TOP_K, SuggestIndex
+
+# How often a warm container checks for a rebuilt artifact
+REFRESH_INTERVAL = int(os.environ.get('SUGGEST_REFRESH_INTERVAL', '300'))
+
+index_loader = ArtifactLoader(
+    os.environ.get('SUGGEST_ARTIFACT_KEY', 'artifacts/suggest/index.bin'),
+    '/tmp/suggest-index.bin',
+    SuggestIndex.open,
+    refresh_interval=REFRESH_INTERVAL
+)
+
+
+def load_index():
+    return index_loader.get()
+
+
+def lambda_handler(event, context):
+    try:
+        params = event.get('queryStringParameters') or {}
+        query = params.get('q', '')
+        try:
+            limit = max(1, min(int(params.get('limit', str(TOP_K))), TOP_K))
+        except ValueError:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': 'limit must be a number'})
+            }
+        
+        if not query.strip():
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': 'q is required'})
+            }
+        
+        suggestions = load_index().suggest(query, limit)
+        
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({
+                'suggestions': suggestions,
+                'count': len(suggestions)
+            })
+        }
+        
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return {
+            'statusCode': 500,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'error': str(e)})
+        }
@@ -0,0 +1,65 @@
+import json
+import os
+import time
+from decimal import Decimal
+
+from image_renditions import DEFAULT_LIST_SIZE, select_image
+from image_urls import attach_signed_urls
+from resilience import ResilientTable, dynamodb_resource, error_response, with_retry_budget
+from trending import list_key
+
+dynamodb = dynamodb_resource()
+table = ResilientTable(dynamodb.Table(os.environ.get('TRENDING_TABLE', 'JunkWunk-Trending')))
+
+MAX_LIMIT = 50
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+@with_retry_budget
+def lambda_handler(event, context):
+    try:
+        params = event.get('queryStringParameters') or {}
+        image_size = params.get('imageSize', DEFAULT_LIST_SIZE)
+        try:
+            limit = max(1, min(int(params.get('limit', '20')), MAX_LIMIT))
+        except ValueError:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': 'limit must be a number'})
+            }
+
+        # Lists are precomputed by trending_compactor; one read serves them
+        response = table.get_item(Key={'listKey': list_key(params.get('city'), params.get('category'))})
+        record = response.get('Item', {})
+        if record.get('expiresAt', 0) <= time.time():
+            # TTL deletes rows late; a list the compactor stopped refreshing
+            # is no longer trending
+            record = {}
+        items = record.get('items', [])[:limit]
+
+        items = [select_image(item, image_size) for item in items]
+        attach_signed_urls(items)
+
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({
+                'items': items,
+                'count': len(items),
+                'generatedAt': record.get('generatedAt')
+            }, cls=DecimalEncoder)
+        }
+
+    except Exception as e:
+        return error_response(e)
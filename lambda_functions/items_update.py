@@ -1,10 +1,13 @@
 import json
-import boto3
 from datetime import datetime
 from decimal import Decimal
 
-dynamodb = boto3.resource('dynamodb')
-items_table = dynamodb.Table('JunkWunk-Items')
+from image_renditions import RENDITIONS_TABLE, apply_renditions, claim_renditions
+from resilience import ResilientTable, dynamodb_resource, error_response, with_retry_budget
+
+dynamodb = dynamodb_resource()
+items_table = ResilientTable(dynamodb.Table('JunkWunk-Items'))
+renditions_table = ResilientTable(dynamodb.Table(RENDITIONS_TABLE))
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -12,6 +15,7 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super(DecimalEncoder, self).default(obj)
 
+@with_retry_budget
 def lambda_handler(event, context):
     try:
         # Get itemId from path
@@ -48,6 +52,10 @@ def lambda_handler(event, context):
         
         # Remove trailing comma
         update_expr = update_expr.rstrip(', ')
+        expr_attr_values[':sellerId'] = user_id
+        # A replaced image drops the old renditions until the new ones exist
+        if 'imageUrl' in body:
+            update_expr += ' REMOVE imageRenditions'
         
         # Update item (only if seller owns it)
         response = items_table.update_item(
@@ -58,6 +66,12 @@ def lambda_handler(event, context):
             ConditionExpression='sellerId = :sellerId',
             ReturnValues='ALL_NEW'
         )
+        item = response['Attributes']
+
+        if 'imageUrl' in body:
+            renditions = claim_renditions(renditions_table, body['imageUrl'], item_id)
+            if renditions and apply_renditions(items_table, item_id, body['imageUrl'], renditions):
+                item['imageRenditions'] = renditions
         
         return {
             'statusCode': 200,
@@ -65,7 +79,7 @@ def lambda_handler(event, context):
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps(response['Attributes'], cls=DecimalEncoder)
+            'body': json.dumps(item, cls=DecimalEncoder)
         }
     except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
         return {
@@ -74,9 +88,4 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': 'Not authorized to update this item'})
         }
     except Exception as e:
-        debugPrint(f'Error: {str(e)}')
-        return {
-            'statusCode': 500,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': str(e)})
-        }
+        return error_response(e)
@@ -0,0 +1,657 @@
+import copy
+import hashlib
+import io
+import itertools
+import json
+import os
+import re
+import shutil
+import time
+from collections import deque
+from types import SimpleNamespace
+
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+
+# Local stand-ins for the AWS services used by the Lambda functions, so the
+# processing code can be exercised and benchmarked without an AWS account.
+
+
+class NoSuchKey(Exception):
+    pass
+
+
+class _ObjectStoreExceptions:
+    NoSuchKey = NoSuchKey
+
+
+class LocalObjectStore:
+    """Filesystem-backed subset of the boto3 S3 client API."""
+
+    exceptions = _ObjectStoreExceptions
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, bucket, key):
+        return os.path.join(self.root, bucket, *key.split('/'))
+
+    def put_object(self, Bucket, Key, Body, ContentType='binary/octet-stream', **kwargs):
+        data = Body.read() if hasattr(Body, 'read') else Body
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        with open(path + '.meta', 'w') as f:
+            json.dump({'ContentType': ContentType, 'Metadata': kwargs.get('Metadata', {})}, f)
+        return {'ETag': '"%s"' % hashlib.md5(data).hexdigest()}
+
+    def head_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        if not os.path.isfile(path):
+            raise NoSuchKey(Key)
+        meta = {}
+        if os.path.isfile(path + '.meta'):
+            with open(path + '.meta') as f:
+                meta = json.load(f)
+        with open(path, 'rb') as f:
+            etag = '"%s"' % hashlib.md5(f.read()).hexdigest()
+        return {
+            'ContentLength': os.path.getsize(path),
+            'ContentType': meta.get('ContentType', 'binary/octet-stream'),
+            'ETag': etag,
+            'Metadata': meta.get('Metadata', {})
+        }
+
+    def get_object(self, Bucket, Key):
+        head = self.head_object(Bucket, Key)
+        with open(self._path(Bucket, Key), 'rb') as f:
+            head['Body'] = io.BytesIO(f.read())
+        return head
+
+    def download_file(self, Bucket, Key, Filename):
+        self.head_object(Bucket, Key)
+        shutil.copyfile(self._path(Bucket, Key), Filename)
+
+    def delete_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        for p in (path, path + '.meta'):
+            if os.path.isfile(p):
+                os.remove(p)
+        return {}
+
+    def list_objects_v2(self, Bucket, Prefix=''):
+        bucket_root = os.path.join(self.root, Bucket)
+        contents = []
+        for dirpath, _, filenames in os.walk(bucket_root):
+            for name in filenames:
+                if name.endswith('.meta'):
+                    continue
+                path = os.path.join(dirpath, name)
+                key = os.path.relpath(path, bucket_root).replace(os.sep, '/')
+                if key.startswith(Prefix):
+                    contents.append({'Key': key, 'Size': os.path.getsize(path)})
+        contents.sort(key=lambda x: x['Key'])
+        return {'Contents': contents, 'KeyCount': len(contents)}
+
+
+# DynamoDB stand-in. Expressions are parsed and evaluated in Python so the
+# handlers' update/condition/key expressions run unchanged; only top-level
+# attribute paths are supported.
+
+_TOKEN_RE = re.compile(r'\s*(<>|<=|>=|[=<>(),+\-]|[#:]?[A-Za-z_][A-Za-z0-9_]*)')
+_COMPARATORS = {
+    '=': lambda a, b: a == b,
+    '<>': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b
+}
+_MISSING = object()
+
+
+def _client_error(code, operation, message='', **extra):
+    response = {'Error': {'Code': code, 'Message': message}}
+    response.update(extra)
+    return _ERRORS.get(code, ClientError)(response, operation)
+
+
+class ConditionalCheckFailedException(ClientError):
+    pass
+
+
+class TransactionCanceledException(ClientError):
+    pass
+
+
+class ProvisionedThroughputExceededException(ClientError):
+    pass
+
+
+_ERRORS = {
+    'ConditionalCheckFailedException': ConditionalCheckFailedException,
+    'TransactionCanceledException': TransactionCanceledException,
+    'ProvisionedThroughputExceededException': ProvisionedThroughputExceededException
+}
+
+
+class _Expression:
+
+    def __init__(self, text, names=None, values=None):
+        self.tokens = _TOKEN_RE.findall(text or '')
+        self.pos = 0
+        self.names = names or {}
+        self.values = values or {}
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, expected=None):
+        token = self.peek()
+        if expected is not None and (token or '').upper() != expected:
+            raise ValueError(f'Expected {expected}, got {token}')
+        self.pos += 1
+        return token
+
+    def name(self):
+        token = self.take()
+        return self.names.get(token, token) if token.startswith('#') else token
+
+    # Operands -------------------------------------------------------------
+
+    def operand(self, item):
+        token = self.peek()
+        if token.startswith(':'):
+            self.take()
+            return self.values[token]
+        lowered = token.lower()
+        if lowered == 'if_not_exists':
+            self.take(); self.take('(')
+            current = item.get(self.name(), _MISSING)
+            self.take(',')
+            default = self.operand(item)
+            self.take(')')
+            return default if current is _MISSING else current
+        if lowered == 'list_append':
+            self.take(); self.take('(')
+            first = self.operand(item)
+            self.take(',')
+            second = self.operand(item)
+            self.take(')')
+            return list(first) + list(second)
+        if lowered == 'size':
+            self.take(); self.take('(')
+            value = item.get(self.name(), _MISSING)
+            self.take(')')
+            return _MISSING if value is _MISSING else len(value)
+        return item.get(self.name(), _MISSING)
+
+    def value(self, item):
+        result = self.operand(item)
+        while self.peek() in ('+', '-'):
+            op = self.take()
+            right = self.operand(item)
+            result = result + right if op == '+' else result - right
+        return result
+
+    # Conditions -----------------------------------------------------------
+
+    def condition(self, item):
+        result = self._and(item)
+        while (self.peek() or '').upper() == 'OR':
+            self.take()
+            right = self._and(item)
+            result = result or right
+        return result
+
+    def _and(self, item):
+        result = self._not(item)
+        while (self.peek() or '').upper() == 'AND':
+            self.take()
+            right = self._not(item)
+            result = result and right
+        return result
+
+    def _not(self, item):
+        if (self.peek() or '').upper() == 'NOT':
+            self.take()
+            return not self._not(item)
+        return self._primary(item)
+
+    def _primary(self, item):
+        token = self.peek()
+        lowered = token.lower()
+        if token == '(':
+            self.take()
+            result = self.condition(item)
+            self.take(')')
+            return result
+        if lowered in ('attribute_exists', 'attribute_not_exists'):
+            self.take(); self.take('(')
+            exists = item.get(self.name(), _MISSING) is not _MISSING
+            self.take(')')
+            return exists if lowered == 'attribute_exists' else not exists
+        if lowered in ('begins_with', 'contains'):
+            self.take(); self.take('(')
+            left = self.operand(item)
+            self.take(',')
+            right = self.operand(item)
+            self.take(')')
+            if left is _MISSING:
+                return False
+            return left.startswith(right) if lowered == 'begins_with' else right in left
+
+        left = self.operand(item)
+        op = self.take()
+        if op.upper() == 'BETWEEN':
+            low = self.operand(item)
+            self.take('AND')
+            high = self.operand(item)
+            return left is not _MISSING and low <= left <= high
+        if op.upper() == 'IN':
+            self.take('(')
+            options = [self.operand(item)]
+            while self.peek() == ',':
+                self.take()
+                options.append(self.operand(item))
+            self.take(')')
+            return left in options
+        right = self.operand(item)
+        if left is _MISSING or right is _MISSING:
+            return op == '<>'
+        try:
+            return _COMPARATORS[op](left, right)
+        except TypeError:
+            return False
+
+    # Updates --------------------------------------------------------------
+
+    def apply_update(self, item):
+        while self.peek() is not None:
+            clause = self.take().upper()
+            while True:
+                if clause == 'SET':
+                    path = self.name()
+                    self.take('=')
+                    item[path] = self.value(item)
+                elif clause == 'ADD':
+                    path = self.name()
+                    amount = self.operand(item)
+                    current = item.get(path, _MISSING)
+                    if isinstance(amount, set):
+                        item[path] = (set() if current is _MISSING else set(current)) | amount
+                    else:
+                        item[path] = amount if current is _MISSING else current + amount
+                elif clause == 'REMOVE':
+                    item.pop(self.name(), None)
+                else:
+                    raise ValueError(f'Unsupported update clause {clause}')
+                if self.peek() != ',':
+                    break
+                self.take()
+
+
+def _build(condition, names, values, is_key_condition=False):
+    # Accept boto3 Key()/Attr() objects as well as expression strings
+    if isinstance(condition, ConditionBase):
+        built = ConditionExpressionBuilder().build_expression(condition, is_key_condition=is_key_condition)
+        names = dict(names or {}, **built.attribute_name_placeholders)
+        values = dict(values or {}, **built.attribute_value_placeholders)
+        condition = built.condition_expression
+    return condition, names, values
+
+
+def _matches(condition, item, names=None, values=None, is_key_condition=False):
+    if condition is None:
+        return True
+    text, names, values = _build(condition, names, values, is_key_condition)
+    return _Expression(text, names, values).condition(item)
+
+
+class LocalTable:
+    """In-memory subset of the boto3 DynamoDB Table resource API."""
+
+    def __init__(self, name, hash_key, range_key=None, indexes=None, latency=0.0, stream=None):
+        self.name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        # IndexName -> (hash key, range key or None)
+        self.indexes = indexes or {}
+        self.latency = latency
+        self.stream = stream
+        self.items = {}
+        self.calls = {}
+        self._sequence = itertools.count(1)
+
+    def _call(self, operation):
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _key(self, key):
+        return tuple(key[k] for k in (self.hash_key, self.range_key) if k)
+
+    def _emit(self, event_name, old, new):
+        if self.stream is None:
+            return
+        serializer = TypeSerializer()
+        record = {
+            'eventName': event_name,
+            'eventSourceARN': f'local:{self.name}',
+            'dynamodb': {'SequenceNumber': str(next(self._sequence))}
+        }
+        if old is not None:
+            record['dynamodb']['OldImage'] = {k: serializer.serialize(v) for k, v in old.items()}
+        if new is not None:
+            record['dynamodb']['NewImage'] = {k: serializer.serialize(v) for k, v in new.items()}
+        self.stream.send(record)
+
+    def _check(self, operation, existing, condition, names, values):
+        if condition is not None and not _matches(condition, existing or {}, names, values):
+            raise _client_error('ConditionalCheckFailedException', operation, 'The conditional request failed')
+
+    def get_item(self, Key, **kwargs):
+        self._call('GetItem')
+        item = self.items.get(self._key(Key))
+        return {'Item': copy.deepcopy(item)} if item is not None else {}
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None, ReturnValues='NONE', **kwargs):
+        self._call('PutItem')
+        key = self._key(Item)
+        existing = self.items.get(key)
+        self._check('PutItem', existing, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+        self.items[key] = copy.deepcopy(Item)
+        self._emit('MODIFY' if existing else 'INSERT', existing, Item)
+        return {'Attributes': copy.deepcopy(existing)} if ReturnValues == 'ALL_OLD' and existing else {}
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues='NONE', **kwargs):
+        self._call('UpdateItem')
+        key = self._key(Key)
+        existing = self.items.get(key)
+        self._check('UpdateItem', existing, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+
+        updated = copy.deepcopy(existing) if existing else dict(Key)
+        _Expression(UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues).apply_update(updated)
+        self.items[key] = updated
+        self._emit('MODIFY' if existing else 'INSERT', existing, updated)
+
+        if ReturnValues == 'ALL_NEW':
+            return {'Attributes': copy.deepcopy(updated)}
+        if ReturnValues == 'ALL_OLD':
+            return {'Attributes': copy.deepcopy(existing or {})}
+        if ReturnValues == 'UPDATED_NEW':
+            changed = {k: v for k, v in updated.items() if (existing or {}).get(k, _MISSING) != v}
+            return {'Attributes': copy.deepcopy(changed)}
+        return {}
+
+    def delete_item(self, Key, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues='NONE', **kwargs):
+        self._call('DeleteItem')
+        key = self._key(Key)
+        existing = self.items.get(key)
+        self._check('DeleteItem', existing, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+        if existing is not None:
+            del self.items[key]
+            self._emit('REMOVE', existing, None)
+        return {'Attributes': copy.deepcopy(existing)} if ReturnValues == 'ALL_OLD' and existing else {}
+
+    def _read(self, operation, items, FilterExpression=None, ExpressionAttributeNames=None,
+              ExpressionAttributeValues=None, Limit=None, Select=None, ExclusiveStartKey=None, **kwargs):
+        items = [i for i in items if _matches(FilterExpression, i, ExpressionAttributeNames, ExpressionAttributeValues)]
+        # ExclusiveStartKey is an index into the result list for the stand-in
+        start = ExclusiveStartKey.get('__offset', 0) if ExclusiveStartKey else 0
+        page = items[start:start + Limit] if Limit else items[start:]
+        response = {'Count': len(page), 'ScannedCount': len(page)}
+        if Select != 'COUNT':
+            response['Items'] = copy.deepcopy(page)
+        if Limit and start + Limit < len(items):
+            response['LastEvaluatedKey'] = {'__offset': start + Limit}
+        return response
+
+    def query(self, KeyConditionExpression, IndexName=None, ScanIndexForward=True,
+              ExpressionAttributeNames=None, ExpressionAttributeValues=None, **kwargs):
+        self._call('Query')
+        hash_key, range_key = self.indexes[IndexName] if IndexName else (self.hash_key, self.range_key)
+        items = [
+            i for i in self.items.values()
+            if hash_key in i and _matches(KeyConditionExpression, i, ExpressionAttributeNames,
+                                          ExpressionAttributeValues, is_key_condition=True)
+        ]
+        if range_key:
+            items = [i for i in items if range_key in i]
+            items.sort(key=lambda i: i[range_key], reverse=not ScanIndexForward)
+        return self._read('Query', items, ExpressionAttributeNames=ExpressionAttributeNames,
+                          ExpressionAttributeValues=ExpressionAttributeValues, **kwargs)
+
+    def scan(self, **kwargs):
+        self._call('Scan')
+        return self._read('Scan', list(self.items.values()), **kwargs)
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        return _LocalBatchWriter(self)
+
+
+class _LocalBatchWriter:
+
+    def __init__(self, table):
+        self.table = table
+        self.pending = []
+
+    def put_item(self, Item):
+        self.pending.append(('put', Item))
+
+    def delete_item(self, Key):
+        self.pending.append(('delete', Key))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        # One simulated round trip per 25 writes, like BatchWriteItem
+        for start in range(0, len(self.pending), 25):
+            self.table._call('BatchWriteItem')
+            for action, value in self.pending[start:start + 25]:
+                key = self.table._key(value)
+                existing = self.table.items.get(key)
+                if action == 'put':
+                    self.table.items[key] = copy.deepcopy(value)
+                    self.table._emit('MODIFY' if existing else 'INSERT', existing, value)
+                elif existing is not None:
+                    del self.table.items[key]
+                    self.table._emit('REMOVE', existing, None)
+        self.pending = []
+        return False
+
+
+class _LocalDynamoDBClient:
+
+    exceptions = SimpleNamespace(**_ERRORS)
+
+    def __init__(self, resource):
+        self.resource = resource
+
+    def transact_write_items(self, TransactItems, **kwargs):
+        # All conditions are checked before anything is written
+        deserializer = TypeDeserializer()
+
+        def plain(mapping):
+            return {k: deserializer.deserialize(v) for k, v in (mapping or {}).items()}
+
+        actions = []
+        reasons = []
+        failed = False
+        for entry in TransactItems:
+            (kind, spec), = entry.items()
+            table = self.resource.Table(spec['TableName'])
+            key = plain(spec.get('Key') or {k: spec['Item'][k] for k in (table.hash_key, table.range_key) if k})
+            existing = table.items.get(table._key(key))
+            names = spec.get('ExpressionAttributeNames')
+            values = plain(spec.get('ExpressionAttributeValues'))
+            ok = _matches(spec.get('ConditionExpression'), existing or {}, names, values)
+            reasons.append({'Code': 'None'} if ok else {'Code': 'ConditionalCheckFailed'})
+            failed = failed or not ok
+            actions.append((kind, spec, table, key, names, values))
+
+        self.resource._call('TransactWriteItems')
+        if failed:
+            raise _client_error('TransactionCanceledException', 'TransactWriteItems',
+                                'Transaction cancelled', CancellationReasons=reasons)
+
+        for kind, spec, table, key, names, values in actions:
+            if kind == 'Put':
+                existing = table.items.get(table._key(key))
+                item = plain(spec['Item'])
+                table.items[table._key(key)] = item
+                table._emit('MODIFY' if existing else 'INSERT', existing, item)
+            elif kind == 'Update':
+                existing = table.items.get(table._key(key))
+                updated = copy.deepcopy(existing) if existing else dict(key)
+                _Expression(spec['UpdateExpression'], names, values).apply_update(updated)
+                table.items[table._key(key)] = updated
+                table._emit('MODIFY' if existing else 'INSERT', existing, updated)
+            elif kind == 'Delete':
+                existing = table.items.pop(table._key(key), None)
+                if existing is not None:
+                    table._emit('REMOVE', existing, None)
+        return {}
+
+
+class LocalDynamoDB:
+    """In-memory subset of the boto3 DynamoDB service resource."""
+
+    def __init__(self, latency=0.0, unprocessed_rate=0.0, seed=None):
+        import random
+        self.latency = latency
+        # Share of batch keys/items left unprocessed on each call
+        self.unprocessed_rate = unprocessed_rate
+        self.random = random.Random(seed)
+        self.tables = {}
+        self.calls = {}
+        self.meta = SimpleNamespace(client=_LocalDynamoDBClient(self))
+
+    def _call(self, operation):
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def create_table(self, name, hash_key, range_key=None, indexes=None, stream=None):
+        self.tables[name] = LocalTable(name, hash_key, range_key, indexes, self.latency, stream)
+        return self.tables[name]
+
+    def Table(self, name):
+        return self.tables[name]
+
+    def _split(self, requests):
+        done = [r for r in requests if self.random.random() >= self.unprocessed_rate]
+        return done, [r for r in requests if not any(r is d for d in done)]
+
+    def batch_get_item(self, RequestItems):
+        self._call('BatchGetItem')
+        responses = {}
+        unprocessed = {}
+        for name, spec in RequestItems.items():
+            table = self.tables[name]
+            keys, left = self._split(spec['Keys'])
+            found = [table.items.get(table._key(k)) for k in keys]
+            responses[name] = [copy.deepcopy(i) for i in found if i is not None]
+            if left:
+                unprocessed[name] = dict(spec, Keys=left)
+        return {'Responses': responses, 'UnprocessedKeys': unprocessed}
+
+    def batch_write_item(self, RequestItems):
+        self._call('BatchWriteItem')
+        unprocessed = {}
+        for name, requests in RequestItems.items():
+            table = self.tables[name]
+            done, left = self._split(requests)
+            for request in done:
+                if 'PutRequest' in request:
+                    table.put_item(Item=request['PutRequest']['Item'])
+                else:
+                    table.delete_item(Key=request['DeleteRequest']['Key'])
+            if left:
+                unprocessed[name] = left
+        return {'UnprocessedItems': unprocessed}
+
+
+class LocalQueue:
+    """In-process stand-in for an SQS queue or stream event source mapping.
+
+    deliver() hands records to a Lambda-style handler in batches, honours
+    partial batch responses ({"batchItemFailures": [...]}) and moves records
+    that keep failing to dead_letters.
+    """
+
+    def __init__(self, max_attempts=3):
+        self.max_attempts = max_attempts
+        self.pending = deque()
+        self.dead_letters = []
+        self._ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self.pending)
+
+    def send(self, record):
+        if not isinstance(record, dict) or 'dynamodb' not in record:
+            record = {'messageId': str(next(self._ids)), 'body': record}
+        self.pending.append([record, 0])
+
+    @staticmethod
+    def _identifier(record):
+        return record.get('messageId') or record['dynamodb']['SequenceNumber']
+
+    def deliver(self, handler, batch_size=10, context=None):
+        delivered = 0
+        while self.pending:
+            batch = [self.pending.popleft() for _ in range(min(batch_size, len(self.pending)))]
+            for entry in batch:
+                entry[1] += 1
+            try:
+                response = handler({'Records': [record for record, _ in batch]}, context) or {}
+                failed = {f['itemIdentifier'] for f in response.get('batchItemFailures', [])}
+            except Exception:
+                failed = {self._identifier(record) for record, _ in batch}
+
+            for entry in batch:
+                record, attempts = entry
+                if self._identifier(record) not in failed:
+                    delivered += 1
+                elif attempts >= self.max_attempts:
+                    self.dead_letters.append(record)
+                else:
+                    self.pending.append(entry)
+        return delivered
+
+
+class FaultInjectingTable:
+    """Wraps a table and throttles a share of calls, like an overloaded
+    partition. Batch writers are passed through untouched."""
+
+    def __init__(self, table, throttle_rate=0.2, seed=None):
+        import random
+        self.table = table
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.attempts = 0
+        self.throttled = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self.table, name)
+        if name not in ('get_item', 'put_item', 'update_item', 'delete_item', 'query', 'scan'):
+            return attr
+
+        def call(*args, **kwargs):
+            self.attempts += 1
+            if self.random.random() < self.throttle_rate:
+                self.throttled += 1
+                raise _client_error('ProvisionedThroughputExceededException', name,
+                                    'The level of configured provisioned throughput for the table was exceeded')
+            return attr(*args, **kwargs)
+        return call
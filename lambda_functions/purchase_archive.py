@@ -0,0 +1,157 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import boto3
+
+# Purchases carry buyer details, so they get their own private bucket rather
+# than sharing the images bucket that signed URLs are served from
+ARCHIVE_BUCKET = os.environ.get('ARCHIVE_BUCKET', 'junkwunk-purchase-archive-ap-south-1')
+ARCHIVE_PREFIX = 'purchases/'
+MANIFEST_KEY = ARCHIVE_PREFIX + 'manifest.json'
+# Purchases older than this many whole months leave JunkWunk-Purchases
+HOT_MONTHS = int(os.environ.get('PURCHASES_HOT_MONTHS', '6'))
+USER_BUCKETS = 64
+# How long a container trusts its copy of the manifest; the archiver deletes
+# the rows of a part only once its manifest is at least this old
+MANIFEST_TTL = 60
+MAX_CACHED_PARTS = 64
+
+s3 = boto3.client('s3', region_name='ap-south-1')
+
+# Layout: purchases/month=YYYY-MM/bucket=NN/part-<run>.jsonl.gz, one
+# JSON purchase per line, sorted by userId then newest first. Each archiver
+# run adds new parts, so a rerun after a partial failure can leave the same
+# purchase in two parts (or in a part and the hot table); readers dedupe on
+# purchaseId. The manifest lists every part and the horizon: the archive
+# holds nothing newer than it. Parts marked pending still have their rows
+# in the table; the next run deletes them.
+
+_manifest = None
+_manifest_loaded_at = 0
+# part key -> {userId: [purchases]}, kept for the life of the warm container
+_part_cache = {}
+
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return int(obj) if obj == obj.to_integral_value() else float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+
+def user_bucket(user_id):
+    return int(hashlib.sha1(user_id.encode('utf-8')).hexdigest()[:8], 16) % USER_BUCKETS
+
+
+def month_of(timestamp):
+    return datetime.fromtimestamp(int(timestamp), timezone.utc).strftime('%Y-%m')
+
+
+def months_between(since, until):
+    # Every YYYY-MM from the month of `since` to the month of `until`
+    year, month = map(int, month_of(since).split('-'))
+    last = month_of(until)
+    months = []
+    while True:
+        months.append(f'{year:04d}-{month:02d}')
+        if months[-1] >= last:
+            return months
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def hot_horizon(now=None, months=HOT_MONTHS):
+    # Start of the month `months` whole months back, so archived months are
+    # complete and never split between the archive and the table
+    current = datetime.fromtimestamp(now if now is not None else time.time(), timezone.utc)
+    year, month = current.year, current.month - months
+    while month < 1:
+        year, month = year - 1, month + 12
+    return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def part_key(month, bucket, run_id):
+    return f'{ARCHIVE_PREFIX}month={month}/bucket={bucket:02d}/part-{run_id}.jsonl.gz'
+
+
+def encode_row(purchase):
+    # Sort key and JSON line for a purchase; far smaller than the item
+    # itself, so the archiver buffers these
+    return purchase['userId'], -int(purchase.get('timestamp', 0)), \
+        json.dumps(purchase, cls=DecimalEncoder, separators=(',', ':'))
+
+
+def encode_part(rows):
+    return gzip.compress('\n'.join(line for _, _, line in sorted(rows)).encode('utf-8'))
+
+
+def decode_part(data):
+    by_user = {}
+    for line in gzip.decompress(data).decode('utf-8').splitlines():
+        if line:
+            purchase = json.loads(line)
+            by_user.setdefault(purchase['userId'], []).append(purchase)
+    return by_user
+
+
+def empty_manifest():
+    return {'horizon': 0, 'parts': []}
+
+
+def read_manifest(client=None, bucket=ARCHIVE_BUCKET):
+    # Any error other than a missing manifest is raised: the archiver must
+    # never mistake an unreadable manifest for an empty one and overwrite it
+    client = client or s3
+    try:
+        return json.loads(client.get_object(Bucket=bucket, Key=MANIFEST_KEY)['Body'].read())
+    except client.exceptions.NoSuchKey:
+        return empty_manifest()
+
+
+def load_manifest(now=None):
+    global _manifest, _manifest_loaded_at
+    now = now if now is not None else time.time()
+    if _manifest is None or now - _manifest_loaded_at >= MANIFEST_TTL:
+        try:
+            _manifest = read_manifest()
+        except Exception as e:
+            # Serve the hot table (or the last manifest this container
+            # read) rather than failing the whole history
+            print(f"Could not read the purchase archive manifest: {str(e)}")
+            if _manifest is None:
+                _manifest = empty_manifest()
+        _manifest_loaded_at = now
+    return _manifest
+
+
+def _load_part(key):
+    rows = _part_cache.get(key)
+    if rows is None:
+        rows = decode_part(s3.get_object(Bucket=ARCHIVE_BUCKET, Key=key)['Body'].read())
+        # Tolerates concurrent readers evicting the same entries (api_server)
+        if len(_part_cache) >= MAX_CACHED_PARTS:
+            for old in list(_part_cache)[:MAX_CACHED_PARTS // 2]:
+                _part_cache.pop(old, None)
+        _part_cache[key] = rows
+    return rows
+
+
+def archived_purchases(user_id, since, until):
+    """A user's archived purchases with since <= timestamp <= until."""
+    manifest = load_manifest()
+    if since >= manifest['horizon']:
+        return []
+    bucket = user_bucket(user_id)
+    months = set(months_between(since, min(until, manifest['horizon'] - 1)))
+    purchases = []
+    for part in manifest['parts']:
+        if part['bucket'] == bucket and part['month'] in months:
+            purchases.extend(
+                p for p in _load_part(part['key']).get(user_id, [])
+                if since <= p.get('timestamp', 0) <= until
+            )
+    return purchases
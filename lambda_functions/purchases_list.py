@@ -1,10 +1,15 @@
 import json
-import boto3
 from decimal import Decimal
-from boto3.dynamodb.conditions import Key
+from datetime import datetime
+from boto3.dynamodb.conditions import Attr, Key
 
-dynamodb = boto3.resource('dynamodb', region_name='ap-south-1')
-table = dynamodb.Table('JunkWunk-Purchases')
+from image_renditions import select_image
+from image_urls import attach_signed_urls
+from purchase_archive import archived_purchases, load_manifest
+from resilience import ResilientTable, dynamodb_resource, error_response, with_retry_budget
+
+dynamodb = dynamodb_resource()
+table = ResilientTable(dynamodb.Table('JunkWunk-Purchases'))
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -12,6 +17,7 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super(DecimalEncoder, self).default(obj)
 
+@with_retry_budget
 def lambda_handler(event, context):
     try:
         # Get userId from Cognito
@@ -31,18 +37,53 @@ def lambda_handler(event, context):
                 'body': json.dumps({'error': 'Unauthorized'})
             }
         
-        # Query purchases by userId using GSI
-        response = table.query(
-            IndexName='UserIdIndex',
-            KeyConditionExpression=Key('userId').eq(user_id),
-            ScanIndexForward=False  # Sort by timestamp descending
-        )
+        # Optional time window in epoch seconds; by default the full history.
+        # Pass since=archivedBefore to read only the hot (unarchived) months.
+        params = event.get('queryStringParameters') or {}
+        horizon = load_manifest()['horizon']
+        try:
+            since = int(params['since']) if params.get('since') else 0
+            until = int(params['until']) if params.get('until') else int(datetime.now().timestamp())
+        except ValueError:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': 'since and until must be epoch seconds'})
+            }
+        
+        # Query purchases by userId using GSI (hash key only, so the window
+        # is a filter)
+        query_kwargs = {
+            'IndexName': 'UserIdIndex',
+            'KeyConditionExpression': Key('userId').eq(user_id),
+            'FilterExpression': Attr('timestamp').between(since, until)
+        }
+        items = []
+        while True:
+            response = table.query(**query_kwargs)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
         
-        items = response.get('Items', [])
+        # Older months live in the archive; a purchase caught mid-archival
+        # can be in both places
+        if since < horizon:
+            seen = {item['purchaseId'] for item in items}
+            for purchase in archived_purchases(user_id, since, until):
+                if purchase['purchaseId'] not in seen:
+                    seen.add(purchase['purchaseId'])
+                    items.append(purchase)
         
         # Sort by timestamp descending
         items.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
         
+        items = [select_image(item) for item in items]
+        attach_signed_urls(items)
+        
         return {
             'statusCode': 200,
             'headers': {
@@ -51,17 +92,10 @@ def lambda_handler(event, context):
             },
             'body': json.dumps({
                 'purchases': items,
-                'count': len(items)
+                'count': len(items),
+                'archivedBefore': horizon
             }, cls=DecimalEncoder)
         }
         
     except Exception as e:
-        debugPrint(f"Error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': str(e)})
-        }
+        return error_response(e)
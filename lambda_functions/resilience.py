@@ -0,0 +1,367 @@
+import functools
+import json
+import os
+import random
+import threading
+import time
+import boto3
+from boto3.dynamodb.transform import TransformationInjector
+from binascii import crc32
+from botocore.config import Config
+from botocore.exceptions import ChecksumError, ClientError, HTTPClientError
+from botocore.exceptions import ConnectionError as EndpointError
+
+# Shared throttling handling for the DynamoDB calls in every handler:
+#   - jittered exponential backoff on throttles and transient network
+#     errors, capped by a per-invocation retry budget and a container-wide
+#     retry quota so retries cannot amplify an overload
+#   - a token bucket to pace batch and scan jobs
+#   - retrying of unprocessed keys/items from batch operations
+#   - load shedding: once the budget is spent the request fails fast with
+#     429 and Retry-After instead of a 500
+#   - one DynamoDB client per process, so handlers served together by the
+#     API server share it and its connection pool
+
+# The SDK's own retries are switched off so this layer is the only one; it
+# retries throttles and the transient failures the SDK's standard mode would
+BOTO_CONFIG = Config(retries={'mode': 'standard', 'total_max_attempts': 1})
+
+THROTTLE_CODES = {
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+    'TransactionConflictException',
+    'InternalServerError',
+    'ServiceUnavailable'
+}
+
+# Dropped connections, timeouts and corrupted responses (see verify_crc32)
+TRANSIENT_ERRORS = (EndpointError, HTTPClientError, ChecksumError)
+
+TRANSACTION_RETRY_REASONS = {'ThrottlingError', 'ProvisionedThroughputExceeded', 'TransactionConflict'}
+
+BASE_DELAY = 0.05
+MAX_DELAY = 1.0
+MAX_RETRIES_PER_INVOCATION = 8
+MAX_BACKOFF_PER_INVOCATION = 3.0
+# Time left for the handler to answer after its last backoff
+DEADLINE_MARGIN = 1.0
+# Container-wide, like the SDK's standard retry quota: each retry spends
+# RETRY_COST tokens and only successful calls give one back, so retries are
+# held to a share of the calls that succeed; there is no refill over time
+RETRY_QUOTA = 500
+RETRY_COST = 5
+RETRY_AFTER_SECONDS = (1, 3)
+
+
+def verify_crc32(http_response, **kwargs):
+    # With its retries off the SDK no longer checks DynamoDB's response
+    # checksum; raise so a corrupted response is retried like a dropped one
+    expected = http_response.headers.get('x-amz-crc32')
+    if expected is None:
+        return
+    actual = crc32(http_response.content) & 0xFFFFFFFF
+    if actual != int(expected):
+        raise ChecksumError(checksum_type='crc32', expected_checksum=expected, actual_checksum=actual)
+
+
+class ConditionInjector:
+    """Builds Key/Attr condition expressions with one builder per thread.
+
+    The high-level interface registers a single stateful expression builder
+    on the client; with one client serving many threads, concurrent requests
+    would interleave its placeholder names.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def __call__(self, params, model, **kwargs):
+        injector = getattr(self._local, 'injector', None)
+        if injector is None:
+            injector = self._local.injector = TransformationInjector()
+        injector.inject_condition_expressions(params, model, **kwargs)
+
+
+def connect(pool_size, region_name='ap-south-1'):
+    # One thread-safe low-level client with a connection pool of pool_size,
+    # and the service resource on top of it. The resource's actions keep no
+    # state of their own, so every thread can share it.
+    session = boto3.session.Session()
+    client = session.client('dynamodb', region_name=region_name,
+                            config=BOTO_CONFIG.merge(Config(max_pool_connections=pool_size)))
+    client.meta.events.register('after-call.dynamodb', verify_crc32)
+    # Registered first, so the resource's own handler under this id is ignored
+    client.meta.events.register('before-parameter-build.dynamodb', ConditionInjector(),
+                                unique_id='dynamodb-condition-expression')
+    resource_class = type(session.resource('dynamodb', region_name=region_name))
+    return resource_class(client=client)
+
+
+_dynamodb = None
+_dynamodb_lock = threading.Lock()
+
+
+def dynamodb_resource():
+    # Created on first use so the API server can size the pool (one
+    # connection per worker thread) before any handler is imported
+    global _dynamodb
+    with _dynamodb_lock:
+        if _dynamodb is None:
+            _dynamodb = connect(int(os.environ.get('DYNAMODB_POOL_SIZE', '10')))
+    return _dynamodb
+
+
+class Overloaded(Exception):
+    pass
+
+
+class TokenBucket:
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens=1):
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def release(self, tokens=1):
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + tokens)
+
+    def acquire(self, tokens=1):
+        # Block until the tokens are available; for pacing background jobs
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+retry_quota = TokenBucket(0, RETRY_QUOTA)
+
+
+def size_retry_quota(concurrency):
+    # A Lambda container serves one request at a time; a process serving
+    # `concurrency` at once (api_server) gets the quota of that many
+    global retry_quota
+    retry_quota = TokenBucket(0, RETRY_QUOTA * concurrency)
+    return retry_quota
+
+
+def is_throttle(error):
+    if not isinstance(error, ClientError):
+        return False
+    code = error.response.get('Error', {}).get('Code')
+    if code == 'TransactionCanceledException':
+        # A transaction cancelled only because a participant was throttled
+        # or conflicted is worth retrying; a failed condition is not
+        reasons = {r.get('Code') for r in error.response.get('CancellationReasons', [])} - {'None', None}
+        return bool(reasons) and reasons <= TRANSACTION_RETRY_REASONS
+    return code in THROTTLE_CODES
+
+
+class RetryBudget:
+
+    def __init__(self, max_retries=MAX_RETRIES_PER_INVOCATION,
+                 max_backoff=MAX_BACKOFF_PER_INVOCATION, deadline=None, quota=None):
+        self.retries_left = max_retries
+        self.backoff_left = max_backoff
+        self.deadline = deadline
+        self.quota = quota or retry_quota
+        self.retries = 0
+
+    @classmethod
+    def for_context(cls, context):
+        deadline = None
+        if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+            deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000.0 - DEADLINE_MARGIN
+        return cls(deadline=deadline)
+
+    def wait(self, attempt):
+        # Full jitter: spread retries out instead of synchronising them
+        delay = random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+        if self.retries_left <= 0 or delay > self.backoff_left:
+            raise Overloaded('Retry budget exhausted')
+        if self.deadline is not None and time.monotonic() + delay > self.deadline:
+            raise Overloaded('Not enough time left to retry')
+        if not self.quota.try_acquire(RETRY_COST):
+            raise Overloaded('Retry quota exhausted')
+        self.retries_left -= 1
+        self.backoff_left -= delay
+        self.retries += 1
+        time.sleep(delay)
+
+    def call(self, fn, *args, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                result = fn(*args, **kwargs)
+            except (ClientError,) + TRANSIENT_ERRORS as e:
+                if isinstance(e, ClientError) and not is_throttle(e):
+                    raise
+                try:
+                    self.wait(attempt)
+                except Overloaded as overloaded:
+                    raise overloaded from e
+                attempt += 1
+                continue
+            self.quota.release()
+            return result
+
+
+_local = threading.local()
+
+
+def current_budget():
+    budget = getattr(_local, 'budget', None)
+    return budget if budget is not None else RetryBudget()
+
+
+class ResilientTable:
+    """Routes a boto3 Table's calls through the current retry budget."""
+
+    RETRIED = {'get_item', 'put_item', 'update_item', 'delete_item', 'query', 'scan'}
+
+    def __init__(self, table):
+        self._table = table
+
+    def __getattr__(self, name):
+        attr = getattr(self._table, name)
+        if name in self.RETRIED:
+            return functools.partial(lambda fn, *a, **kw: current_budget().call(fn, *a, **kw), attr)
+        return attr
+
+
+def _batch(call, request_items, unprocessed_field, response_field=None):
+    responses = {}
+    attempt = 0
+    budget = current_budget()
+    while request_items:
+        response = budget.call(call, RequestItems=request_items)
+        if response_field:
+            for table, rows in response.get(response_field, {}).items():
+                responses.setdefault(table, []).extend(rows)
+        request_items = response.get(unprocessed_field) or {}
+        if request_items:
+            budget.wait(attempt)
+            attempt += 1
+    return responses
+
+
+def batch_get_all(dynamodb, request_items):
+    # batch_get_item until every key is served; returns {table: [items]}
+    return _batch(dynamodb.batch_get_item, request_items, 'UnprocessedKeys', 'Responses')
+
+
+def batch_write_all(dynamodb, request_items):
+    _batch(dynamodb.batch_write_item, request_items, 'UnprocessedItems')
+
+
+def error_response(e):
+    # Throttles and shed requests become 429s with a jittered Retry-After;
+    # anything else is a 500 whose details stay in the log
+    if isinstance(e, Overloaded) or is_throttle(e):
+        print(f"Shedding request: {str(e)}")
+        return {
+            'statusCode': 429,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*',
+                'Retry-After': str(random.randint(*RETRY_AFTER_SECONDS))
+            },
+            'body': json.dumps({'error': 'Service is busy, please retry shortly'})
+        }
+    print(f"Error: {str(e)}")
+    return {
+        'statusCode': 500,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps({'error': 'Internal server error'})
+    }
+
+
+def with_retry_budget(handler):
+    # Gives each invocation a fresh budget bounded by its remaining time
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        _local.budget = RetryBudget.for_context(context)
+        try:
+            return handler(event, context)
+        except Overloaded as e:
+            return error_response(e)
+        finally:
+            _local.budget = None
+    return wrapper
+
+
+if __name__ == '__main__':
+    # Compare write amplification with and without the layer against a
+    # table that throttles a share of calls:
+    #   python resilience.py --throttle-rate 0.3 --requests 500
+    import argparse
+    import contextlib
+    import io
+    from local_stores import FaultInjectingTable, LocalTable
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--throttle-rate', type=float, default=0.3)
+    parser.add_argument('--client-retries', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    BASE_DELAY, MAX_DELAY = 0.001, 0.02  # keep the benchmark quick
+
+    def run(use_layer):
+        random.seed(args.seed)
+        table = FaultInjectingTable(LocalTable('Bench', 'id'), throttle_rate=args.throttle_rate, seed=args.seed)
+        target = ResilientTable(table) if use_layer else table
+        retry_quota.tokens = retry_quota.capacity
+        outcomes = {'ok': 0, 429: 0, 500: 0}
+
+        @with_retry_budget
+        def handler(event, context):
+            try:
+                target.put_item(Item={'id': event['id']})
+                return {'statusCode': 200}
+            except Exception as e:
+                return error_response(e) if use_layer else {'statusCode': 500}
+
+        for i in range(args.requests):
+            # The client retries immediately on 500s and after Retry-After on
+            # 429s (the wait is not simulated); outcomes are the final answers
+            for attempt in range(args.client_retries + 1):
+                status = handler({'id': str(i)}, None)['statusCode']
+                if status == 200:
+                    outcomes['ok'] += 1
+                    break
+                if attempt == args.client_retries:
+                    outcomes[status] += 1
+        return table.attempts, outcomes
+
+    for use_layer in (False, True):
+        with contextlib.redirect_stdout(io.StringIO()):
+            attempts, outcomes = run(use_layer)
+        label = 'with resilience layer' if use_layer else 'without'
+        print(f"{label:>22}: {attempts} table calls for {args.requests} requests "
+              f"({attempts / args.requests:.2f}x), {outcomes['ok']} ok, "
+              f"{outcomes[429]} still shed with 429, {outcomes[500]} failed with 500")
@@ -0,0 +1,256 @@
+import time
+import numpy as np
+
+from geo import EARTH_RADIUS_KM
+
+# Pickup route planning for mediators: a nearest-neighbour tour improved with
+# 2-opt and or-opt, with optional per-stop time windows. Distances come from
+# a vectorized haversine matrix; improvement moves are scored for all
+# positions at once and only the promising ones are checked against the
+# time windows.
+
+DEFAULT_SPEED_KMH = 25.0
+DEFAULT_SERVICE_MINUTES = 5.0
+MAX_OR_OPT_SEGMENT = 3
+EPSILON = 1e-9
+
+
+def distance_matrix(points):
+    # points: (n, 2) array of [lat, lng] in degrees -> (n, n) km
+    radians = np.radians(np.asarray(points, dtype=np.float64))
+    lat = radians[:, 0:1]
+    lng = radians[:, 1:2]
+    dlat = lat.T - lat
+    dlng = lng.T - lng
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat) * np.cos(lat.T) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class RoutePlanner:
+
+    def __init__(self, start, stops, return_to_start=False,
+                 speed_kmh=DEFAULT_SPEED_KMH, service_minutes=DEFAULT_SERVICE_MINUTES):
+        # start: (lat, lng); stops: dicts with lat, lng and optional
+        # windowStart/windowEnd in minutes after departure
+        self.stops = stops
+        n = len(stops)
+        points = np.empty((n + 2, 2))
+        points[0] = start
+        points[1:n + 1] = [(s['lat'], s['lng']) for s in stops]
+        points[n + 1] = start
+
+        # Node 0 is the start and node n+1 the fixed end of the path. For an
+        # open route the end node is a dummy at zero distance from everything,
+        # so both cases are a path with fixed endpoints.
+        self.dist = distance_matrix(points)
+        if not return_to_start:
+            self.dist[n + 1, :] = 0.0
+            self.dist[:, n + 1] = 0.0
+
+        self.minutes_per_km = 60.0 / speed_kmh
+        self.service = np.zeros(n + 2)
+        self.window_start = np.zeros(n + 2)
+        self.window_end = np.full(n + 2, np.inf)
+        for i, stop in enumerate(stops, start=1):
+            self.service[i] = stop.get('serviceMinutes', service_minutes)
+            self.window_start[i] = stop.get('windowStart') or 0.0
+            if stop.get('windowEnd') is not None:
+                self.window_end[i] = stop['windowEnd']
+        self.has_windows = bool(np.isfinite(self.window_end).any() or self.window_start.any())
+
+    def route_distance(self, route):
+        return float(self.dist[route[:-1], route[1:]].sum())
+
+    def schedule(self, route):
+        # Arrival minute at every node and total lateness against windowEnd
+        arrivals = np.zeros(len(route))
+        clock = 0.0
+        lateness = 0.0
+        for pos in range(1, len(route)):
+            prev, node = route[pos - 1], route[pos]
+            clock += self.service[prev] + self.dist[prev, node] * self.minutes_per_km
+            clock = max(clock, self.window_start[node])
+            arrivals[pos] = clock
+            lateness += max(0.0, clock - self.window_end[node])
+        return arrivals, lateness
+
+    def _lateness(self, route):
+        return self.schedule(route)[1] if self.has_windows else 0.0
+
+    def nearest_neighbour(self):
+        n = len(self.stops)
+        route = [0]
+        visited = np.zeros(n + 2, dtype=bool)
+        visited[0] = visited[n + 1] = True
+        clock = 0.0
+        current = 0
+        for _ in range(n):
+            travel = self.dist[current] * self.minutes_per_km
+            arrival = np.maximum(clock + self.service[current] + travel, self.window_start)
+            candidates = ~visited
+            if self.has_windows:
+                feasible = candidates & (arrival <= self.window_end)
+                if feasible.any():
+                    candidates = feasible
+                else:
+                    # Nothing can be reached in time; take the most urgent stop
+                    urgency = np.where(candidates, self.window_end, np.inf)
+                    candidates = urgency == urgency.min()
+            nxt = int(np.argmin(np.where(candidates, self.dist[current], np.inf)))
+            route.append(nxt)
+            visited[nxt] = True
+            clock = arrival[nxt]
+            current = nxt
+        route.append(n + 1)
+        return np.array(route)
+
+    def _accept(self, candidate, lateness):
+        new_lateness = self._lateness(candidate)
+        return new_lateness <= lateness + EPSILON, new_lateness
+
+    def two_opt_pass(self, route, lateness, max_tries=5, deadline=None):
+        d = self.dist
+        m = len(route)
+        improved = False
+        for i in range(0, m - 3):
+            # With time windows every candidate is rescheduled, so one pass
+            # over a large route can outlast the whole time limit
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            a, b = route[i], route[i + 1]
+            cs = route[i + 2:m - 1]
+            ds = route[i + 3:m]
+            gains = d[a, b] + d[cs, ds] - d[a, cs] - d[b, ds]
+            order = np.argsort(-gains)[:max_tries]
+            for k in order:
+                if gains[k] <= EPSILON:
+                    break
+                j = i + 2 + k
+                candidate = route.copy()
+                candidate[i + 1:j + 1] = route[i + 1:j + 1][::-1]
+                ok, new_lateness = self._accept(candidate, lateness) if self.has_windows else (True, 0.0)
+                if ok:
+                    route, lateness, improved = candidate, new_lateness, True
+                    break
+        return route, lateness, improved
+
+    def or_opt_pass(self, route, lateness, max_tries=5, deadline=None):
+        d = self.dist
+        improved = False
+        for length in range(1, MAX_OR_OPT_SEGMENT + 1):
+            i = 1
+            # The segment never includes the fixed start or end node
+            while i + length < len(route):
+                if deadline is not None and time.perf_counter() > deadline:
+                    return route, lateness, improved
+                seg = route[i:i + length]
+                prev, nxt = route[i - 1], route[i + length]
+                removal_gain = d[prev, seg[0]] + d[seg[-1], nxt] - d[prev, nxt]
+
+                rest = np.concatenate([route[:i], route[i + length:]])
+                ps = rest[:-1]
+                qs = rest[1:]
+                forward = d[ps, seg[0]] + d[seg[-1], qs] - d[ps, qs]
+                backward = d[ps, seg[-1]] + d[seg[0], qs] - d[ps, qs]
+                insert_cost = np.minimum(forward, backward)
+                # Re-inserting where the segment came from is not a move
+                insert_cost[i - 1] = np.inf
+                gains = removal_gain - insert_cost
+
+                moved = False
+                for k in np.argsort(-gains)[:max_tries]:
+                    if gains[k] <= EPSILON:
+                        break
+                    piece = seg if forward[k] <= backward[k] else seg[::-1]
+                    candidate = np.concatenate([rest[:k + 1], piece, rest[k + 1:]])
+                    ok, new_lateness = self._accept(candidate, lateness) if self.has_windows else (True, 0.0)
+                    if ok:
+                        route, lateness, improved, moved = candidate, new_lateness, True, True
+                        break
+                if not moved:
+                    i += 1
+        return route, lateness, improved
+
+    def solve(self, time_limit=5.0, max_rounds=50):
+        deadline = time.perf_counter() + time_limit
+        route = self.nearest_neighbour()
+        lateness = self._lateness(route)
+        for _ in range(max_rounds):
+            route, lateness, improved_2opt = self.two_opt_pass(route, lateness, deadline=deadline)
+            if time.perf_counter() > deadline:
+                break
+            route, lateness, improved_or = self.or_opt_pass(route, lateness, deadline=deadline)
+            if not (improved_2opt or improved_or) or time.perf_counter() > deadline:
+                break
+        return route
+
+    def describe(self, route):
+        arrivals, _ = self.schedule(route)
+        n = len(self.stops)
+        legs = []
+        for pos in range(1, len(route)):
+            node = route[pos]
+            if node == n + 1:
+                continue
+            stop = self.stops[node - 1]
+            legs.append({
+                'stopId': stop.get('id'),
+                'lat': stop['lat'],
+                'lng': stop['lng'],
+                'distanceFromPreviousKm': round(float(self.dist[route[pos - 1], node]), 3),
+                'arrivalMinute': round(float(arrivals[pos]), 1),
+                'late': bool(arrivals[pos] > self.window_end[node] + EPSILON)
+            })
+        return {
+            'route': legs,
+            'totalDistanceKm': round(self.route_distance(route), 3),
+            'totalMinutes': round(float(arrivals[-1]), 1),
+            'lateStops': sum(1 for leg in legs if leg['late'])
+        }
+
+
+def plan_route(start, stops, return_to_start=False, speed_kmh=DEFAULT_SPEED_KMH,
+               service_minutes=DEFAULT_SERVICE_MINUTES, time_limit=5.0):
+    if not stops:
+        return {'route': [], 'totalDistanceKm': 0.0, 'totalMinutes': 0.0, 'lateStops': 0}
+    planner = RoutePlanner(start, stops, return_to_start, speed_kmh, service_minutes)
+    return planner.describe(planner.solve(time_limit=time_limit))
+
+
+if __name__ == '__main__':
+    # Benchmark solve time and improvement over nearest neighbour:
+    #   python route_planner.py --sizes 10 100 1000
+    import argparse
+    import random
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--windows', action='store_true', help='give half the stops time windows')
+    parser.add_argument('--time-limit', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start = (12.97, 77.59)  # Bengaluru
+    for size in args.sizes:
+        stops = []
+        for i in range(size):
+            stop = {'id': str(i), 'lat': start[0] + rng.uniform(-0.15, 0.15), 'lng': start[1] + rng.uniform(-0.15, 0.15)}
+            if args.windows and rng.random() < 0.5:
+                opens = rng.uniform(0, size * 6)
+                stop['windowStart'] = opens
+                stop['windowEnd'] = opens + 240
+            stops.append(stop)
+
+        planner = RoutePlanner(start, stops)
+        began = time.perf_counter()
+        baseline = planner.nearest_neighbour()
+        nn_time = time.perf_counter() - began
+        began = time.perf_counter()
+        route = planner.solve(time_limit=args.time_limit)
+        solve_time = time.perf_counter() - began
+        result = planner.describe(route)
+
+        print(f"{size:>5} stops: nearest neighbour {planner.route_distance(baseline):8.1f}km in {nn_time * 1e3:7.1f}ms, "
+              f"improved {result['totalDistanceKm']:8.1f}km in {solve_time * 1e3:8.1f}ms, "
+              f"{result['lateStops']} late")
@@ -0,0 +1,169 @@
+import json
+import math
+from decimal import Decimal
+
+from geo import parse_coordinates
+from route_planner import plan_route
+from resilience import ResilientTable, batch_get_all, dynamodb_resource, error_response, with_retry_budget
+
+dynamodb = dynamodb_resource()
+users_table = ResilientTable(dynamodb.Table('JunkWunk-Users'))
+
+MAX_STOPS = 1000
+SOLVE_TIME_LIMIT = 10.0
+MAX_SPEED_KMH = 200
+STOP_NUMBERS = ['windowStart', 'windowEnd', 'serviceMinutes']
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+def item_stops(item_ids):
+    # Pickup locations are the seller coordinates stored on each item
+    stops = []
+    keys = [{'itemId': item_id} for item_id in dict.fromkeys(item_ids)]
+    for start in range(0, len(keys), 100):
+        request = {'JunkWunk-Items': {
+            'Keys': keys[start:start + 100],
+            'ProjectionExpression': 'itemId, coordinates, city, title, sellerName'
+        }}
+        responses = batch_get_all(dynamodb, request)
+        for item in responses.get('JunkWunk-Items', []):
+            coords = parse_coordinates(item.get('coordinates'))
+            if coords:
+                stops.append({
+                    'id': item['itemId'],
+                    'lat': coords[0],
+                    'lng': coords[1],
+                    'title': item.get('title', ''),
+                    'sellerName': item.get('sellerName', '')
+                })
+    return stops
+
+def number(value):
+    # JSON numbers or numeric strings; None for anything else
+    if isinstance(value, bool) or not isinstance(value, (int, float, str, Decimal)):
+        return None
+    try:
+        value = float(value)
+    except ValueError:
+        return None
+    return value if math.isfinite(value) else None
+
+def validation_error(body):
+    # Checked before any item is read or the planner runs
+    if not isinstance(body, dict):
+        return 'Request body must be a JSON object'
+    stops = body.get('stops', [])
+    item_ids = body.get('itemIds') or []
+    if not isinstance(stops, list) or not all(isinstance(stop, dict) for stop in stops):
+        return 'stops must be a list of objects'
+    if not isinstance(item_ids, list) or not all(isinstance(item_id, str) for item_id in item_ids):
+        return 'itemIds must be a list of strings'
+    if len(stops) + len(set(item_ids)) > MAX_STOPS:
+        return f'At most {MAX_STOPS} stops are supported'
+    if 'speedKmh' in body:
+        speed = number(body['speedKmh'])
+        if speed is None or not 0 < speed <= MAX_SPEED_KMH:
+            return f'speedKmh must be between 0 and {MAX_SPEED_KMH}'
+    # Stop ids label the planned legs, so they must be distinct scalars (item
+    # stops use the itemId)
+    stop_ids = [stop['id'] for stop in stops if stop.get('id') is not None]
+    if not all(isinstance(stop_id, (str, int)) and not isinstance(stop_id, bool) for stop_id in stop_ids):
+        return 'stop id must be a string or an integer'
+    if len(set(stop_ids) | set(item_ids)) != len(stop_ids) + len(set(item_ids)):
+        return 'stop ids must be unique'
+    for stop in stops:
+        for field in STOP_NUMBERS:
+            if stop.get(field) is not None and (number(stop[field]) is None or number(stop[field]) < 0):
+                return f'{field} must be a non-negative number of minutes'
+        if stop.get('windowStart') is not None and stop.get('windowEnd') is not None \
+                and number(stop['windowStart']) > number(stop['windowEnd']):
+            return 'windowStart must not be after windowEnd'
+    return None
+
+@with_retry_budget
+def lambda_handler(event, context):
+    try:
+        # Get userId from Cognito
+        user_id = event.get('requestContext', {}).get('authorizer', {}).get('claims', {}).get('sub')
+        
+        if not user_id:
+            return {
+                'statusCode': 401,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': 'Unauthorized'})
+            }
+        
+        body = json.loads(event.get('body') or '{}')
+        error = validation_error(body)
+        if error:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': error})
+            }
+        
+        # Start from the given point, or the mediator's saved location
+        start = parse_coordinates(body.get('start'))
+        if not start:
+            user = users_table.get_item(Key={'userId': user_id}).get('Item', {})
+            start = parse_coordinates(user.get('coordinates'))
+        
+        stops = []
+        for stop in body.get('stops', []):
+            coords = parse_coordinates(stop)
+            if coords:
+                stop = dict(stop, lat=coords[0], lng=coords[1])
+                for field in STOP_NUMBERS:
+                    if stop.get(field) is not None:
+                        stop[field] = number(stop[field])
+                stops.append(stop)
+        if body.get('itemIds'):
+            stops.extend(item_stops(body['itemIds']))
+        
+        if not start or not stops or len(stops) > MAX_STOPS:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': f'A start location and 1-{MAX_STOPS} stops with coordinates are required'})
+            }
+        
+        result = plan_route(
+            start,
+            stops,
+            return_to_start=bool(body.get('returnToStart', False)),
+            speed_kmh=number(body.get('speedKmh', 25)),
+            time_limit=SOLVE_TIME_LIMIT
+        )
+        
+        # Carry the caller's stop details through to the ordered route
+        by_id = {stop['id']: stop for stop in stops if stop.get('id') is not None}
+        for leg in result['route']:
+            extra = by_id.get(leg['stopId'], {})
+            for field in ['title', 'sellerName']:
+                if field in extra:
+                    leg[field] = extra[field]
+        
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps(result, cls=DecimalEncoder)
+        }
+        
+    except Exception as e:
+        return error_response(e)
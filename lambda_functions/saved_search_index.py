@@ -0,0 +1,251 @@
+import math
+import re
+
+from geo import haversine_km, parse_coordinates
+
+# Reverse index for saved searches: each search is posted under the terms of
+# its most selective field, and a new item only has to be checked against
+# the searches posted under the item's own terms.
+
+GEO_CELL_DEGREES = 0.25  # roughly 28km at the equator
+# Bounds the grid cells one search is posted under (~16x16 at the limit)
+MAX_RADIUS_KM = 200
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = {'a', 'an', 'and', 'for', 'in', 'of', 'on', 'or', 'the', 'to', 'with'}
+
+# Estimated share of listings carrying a term of each kind, used to pick the
+# anchor when no catalogue statistics are supplied. Lower is more selective.
+DEFAULT_TERM_FREQUENCY = {
+    'kw': 0.02,
+    'geo': 0.05,
+    'city': 0.1,
+    'cat': 0.2
+}
+
+
+def tokenize(text):
+    return {t for t in TOKEN_RE.findall((text or '').lower()) if len(t) > 1 and t not in STOPWORDS}
+
+
+def _normalize(value):
+    return (value or '').strip().lower()
+
+
+def _to_float(value):
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _cell(lat, lng):
+    return math.floor(lat / GEO_CELL_DEGREES), math.floor(lng / GEO_CELL_DEGREES)
+
+
+def _cells_within(lat, lng, radius_km):
+    # Every grid cell overlapping the bounding box of the search circle
+    dlat = radius_km / 111.32
+    dlng = radius_km / max(1e-6, 111.32 * math.cos(math.radians(lat)))
+    lat_lo, lng_lo = _cell(lat - dlat, lng - dlng)
+    lat_hi, lng_hi = _cell(lat + dlat, lng + dlng)
+    return [('geo', (i, j)) for i in range(lat_lo, lat_hi + 1) for j in range(lng_lo, lng_hi + 1)]
+
+
+def compile_search(search):
+    center = parse_coordinates(search.get('coordinates'), allow_origin=True)
+    radius = _to_float(search.get('radiusKm'))
+    if radius is not None:
+        radius = min(radius, MAX_RADIUS_KM)
+    keywords = search.get('keywords') or []
+    if isinstance(keywords, str):
+        keywords = [keywords]
+    return {
+        'searchId': search['searchId'],
+        'userId': search.get('userId'),
+        'keywords': tokenize(' '.join(keywords)),
+        'category': _normalize(search.get('category')),
+        'city': _normalize(search.get('city')),
+        'minPrice': _to_float(search.get('minPrice')),
+        'maxPrice': _to_float(search.get('maxPrice')),
+        'center': center if radius else None,
+        'radiusKm': radius if center else None
+    }
+
+
+def has_criteria(compiled):
+    # A search without any criterion would match every new listing
+    return bool(compiled['keywords'] or compiled['category'] or compiled['city']
+                or compiled['minPrice'] is not None or compiled['maxPrice'] is not None
+                or compiled['center'])
+
+
+def compile_item(item):
+    return {
+        'tokens': tokenize(f"{item.get('title', '')} {item.get('description', '')}"),
+        'categories': {_normalize(c) for c in item.get('categories') or []},
+        'city': _normalize(item.get('city')),
+        'price': _to_float(item.get('price')),
+        'coords': parse_coordinates(item.get('coordinates'))
+    }
+
+
+def search_matches(search, fields):
+    if search['keywords'] and not search['keywords'] <= fields['tokens']:
+        return False
+    if search['category'] and search['category'] not in fields['categories']:
+        return False
+    if search['city'] and search['city'] != fields['city']:
+        return False
+    price = fields['price']
+    if search['minPrice'] is not None and (price is None or price < search['minPrice']):
+        return False
+    if search['maxPrice'] is not None and (price is None or price > search['maxPrice']):
+        return False
+    if search['center']:
+        coords = fields['coords']
+        if not coords or haversine_km(search['center'][0], search['center'][1], coords[0], coords[1]) > search['radiusKm']:
+            return False
+    return True
+
+
+class SavedSearchIndex:
+
+    def __init__(self, term_frequencies=None):
+        # term_frequencies maps ('kw', 'sofa') style terms to the share of
+        # listings carrying them, when catalogue statistics are available
+        self.term_frequencies = term_frequencies or {}
+        self._postings = {}    # term -> {searchId: compiled search}
+        self._anchors = {}     # searchId -> terms the search is posted under
+        self._unanchored = {}  # searchId -> compiled search with no indexable term
+
+    def __len__(self):
+        return len(self._anchors) + len(self._unanchored)
+
+    def _frequency(self, term):
+        return self.term_frequencies.get(term, DEFAULT_TERM_FREQUENCY[term[0]])
+
+    def _anchor_terms(self, search):
+        # Each option is a group of terms the search must be posted under;
+        # pick the group an arbitrary listing is least likely to hit
+        options = [[('kw', k)] for k in search['keywords']]
+        if search['city']:
+            options.append([('city', search['city'])])
+        if search['category']:
+            options.append([('cat', search['category'])])
+        if search['center']:
+            options.append(_cells_within(search['center'][0], search['center'][1], search['radiusKm']))
+        if not options:
+            return []
+        return min(options, key=lambda terms: sum(self._frequency(t) for t in terms))
+
+    def add(self, search):
+        compiled = compile_search(search)
+        search_id = compiled['searchId']
+        self.remove(search_id)
+        if not has_criteria(compiled):
+            raise ValueError('Saved search has no criteria')
+
+        terms = self._anchor_terms(compiled)
+        if not terms:
+            self._unanchored[search_id] = compiled
+            return
+        for term in terms:
+            self._postings.setdefault(term, {})[search_id] = compiled
+        self._anchors[search_id] = terms
+
+    def remove(self, search_id):
+        self._unanchored.pop(search_id, None)
+        for term in self._anchors.pop(search_id, []):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(search_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def candidates(self, fields):
+        terms = [('kw', t) for t in fields['tokens']]
+        terms.extend(('cat', c) for c in fields['categories'])
+        if fields['city']:
+            terms.append(('city', fields['city']))
+        if fields['coords']:
+            terms.append(('geo', _cell(*fields['coords'])))
+
+        found = dict(self._unanchored)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings:
+                found.update(postings)
+        return found.values()
+
+    def match(self, item):
+        fields = compile_item(item)
+        return [s for s in self.candidates(fields) if search_matches(s, fields)]
+
+
+if __name__ == '__main__':
+    # Benchmark matching latency:
+    #   python saved_search_index.py --searches 100000 --items 2000
+    import argparse
+    import random
+    import time
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--searches', type=int, default=100000)
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cities = {
+        'bengaluru': (12.97, 77.59), 'mumbai': (19.07, 72.87), 'delhi': (28.61, 77.21),
+        'chennai': (13.08, 80.27), 'hyderabad': (17.38, 78.48), 'pune': (18.52, 73.85)
+    }
+    categories = ['plastic', 'paper', 'metal', 'e-waste', 'glass', 'furniture', 'textile', 'other']
+    vocabulary = [f'word{i}' for i in range(5000)]
+
+    def jitter(center):
+        return {'lat': center[0] + rng.uniform(-0.2, 0.2), 'lng': center[1] + rng.uniform(-0.2, 0.2)}
+
+    index = SavedSearchIndex()
+    start = time.perf_counter()
+    for i in range(args.searches):
+        city = rng.choice(list(cities))
+        search = {'searchId': str(i), 'userId': f'user{i % 20000}'}
+        kind = rng.random()
+        if kind < 0.5:
+            search['keywords'] = rng.sample(vocabulary, rng.randint(1, 2))
+        if kind > 0.3:
+            search['category'] = rng.choice(categories)
+        if rng.random() < 0.5:
+            search['city'] = city
+        if rng.random() < 0.3:
+            search['coordinates'] = jitter(cities[city])
+            search['radiusKm'] = rng.choice([5, 10, 25])
+        if rng.random() < 0.4:
+            search['maxPrice'] = rng.choice([100, 500, 2000])
+        index.add(search)
+    build = time.perf_counter() - start
+
+    latencies = []
+    matched = 0
+    for i in range(args.items):
+        city = rng.choice(list(cities))
+        item = {
+            'title': ' '.join(rng.sample(vocabulary, 4)),
+            'description': ' '.join(rng.sample(vocabulary, 12)),
+            'categories': rng.sample(categories, rng.randint(1, 2)),
+            'city': city,
+            'price': rng.randint(0, 3000),
+            'coordinates': jitter(cities[city])
+        }
+        start = time.perf_counter()
+        matched += len(index.match(item))
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    print(f"Indexed {len(index)} saved searches in {build:.2f}s")
+    print(f"Matched {args.items} items: p50 {latencies[len(latencies) // 2] * 1e3:.3f}ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.3f}ms, "
+          f"{matched / args.items:.1f} matches per item")
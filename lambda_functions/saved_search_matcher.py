@@ -0,0 +1,96 @@
+import json
+import os
+import time
+from boto3.dynamodb.types import TypeDeserializer
+
+from saved_search_index import SavedSearchIndex
+from resilience import ResilientTable, TokenBucket, dynamodb_resource
+
+dynamodb = dynamodb_resource()
+searches_table = ResilientTable(dynamodb.Table('JunkWunk-SavedSearches'))
+matches_table = dynamodb.Table('JunkWunk-SearchMatches')
+
+# Rebuild the in-memory index from the table at most this often per container
+INDEX_TTL = int(os.environ.get('SAVED_SEARCH_INDEX_TTL', '300'))
+MATCH_TTL_DAYS = 30
+# Pace the index scan so a cold start cannot eat the table's read capacity
+page_pacer = TokenBucket(float(os.environ.get('SCAN_PAGES_PER_SECOND', '5')), 2)
+
+deserializer = TypeDeserializer()
+
+_index = None
+_loaded_at = 0
+
+
+def load_index():
+    global _index, _loaded_at
+    if _index is not None and time.time() - _loaded_at < INDEX_TTL:
+        return _index
+
+    index = SavedSearchIndex()
+    scan_kwargs = {}
+    while True:
+        page_pacer.acquire()
+        response = searches_table.scan(**scan_kwargs)
+        for search in response.get('Items', []):
+            # One malformed row must not stall the stream for everyone
+            try:
+                index.add(search)
+            except Exception as e:
+                print(f"Skipping saved search {search.get('searchId')}: {str(e)}")
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    _index = index
+    _loaded_at = time.time()
+    print(f"Loaded {len(index)} saved searches")
+    return index
+
+
+def new_items(event):
+    # Only freshly created, active listings trigger notifications
+    for record in event.get('Records', []):
+        if record.get('eventName') != 'INSERT':
+            continue
+        image = record.get('dynamodb', {}).get('NewImage')
+        if not image:
+            continue
+        item = {k: deserializer.deserialize(v) for k, v in image.items()}
+        if item.get('status', 'active') == 'active':
+            yield item
+
+
+def lambda_handler(event, context):
+    # Triggered by the JunkWunk-Items stream (NEW_IMAGE)
+    index = load_index()
+    now = int(time.time())
+    expires = now + MATCH_TTL_DAYS * 24 * 3600
+
+    items_seen = 0
+    matches_written = 0
+
+    with matches_table.batch_writer(overwrite_by_pkeys=['userId', 'matchId']) as batch:
+        for item in new_items(event):
+            items_seen += 1
+            for search in index.match(item):
+                # Don't notify sellers about their own listings
+                if search['userId'] == item.get('sellerId'):
+                    continue
+                batch.put_item(Item={
+                    'userId': search['userId'],
+                    'matchId': f"{item['itemId']}#{search['searchId']}",
+                    'searchId': search['searchId'],
+                    'itemId': item['itemId'],
+                    'title': item.get('title', ''),
+                    'price': item.get('price', 0),
+                    'city': item.get('city', ''),
+                    'imageUrl': item.get('imageUrl', ''),
+                    'createdAt': now,
+                    'notified': False,
+                    'ttl': expires
+                })
+                matches_written += 1
+
+    print(json.dumps({'items': items_seen, 'matches': matches_written}))
+    return {'items': items_seen, 'matches': matches_written}
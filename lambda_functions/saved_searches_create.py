@@ -0,0 +1,152 @@
+import json
+import math
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from saved_search_index import MAX_RADIUS_KM, compile_search, has_criteria
+from resilience import ResilientTable, dynamodb_resource, error_response, with_retry_budget
+
+dynamodb = dynamodb_resource()
+table = ResilientTable(dynamodb.Table('JunkWunk-SavedSearches'))
+
+MAX_SEARCHES_PER_USER = 20
+MAX_TEXT_LENGTH = 100
+MAX_KEYWORDS = 10
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+def number(value):
+    # JSON numbers or numeric strings; None for anything else
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return None
+    try:
+        value = float(value)
+    except ValueError:
+        return None
+    return value if math.isfinite(value) else None
+
+def validation_error(body):
+    # Every stored search is compiled by the matcher on the Items stream, so
+    # a malformed one must never reach the table
+    if not isinstance(body, dict):
+        return 'Request body must be a JSON object'
+    for field in ['name', 'category', 'city']:
+        value = body.get(field)
+        if value is not None and (not isinstance(value, str) or len(value) > MAX_TEXT_LENGTH):
+            return f'{field} must be a string of at most {MAX_TEXT_LENGTH} characters'
+    keywords = body.get('keywords')
+    if isinstance(keywords, str):
+        keywords = [keywords]
+    if keywords is not None and (not isinstance(keywords, list) or len(keywords) > MAX_KEYWORDS
+                                 or not all(isinstance(k, str) and len(k) <= MAX_TEXT_LENGTH for k in keywords)):
+        return f'keywords must be a list of at most {MAX_KEYWORDS} strings'
+    coordinates = body.get('coordinates')
+    if coordinates is not None:
+        lat = number(coordinates.get('lat')) if isinstance(coordinates, dict) else None
+        lng = number(coordinates.get('lng')) if isinstance(coordinates, dict) else None
+        if lat is None or lng is None or not -90 <= lat <= 90 or not -180 <= lng <= 180:
+            return 'coordinates must be {"lat": -90..90, "lng": -180..180}'
+    for field in ['minPrice', 'maxPrice']:
+        if body.get(field) is not None and (number(body[field]) is None or number(body[field]) < 0):
+            return f'{field} must be a non-negative number'
+    if body.get('minPrice') is not None and body.get('maxPrice') is not None \
+            and number(body['minPrice']) > number(body['maxPrice']):
+        return 'minPrice must not exceed maxPrice'
+    if body.get('radiusKm') is not None:
+        radius = number(body['radiusKm'])
+        if radius is None or not 0 < radius <= MAX_RADIUS_KM:
+            return f'radiusKm must be between 0 and {MAX_RADIUS_KM}'
+    if (coordinates is None) != (body.get('radiusKm') is None):
+        return 'coordinates and radiusKm must be given together'
+    return None
+
+@with_retry_budget
+def lambda_handler(event, context):
+    try:
+        # Get userId from Cognito
+        user_id = event.get('requestContext', {}).get('authorizer', {}).get('claims', {}).get('sub')
+        
+        if not user_id:
+            return {
+                'statusCode': 401,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': 'Unauthorized'})
+            }
+        
+        body = json.loads(event.get('body') or '{}')
+        error = validation_error(body)
+        if error:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': error})
+            }
+        
+        search = {
+            'userId': user_id,
+            'searchId': str(uuid.uuid4()),
+            'name': body.get('name', ''),
+            'createdAt': int(datetime.now().timestamp())
+        }
+        
+        # Copy only the fields the matcher understands
+        for field in ['category', 'city', 'keywords']:
+            if body.get(field):
+                search[field] = body[field]
+        for field in ['minPrice', 'maxPrice', 'radiusKm']:
+            if body.get(field) is not None:
+                search[field] = Decimal(str(number(body[field])))
+        if body.get('coordinates') is not None:
+            search['coordinates'] = {k: Decimal(str(number(body['coordinates'][k]))) for k in ['lat', 'lng']}
+        
+        # Judged on what the matcher will see, e.g. keywords made only of
+        # stopwords count for nothing
+        if not has_criteria(compile_search(search)):
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': 'At least one search criterion is required'})
+            }
+        
+        existing = table.query(
+            KeyConditionExpression='userId = :userId',
+            ExpressionAttributeValues={':userId': user_id},
+            Select='COUNT'
+        )
+        if existing.get('Count', 0) >= MAX_SEARCHES_PER_USER:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': f'Saved search limit of {MAX_SEARCHES_PER_USER} reached'})
+            }
+        
+        table.put_item(Item=search)
+        
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps(search, cls=DecimalEncoder)
+        }
+        
+    except Exception as e:
+        return error_response(e)
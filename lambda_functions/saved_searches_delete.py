@@ -0,0 +1,49 @@
+import json
+
+from resilience import ResilientTable, dynamodb_resource, error_response, with_retry_budget
+
+dynamodb = dynamodb_resource()
+table = ResilientTable(dynamodb.Table('JunkWunk-SavedSearches'))
+
+@with_retry_budget
+def lambda_handler(event, context):
+    try:
+        # Get userId from Cognito
+        user_id = event.get('requestContext', {}).get('authorizer', {}).get('claims', {}).get('sub')
+        
+        if not user_id:
+            return {
+                'statusCode': 401,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': 'Unauthorized'})
+            }
+        
+        search_id = (event.get('pathParameters') or {}).get('searchId')
+        
+        if not search_id:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': 'searchId is required'})
+            }
+        
+        # Keyed by userId, so users can only delete their own searches
+        table.delete_item(Key={'userId': user_id, 'searchId': search_id})
+        
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'message': 'Saved search deleted successfully'})
+        }
+        
+    except Exception as e:
+        return error_response(e)
@@ -0,0 +1,57 @@
+import json
+from decimal import Decimal
+from boto3.dynamodb.conditions import Key
+
+from resilience import ResilientTable, dynamodb_resource, error_response, with_retry_budget
+
+dynamodb = dynamodb_resource()
+searches_table = ResilientTable(dynamodb.Table('JunkWunk-SavedSearches'))
+matches_table = ResilientTable(dynamodb.Table('JunkWunk-SearchMatches'))
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+@with_retry_budget
+def lambda_handler(event, context):
+    try:
+        # Get userId from Cognito
+        user_id = event.get('requestContext', {}).get('authorizer', {}).get('claims', {}).get('sub')
+        
+        if not user_id:
+            return {
+                'statusCode': 401,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'error': 'Unauthorized'})
+            }
+        
+        searches = searches_table.query(
+            KeyConditionExpression=Key('userId').eq(user_id)
+        ).get('Items', [])
+        
+        # Recent matches from the outbox written by saved_search_matcher
+        matches = matches_table.query(
+            KeyConditionExpression=Key('userId').eq(user_id)
+        ).get('Items', [])
+        matches.sort(key=lambda x: x.get('createdAt', 0), reverse=True)
+        
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({
+                'searches': searches,
+                'matches': matches,
+                'count': len(searches)
+            }, cls=DecimalEncoder)
+        }
+        
+    except Exception as e:
+        return error_response(e)
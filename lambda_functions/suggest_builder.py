@@ -0,0 +1,56 @@
+import json
+import os
+import time
+import boto3
+from boto3.dynamodb.conditions import Key
+
+from suggest_index import build, collect_phrases
+from resilience import ResilientTable, TokenBucket, dynamodb_resource
+
+ARTIFACT_BUCKET = os.environ.get('ARTIFACT_BUCKET', 'junkwunk-images-ap-south-1')
+ARTIFACT_KEY = os.environ.get('SUGGEST_ARTIFACT_KEY', 'artifacts/suggest/index.bin')
+
+dynamodb = dynamodb_resource()
+items_table = ResilientTable(dynamodb.Table('JunkWunk-Items'))
+s3 = boto3.client('s3', region_name='ap-south-1')
+
+# The rebuild reads the whole StatusIndex; pace it so it cannot starve
+# the request path of read capacity
+page_pacer = TokenBucket(float(os.environ.get('SCAN_PAGES_PER_SECOND', '5')), 2)
+
+
+def active_items():
+    query_kwargs = {
+        'IndexName': 'StatusIndex',
+        'KeyConditionExpression': Key('status').eq('active'),
+        'ProjectionExpression': 'title, categories'
+    }
+    while True:
+        page_pacer.acquire()
+        response = items_table.query(**query_kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def lambda_handler(event, context):
+    # Scheduled rebuild; items_suggest picks the new artifact up by ETag
+    start = time.time()
+    phrases = collect_phrases(active_items())
+    artifact = build(phrases)
+
+    s3.put_object(
+        Bucket=ARTIFACT_BUCKET,
+        Key=ARTIFACT_KEY,
+        Body=artifact,
+        ContentType='application/octet-stream'
+    )
+
+    summary = {
+        'phrases': len(phrases),
+        'bytes': len(artifact),
+        'seconds': round(time.time() - start, 2)
+    }
+    print(json.dumps(summary))
+    return summary
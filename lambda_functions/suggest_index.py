@@ -0,0 +1,250 @@
+import mmap
+import re
+import struct
+from array import array
+
+# Compact, memory-mappable autocomplete artifact. Phrases (titles, categories
+# and title words) are stored sorted by their UTF-8 bytes with a weight per
+# phrase; every prefix up to max_prefix_len characters has its top-k phrase
+# indices precomputed, and longer prefixes fall back to a range scan.
+#
+# Layout (little endian, 4-byte aligned sections):
+#   header | entry offsets (n+1) | weights (n) | kinds (n, padded)
+#   | prefix offsets (p+1) | prefix top-k indices (p*k) | entry blob | prefix blob
+
+MAGIC = b'JWSG'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIIIII')
+NO_ENTRY = 0xFFFFFFFF
+
+TOP_K = 10
+MAX_PREFIX_LEN = 6
+MIN_TERM_LEN = 3
+# A long prefix only ever matches a handful of phrases; cap the fallback scan
+MAX_RANGE_SCAN = 5000
+
+KINDS = ['title', 'category', 'term']
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def normalize(text):
+    return ' '.join(TOKEN_RE.findall((text or '').lower()))
+
+
+def collect_phrases(items):
+    # phrase -> [weight, kind]; weight is the number of active listings the
+    # phrase would find, and the kind with the most listings wins
+    counts = {}
+    for item in items:
+        title = normalize(item.get('title'))
+        found = {}
+        if title:
+            found[title] = 'title'
+        for category in item.get('categories') or []:
+            category = normalize(category)
+            if category:
+                found.setdefault(category, 'category')
+        for word in title.split():
+            if len(word) >= MIN_TERM_LEN:
+                found.setdefault(word, 'term')
+        for phrase, kind in found.items():
+            per_kind = counts.setdefault(phrase, {})
+            per_kind[kind] = per_kind.get(kind, 0) + 1
+
+    phrases = {}
+    for phrase, per_kind in counts.items():
+        kind = max(per_kind, key=lambda k: (per_kind[k], -KINDS.index(k)))
+        phrases[phrase] = (per_kind[kind], kind)
+    return phrases
+
+
+def _pad(data):
+    return data + b'\0' * (-len(data) % 4)
+
+
+def build(phrases, k=TOP_K, max_prefix_len=MAX_PREFIX_LEN):
+    entries = sorted((p.encode('utf-8'), p) for p in phrases)
+    n = len(entries)
+    weights = array('I', (min(phrases[p][0], NO_ENTRY - 1) for _, p in entries))
+    kinds = bytes(KINDS.index(phrases[p][1]) for _, p in entries)
+
+    # Visiting phrases heaviest first, each prefix keeps the first k it sees
+    order = sorted(range(n), key=lambda i: (-weights[i], entries[i][0]))
+    tops = {}
+    for i in order:
+        phrase = entries[i][1]
+        for length in range(1, min(len(phrase), max_prefix_len) + 1):
+            top = tops.setdefault(phrase[:length].encode('utf-8'), [])
+            if len(top) < k:
+                top.append(i)
+
+    prefixes = sorted(tops)
+    p = len(prefixes)
+
+    entry_offsets = array('I', [0])
+    for encoded, _ in entries:
+        entry_offsets.append(entry_offsets[-1] + len(encoded))
+    prefix_offsets = array('I', [0])
+    for prefix in prefixes:
+        prefix_offsets.append(prefix_offsets[-1] + len(prefix))
+    top_indices = array('I')
+    for prefix in prefixes:
+        top = tops[prefix]
+        top_indices.extend(top + [NO_ENTRY] * (k - len(top)))
+
+    entry_blob = b''.join(encoded for encoded, _ in entries)
+    prefix_blob = b''.join(prefixes)
+
+    for arr in (weights, entry_offsets, prefix_offsets, top_indices):
+        if arr.itemsize != 4:
+            raise RuntimeError('array("I") must be 32-bit on this platform')
+
+    return b''.join([
+        HEADER.pack(MAGIC, VERSION, n, p, k, max_prefix_len, len(entry_blob), len(prefix_blob)),
+        entry_offsets.tobytes(),
+        weights.tobytes(),
+        _pad(kinds),
+        prefix_offsets.tobytes(),
+        top_indices.tobytes(),
+        entry_blob,
+        prefix_blob
+    ])
+
+
+class SuggestIndex:
+
+    def __init__(self, buf):
+        magic, version, n, p, k, max_prefix_len, entry_blob_len, prefix_blob_len = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Not a suggestion artifact')
+
+        self._buf = buf
+        self.entries = n
+        self.prefixes = p
+        self.k = k
+        self.max_prefix_len = max_prefix_len
+
+        view = memoryview(buf)
+        pos = HEADER.size
+
+        def take(length):
+            nonlocal pos
+            section = view[pos:pos + length]
+            pos += length
+            return section
+
+        self._entry_offsets = take(4 * (n + 1)).cast('I')
+        self._weights = take(4 * n).cast('I')
+        self._kinds = take(n + (-n % 4))
+        self._prefix_offsets = take(4 * (p + 1)).cast('I')
+        self._tops = take(4 * p * k).cast('I')
+        self._entry_blob = take(entry_blob_len)
+        self._prefix_blob = take(prefix_blob_len)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def _entry(self, i):
+        return bytes(self._entry_blob[self._entry_offsets[i]:self._entry_offsets[i + 1]])
+
+    def _prefix(self, j):
+        return bytes(self._prefix_blob[self._prefix_offsets[j]:self._prefix_offsets[j + 1]])
+
+    @staticmethod
+    def _lower_bound(count, key, target):
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if key(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _result(self, i):
+        return {
+            'text': self._entry(i).decode('utf-8'),
+            'kind': KINDS[self._kinds[i]],
+            'count': self._weights[i]
+        }
+
+    def suggest(self, query, limit=None):
+        limit = min(limit or self.k, self.k)
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        encoded = prefix.encode('utf-8')
+
+        if len(prefix) <= self.max_prefix_len:
+            j = self._lower_bound(self.prefixes, self._prefix, encoded)
+            if j == self.prefixes or self._prefix(j) != encoded:
+                return []
+            top = self._tops[j * self.k:j * self.k + limit]
+            return [self._result(i) for i in top if i != NO_ENTRY]
+
+        # 0xFF never occurs in UTF-8, so it bounds every phrase with this prefix
+        lo = self._lower_bound(self.entries, self._entry, encoded)
+        hi = self._lower_bound(self.entries, self._entry, encoded + b'\xff')
+        candidates = range(lo, min(hi, lo + MAX_RANGE_SCAN))
+        top = sorted(candidates, key=lambda i: -self._weights[i])[:limit]
+        return [self._result(i) for i in top]
+
+
+if __name__ == '__main__':
+    # Benchmark build size and lookup latency:
+    #   python suggest_index.py --titles 100000
+    import argparse
+    import os
+    import random
+    import tempfile
+    import time
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    syllables = ['ka', 'lo', 'mi', 'ra', 'te', 'su', 'no', 'vi', 'de', 'pa', 'shi', 'zen']
+    vocabulary = [''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(8000)]
+    categories = ['Plastic', 'Paper', 'Metal', 'E-Waste', 'Glass', 'Furniture', 'Textile', 'Other']
+    items = [
+        {
+            'title': ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 4))),
+            'categories': rng.sample(categories, rng.randint(1, 2))
+        }
+        for _ in range(args.titles)
+    ]
+
+    start = time.perf_counter()
+    artifact = build(collect_phrases(items))
+    build_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'suggest.bin')
+        with open(path, 'wb') as f:
+            f.write(artifact)
+
+        start = time.perf_counter()
+        index = SuggestIndex.open(path)
+        open_time = time.perf_counter() - start
+
+        queries = []
+        for _ in range(args.queries):
+            title = normalize(rng.choice(items)['title'])
+            queries.append(title[:rng.randint(1, len(title))])
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            index.suggest(query)
+            latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    print(f"Built {index.entries} phrases / {index.prefixes} prefixes from {args.titles} titles "
+          f"in {build_time:.2f}s ({len(artifact) / 1e6:.1f} MB), opened in {open_time * 1e3:.2f}ms")
+    print(f"{args.queries} lookups: p50 {latencies[len(latencies) // 2] * 1e3:.3f}ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.3f}ms")
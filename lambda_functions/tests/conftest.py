@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import resilience  # noqa: E402
+from local_stores import LocalDynamoDB  # noqa: E402
+
+# Handlers build their tables at import time; point them at an in-memory
+# stand-in so importing them never reaches AWS. Tests swap in fresh tables.
+resilience._dynamodb = LocalDynamoDB()
+for name, hash_key in (('JunkWunk-Idempotency', 'idempotencyKey'),
+                       ('JunkWunk-Users', 'userId'),
+                       ('JunkWunk-TrendingCounters', 'counterId'),
+                       ('JunkWunk-Items', 'itemId'),
+                       ('JunkWunk-Purchases', 'purchaseId'),
+                       ('JunkWunk-Orders', 'orderId')):
+    resilience._dynamodb.create_table(name, hash_key)
+resilience._dynamodb.create_table('JunkWunk-SavedSearches', 'userId', 'searchId')
+resilience._dynamodb.create_table('JunkWunk-Cart', 'userId', 'itemId')
+
+
+@pytest.fixture
+def local_dynamodb():
+    return LocalDynamoDB()
@@ -0,0 +1,87 @@
+import pytest
+
+import artifacts
+from artifacts import ArtifactLoader
+from local_stores import LocalObjectStore
+
+KEY = 'artifacts/test/index.bin'
+
+
+class FlakyStore(LocalObjectStore):
+    failing = False
+
+    def head_object(self, Bucket, Key):
+        if self.failing:
+            raise ConnectionError('S3 unavailable')
+        return super().head_object(Bucket, Key)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = FlakyStore(str(tmp_path / 's3'))
+    monkeypatch.setattr(artifacts, 's3', store)
+    return store
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def make_loader(tmp_path, opened):
+    def opener(path):
+        opened.append(path)
+        return read(path)
+    return ArtifactLoader(KEY, str(tmp_path / 'index.bin'), opener, refresh_interval=0)
+
+
+def test_rebuilt_artifact_is_picked_up_by_etag(store, tmp_path):
+    opened = []
+    loader = make_loader(tmp_path, opened)
+    store.put_object(Bucket=artifacts.ARTIFACT_BUCKET, Key=KEY, Body=b'v1')
+
+    assert loader.get() == b'v1'
+    assert loader.get() == b'v1'
+    assert len(opened) == 1
+
+    store.put_object(Bucket=artifacts.ARTIFACT_BUCKET, Key=KEY, Body=b'v2')
+    assert loader.get() == b'v2'
+    assert len(opened) == 2
+
+
+def test_failed_refresh_serves_the_loaded_artifact(store, tmp_path):
+    loader = make_loader(tmp_path, [])
+    store.put_object(Bucket=artifacts.ARTIFACT_BUCKET, Key=KEY, Body=b'v1')
+    loader.get()
+
+    store.failing = True
+    assert loader.get() == b'v1'
+
+    store.failing = False
+    store.put_object(Bucket=artifacts.ARTIFACT_BUCKET, Key=KEY, Body=b'v2')
+    assert loader.get() == b'v2'
+
+
+def test_failed_first_load_raises(store, tmp_path):
+    loader = make_loader(tmp_path, [])
+    store.failing = True
+
+    with pytest.raises(ConnectionError):
+        loader.get()
+
+
+def test_suggest_serves_stale_index_when_refresh_fails(store, tmp_path, monkeypatch):
+    import items_suggest
+    from suggest_index import build, collect_phrases
+    loader = ArtifactLoader(KEY, str(tmp_path / 'suggest.bin'), items_suggest.SuggestIndex.open, refresh_interval=0)
+    monkeypatch.setattr(items_suggest, 'index_loader', loader)
+    store.put_object(Bucket=artifacts.ARTIFACT_BUCKET, Key=KEY,
+                     Body=build(collect_phrases([{'title': 'Oak bookshelf', 'categories': ['furniture']}])))
+    event = {'queryStringParameters': {'q': 'oak'}}
+
+    assert items_suggest.lambda_handler(event, None)['statusCode'] == 200
+    store.failing = True
+    response = items_suggest.lambda_handler(event, None)
+
+    assert response['statusCode'] == 200
+    assert 'oak bookshelf' in response['body']
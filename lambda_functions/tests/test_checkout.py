@@ -0,0 +1,74 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+import cart_add
+import cart_checkout
+import checkout_worker
+import idempotency
+import trending
+from local_stores import LocalQueue
+from resilience import ResilientTable
+
+
+@pytest.fixture
+def shop(local_dynamodb, monkeypatch):
+    stream = LocalQueue(max_attempts=3)
+    tables = {
+        'items': local_dynamodb.create_table('JunkWunk-Items', 'itemId'),
+        'cart': local_dynamodb.create_table('JunkWunk-Cart', 'userId', 'itemId'),
+        'purchases': local_dynamodb.create_table('JunkWunk-Purchases', 'purchaseId'),
+        'orders': local_dynamodb.create_table('JunkWunk-Orders', 'orderId', stream=stream),
+        'counters': local_dynamodb.create_table('JunkWunk-TrendingCounters', 'counterId'),
+        'idempotency': local_dynamodb.create_table('JunkWunk-Idempotency', 'idempotencyKey')
+    }
+    for module in (cart_add, cart_checkout, checkout_worker, idempotency):
+        monkeypatch.setattr(module, 'dynamodb', local_dynamodb)
+    monkeypatch.setattr(cart_add, 'cart_table', ResilientTable(tables['cart']))
+    monkeypatch.setattr(cart_add, 'items_table', ResilientTable(tables['items']))
+    monkeypatch.setattr(cart_checkout, 'cart_table', ResilientTable(tables['cart']))
+    monkeypatch.setattr(checkout_worker, 'cart_table', ResilientTable(tables['cart']))
+    monkeypatch.setattr(checkout_worker, 'items_table', ResilientTable(tables['items']))
+    monkeypatch.setattr(checkout_worker, 'purchases_table', tables['purchases'])
+    monkeypatch.setattr(checkout_worker, 'orders_table', ResilientTable(tables['orders']))
+    monkeypatch.setattr(idempotency, 'table', ResilientTable(tables['idempotency']))
+    monkeypatch.setattr(trending, 'counters_table', ResilientTable(tables['counters']))
+    for item_id in ('lamp', 'desk'):
+        tables['items'].items[(item_id,)] = {'itemId': item_id, 'status': 'active', 'quantity': 10,
+                                              'sellerId': 'seller-1', 'title': item_id, 'price': Decimal(5)}
+    tables['stream'] = stream
+    return tables
+
+
+def event(body):
+    return {'requestContext': {'authorizer': {'claims': {'sub': 'user-1'}}}, 'body': json.dumps(body)}
+
+
+def add(item_id, quantity=1):
+    return cart_add.lambda_handler(event({'itemId': item_id, 'sellerId': 'seller-1', 'quantity': quantity}), None)
+
+
+def test_item_added_again_during_checkout_stays_in_the_cart(shop):
+    add('lamp')
+    add('desk')
+    response = cart_checkout.lambda_handler(event({'itemIds': ['lamp', 'desk']}), None)
+    assert response['statusCode'] == 200
+
+    assert add('lamp', 2)['statusCode'] == 200
+    shop['stream'].deliver(checkout_worker.lambda_handler, batch_size=10)
+
+    assert list(shop['cart'].items) == [('user-1', 'lamp')]
+    line = shop['cart'].items[('user-1', 'lamp')]
+    assert line['quantity'] == 2
+    assert 'checkoutOrderId' not in line
+    assert len(shop['purchases'].items) == 2
+
+
+def test_checked_out_lines_are_cleared(shop):
+    add('lamp')
+    cart_checkout.lambda_handler(event({'itemIds': ['lamp']}), None)
+    shop['stream'].deliver(checkout_worker.lambda_handler, batch_size=10)
+
+    assert shop['cart'].items == {}
+    assert all(order['status'] == 'completed' for order in shop['orders'].items.values())
@@ -0,0 +1,174 @@
+import json
+import time
+
+import pytest
+
+import idempotency
+from local_stores import FaultInjectingTable
+from resilience import ResilientTable
+
+
+@pytest.fixture
+def store(local_dynamodb, monkeypatch):
+    table = local_dynamodb.create_table('JunkWunk-Idempotency', 'idempotencyKey')
+    monkeypatch.setattr(idempotency, 'dynamodb', local_dynamodb)
+    monkeypatch.setattr(idempotency, 'table', ResilientTable(table))
+    return table
+
+
+def make_event(key='key-1', body=None, user_id='user-1'):
+    return {
+        'httpMethod': 'POST',
+        'headers': {'Idempotency-Key': key} if key else {},
+        'body': json.dumps(body if body is not None else {'itemId': 'item-1'}),
+        'requestContext': {'authorizer': {'claims': {'sub': user_id}}}
+    }
+
+
+def counting_handler(*responses):
+    calls = []
+
+    def handler(event, context):
+        calls.append(event)
+        return responses[min(len(calls), len(responses)) - 1]
+    return idempotency.idempotent('test')(handler), calls
+
+
+def created(order_id='order-1'):
+    return {'statusCode': 201, 'headers': {'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'orderId': order_id})}
+
+
+def test_completed_response_is_replayed(store):
+    handler, calls = counting_handler(created('order-1'), created('order-2'))
+
+    first = handler(make_event(), None)
+    second = handler(make_event(), None)
+
+    assert len(calls) == 1
+    assert json.loads(second['body']) == {'orderId': 'order-1'}
+    assert second['statusCode'] == 201
+    assert second['headers']['Idempotent-Replayed'] == 'true'
+    assert 'Idempotent-Replayed' not in first['headers']
+
+
+def test_keys_are_scoped_per_user(store):
+    handler, calls = counting_handler(created())
+
+    handler(make_event(user_id='user-1'), None)
+    handler(make_event(user_id='user-2'), None)
+
+    assert len(calls) == 2
+
+
+def test_reused_key_with_different_payload_is_rejected(store):
+    handler, calls = counting_handler(created())
+
+    handler(make_event(body={'itemId': 'item-1'}), None)
+    response = handler(make_event(body={'itemId': 'item-2'}), None)
+
+    assert response['statusCode'] == 422
+    assert len(calls) == 1
+
+
+def test_request_in_progress_gets_409(store):
+    seen = []
+
+    @idempotency.idempotent('test')
+    def handler(event, context):
+        if not seen:
+            seen.append(handler(make_event(), None))
+        return created()
+
+    handler(make_event(), None)
+
+    assert seen[0]['statusCode'] == 409
+    assert seen[0]['headers']['Retry-After'] == '1'
+
+
+@pytest.mark.parametrize('status_code', [429, 500, 503])
+def test_key_is_released_after_retryable_response(store, status_code):
+    handler, calls = counting_handler({'statusCode': status_code, 'body': '{}'}, created())
+
+    first = handler(make_event(), None)
+    second = handler(make_event(), None)
+
+    assert first['statusCode'] == status_code
+    assert second['statusCode'] == 201
+    assert len(calls) == 2
+    assert json.loads(store.items[('test#user-1#key-1',)]['response'])['statusCode'] == 201
+
+
+def test_key_is_released_when_handler_raises(store):
+    calls = []
+
+    @idempotency.idempotent('test')
+    def handler(event, context):
+        calls.append(event)
+        if len(calls) == 1:
+            raise RuntimeError('boom')
+        return created()
+
+    with pytest.raises(RuntimeError):
+        handler(make_event(), None)
+
+    assert handler(make_event(), None)['statusCode'] == 201
+    assert len(calls) == 2
+
+
+def test_client_errors_are_stored(store):
+    handler, calls = counting_handler({'statusCode': 400, 'body': '{"error": "bad"}'}, created())
+
+    handler(make_event(), None)
+    response = handler(make_event(), None)
+
+    assert response['statusCode'] == 400
+    assert len(calls) == 1
+
+
+def failing_updates(store, monkeypatch, should_fail):
+    faulty = FaultInjectingTable(store, throttle_rate=0.0)
+    monkeypatch.setattr(idempotency, 'table', faulty)
+
+    def update_item(**kwargs):
+        if should_fail(kwargs):
+            raise RuntimeError('store unavailable')
+        return store.update_item(**kwargs)
+    monkeypatch.setattr(faulty, 'update_item', update_item, raising=False)
+
+
+def test_key_stays_locked_when_response_cannot_be_stored(store, monkeypatch):
+    failing_updates(store, monkeypatch, lambda kwargs: ':completed' in kwargs['ExpressionAttributeValues'])
+    handler, calls = counting_handler(created())
+
+    response = handler(make_event(), None)
+
+    assert response['statusCode'] == 201
+    assert len(calls) == 1
+    # Past LOCK_TTL a retry still must not run the handler again
+    later = time.time() + idempotency.LOCK_TTL + 60
+    monkeypatch.setattr(idempotency.time, 'time', lambda: later)
+    assert handler(make_event(), None)['statusCode'] == 409
+    assert len(calls) == 1
+
+
+def test_response_is_returned_when_store_fails_entirely(store, monkeypatch):
+    failing_updates(store, monkeypatch, lambda kwargs: True)
+    handler, calls = counting_handler(created())
+
+    response = handler(make_event(), None)
+
+    assert response['statusCode'] == 201
+    assert len(calls) == 1
+    assert handler(make_event(), None)['statusCode'] == 409
+    assert len(calls) == 1
+
+
+def test_requests_without_key_run_directly(store):
+    handler, calls = counting_handler(created())
+
+    handler(make_event(key=None), None)
+    handler(make_event(key=None), None)
+
+    assert len(calls) == 2
+    assert store.items == {}
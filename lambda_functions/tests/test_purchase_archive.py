@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+import purchase_archive
+import purchase_archiver
+from local_stores import LocalObjectStore
+from resilience import ResilientTable
+
+
+class DeniedStore(LocalObjectStore):
+    def get_object(self, Bucket, Key):
+        raise PermissionError('AccessDenied')
+
+
+@pytest.fixture
+def archive(tmp_path, local_dynamodb, monkeypatch):
+    store = LocalObjectStore(str(tmp_path / 's3'))
+    table = local_dynamodb.create_table('JunkWunk-Purchases', 'purchaseId')
+    monkeypatch.setattr(purchase_archive, 's3', store)
+    monkeypatch.setattr(purchase_archive, '_manifest', None)
+    monkeypatch.setattr(purchase_archiver, 'dynamodb', local_dynamodb)
+    monkeypatch.setattr(purchase_archiver, 'purchases_table', ResilientTable(table))
+    old = purchase_archive.hot_horizon() - 24 * 3600
+    for n in range(30):
+        table.items[(f'p-{n}',)] = {'purchaseId': f'p-{n}', 'userId': f'user-{n % 3}',
+                                     'timestamp': old if n % 2 else int(time.time())}
+    return store, table
+
+
+def test_unreadable_manifest_falls_back_to_the_hot_table(tmp_path, monkeypatch):
+    monkeypatch.setattr(purchase_archive, 's3', DeniedStore(str(tmp_path)))
+    monkeypatch.setattr(purchase_archive, '_manifest', None)
+
+    assert purchase_archive.load_manifest() == purchase_archive.empty_manifest()
+
+
+def test_unreadable_manifest_keeps_the_last_one_read(archive, tmp_path, monkeypatch):
+    purchase_archiver.lambda_handler({}, None)
+    manifest = purchase_archive.load_manifest(now=0)
+    monkeypatch.setattr(purchase_archive, 's3', DeniedStore(str(tmp_path)))
+
+    assert purchase_archive.load_manifest(now=purchase_archive.MANIFEST_TTL) is manifest
+
+
+def test_archiver_never_overwrites_an_unreadable_manifest(archive, tmp_path, monkeypatch):
+    monkeypatch.setattr(purchase_archive, 's3', DeniedStore(str(tmp_path)))
+
+    with pytest.raises(PermissionError):
+        purchase_archiver.lambda_handler({}, None)
+
+
+def test_rows_are_deleted_by_a_later_run(archive, monkeypatch):
+    store, table = archive
+
+    first = purchase_archiver.lambda_handler({}, None)
+    assert first['archived'] == 15
+    assert len(table.items) == 30
+
+    # Too soon: readers may still hold the manifest without these parts
+    assert purchase_archiver.lambda_handler({}, None)['deleted'] == 0
+    assert len(table.items) == 30
+
+    monkeypatch.setattr(purchase_archive, 'MANIFEST_TTL', 0)
+    second = purchase_archiver.lambda_handler({}, None)
+    assert second['deleted'] == 15
+    assert second['archived'] == 0
+    assert len(table.items) == 15
+    manifest = purchase_archive.read_manifest()
+    assert not any(part.get('pending') for part in manifest['parts'])
+    archived = purchase_archive.archived_purchases('user-1', 0, int(time.time()))
+    assert sorted(p['purchaseId'] for p in archived) == sorted(f'p-{n}' for n in range(1, 30, 2) if n % 3 == 1)
@@ -0,0 +1,272 @@
+import json
+import time
+from binascii import crc32
+
+import pytest
+from botocore.exceptions import ChecksumError, EndpointConnectionError, ReadTimeoutError
+
+import resilience
+from local_stores import FaultInjectingTable, LocalDynamoDB, _client_error
+from resilience import (Overloaded, ResilientTable, RetryBudget, TokenBucket, batch_get_all,
+                        batch_write_all, error_response, with_retry_budget)
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(resilience, 'BASE_DELAY', 0.0001)
+    monkeypatch.setattr(resilience, 'MAX_DELAY', 0.001)
+    monkeypatch.setattr(resilience, 'retry_quota', TokenBucket(0, resilience.RETRY_QUOTA))
+
+
+def throttled_table(throttle_rate):
+    table = LocalDynamoDB().create_table('Bench', 'id')
+    return FaultInjectingTable(table, throttle_rate=throttle_rate, seed=3)
+
+
+def put_handler(table):
+    target = ResilientTable(table)
+
+    @with_retry_budget
+    def handler(event, context):
+        try:
+            target.put_item(Item={'id': event['id']})
+            return {'statusCode': 200}
+        except Exception as e:
+            return error_response(e)
+    return handler
+
+
+def test_throttle_becomes_429_with_retry_after():
+    response = error_response(_client_error('ProvisionedThroughputExceededException', 'PutItem'))
+
+    assert response['statusCode'] == 429
+    low, high = resilience.RETRY_AFTER_SECONDS
+    assert low <= int(response['headers']['Retry-After']) <= high
+    assert 'Throughput' not in response['body']
+
+
+def test_other_errors_stay_500_without_details():
+    response = error_response(ValueError('table JunkWunk-Users is missing'))
+
+    assert response['statusCode'] == 500
+    assert 'Retry-After' not in response['headers']
+    assert 'JunkWunk-Users' not in response['body']
+
+
+def test_failed_condition_in_transaction_is_not_a_throttle():
+    conflict = _client_error('TransactionCanceledException', 'TransactWriteItems',
+                             CancellationReasons=[{'Code': 'None'}, {'Code': 'TransactionConflict'}])
+    sold_out = _client_error('TransactionCanceledException', 'TransactWriteItems',
+                             CancellationReasons=[{'Code': 'ConditionalCheckFailed'}, {'Code': 'ThrottlingError'}])
+
+    assert resilience.is_throttle(conflict)
+    assert not resilience.is_throttle(sold_out)
+
+
+def test_throttled_calls_are_retried_within_the_budget():
+    table = throttled_table(0.5)
+    handler = put_handler(table)
+
+    statuses = [handler({'id': str(i)}, None)['statusCode'] for i in range(50)]
+
+    assert statuses == [200] * 50
+    assert table.throttled > 0
+    assert len(table.table.items) == 50
+
+
+def test_exhausted_budget_is_shed_with_429():
+    table = throttled_table(1.0)
+
+    response = put_handler(table)({'id': 'a'}, None)
+
+    assert response['statusCode'] == 429
+    assert 'Retry-After' in response['headers']
+    assert table.attempts == resilience.MAX_RETRIES_PER_INVOCATION + 1
+
+
+def test_overloaded_outside_the_handler_try_is_shed():
+    @with_retry_budget
+    def handler(event, context):
+        resilience.current_budget().wait(0)
+        raise Overloaded('Retry budget exhausted')
+
+    assert handler({}, None)['statusCode'] == 429
+
+
+def test_budget_stops_before_the_lambda_deadline():
+    class Context:
+        def get_remaining_time_in_millis(self):
+            return 1000
+
+    budget = RetryBudget.for_context(Context())
+
+    with pytest.raises(Overloaded):
+        budget.wait(0)
+
+
+def test_retry_quota_sheds_once_spent_and_refills_only_on_success(monkeypatch):
+    quota = TokenBucket(0, resilience.RETRY_COST * 2)
+    monkeypatch.setattr(resilience, 'retry_quota', quota)
+    table = throttled_table(1.0)
+
+    response = put_handler(table)({'id': 'a'}, None)
+
+    assert response['statusCode'] == 429
+    assert table.attempts == 3
+    time.sleep(0.01)
+    assert not quota.try_acquire(1)
+    table.throttle_rate = 0.0
+    for i in range(resilience.RETRY_COST):
+        put_handler(table)({'id': str(i)}, None)
+    assert quota.tokens >= resilience.RETRY_COST
+
+
+@pytest.mark.parametrize('error', [
+    EndpointConnectionError(endpoint_url='https://dynamodb.ap-south-1.amazonaws.com'),
+    ReadTimeoutError(endpoint_url='https://dynamodb.ap-south-1.amazonaws.com'),
+    ChecksumError(checksum_type='crc32', expected_checksum='1', actual_checksum='2')
+])
+def test_transient_errors_are_retried(error):
+    calls = []
+
+    def put_item(**kwargs):
+        calls.append(kwargs)
+        if len(calls) < 3:
+            raise error
+        return {}
+
+    assert RetryBudget().call(put_item, Item={'id': 'a'}) == {}
+    assert len(calls) == 3
+
+
+def test_corrupted_response_fails_the_checksum():
+    class Response:
+        headers = {'x-amz-crc32': str(crc32(b'{"Item": {}}'))}
+        content = b'{"Item": {"id": {"S": "a"}}}'
+
+    with pytest.raises(ChecksumError):
+        resilience.verify_crc32(Response())
+    Response.content = b'{"Item": {}}'
+    resilience.verify_crc32(Response())
+
+
+def test_batch_write_retries_unprocessed_items():
+    dynamodb = LocalDynamoDB(unprocessed_rate=0.5, seed=5)
+    table = dynamodb.create_table('Items', 'id')
+    requests = [{'PutRequest': {'Item': {'id': str(i)}}} for i in range(25)]
+
+    with_retry_budget(lambda event, context: batch_write_all(dynamodb, {'Items': requests}))({}, None)
+
+    assert len(table.items) == 25
+    assert dynamodb.calls['BatchWriteItem'] > 1
+
+
+def test_batch_get_retries_unprocessed_keys():
+    dynamodb = LocalDynamoDB(unprocessed_rate=0.5, seed=5)
+    table = dynamodb.create_table('Items', 'id')
+    for i in range(25):
+        table.put_item(Item={'id': str(i)})
+
+    found = with_retry_budget(
+        lambda event, context: batch_get_all(dynamodb, {'Items': {'Keys': [{'id': str(i)} for i in range(25)]}})
+    )({}, None)
+
+    assert sorted(item['id'] for item in found['Items']) == sorted(str(i) for i in range(25))
+    assert dynamodb.calls['BatchGetItem'] > 1
+
+
+def test_batch_that_never_completes_is_shed():
+    dynamodb = LocalDynamoDB(unprocessed_rate=1.0, seed=5)
+    dynamodb.create_table('Items', 'id')
+
+    response = with_retry_budget(
+        lambda event, context: batch_write_all(dynamodb, {'Items': [{'PutRequest': {'Item': {'id': 'a'}}}]})
+    )({}, None)
+
+    assert response['statusCode'] == 429
+
+
+def test_user_update_sheds_throttled_writes_without_logging_the_request(monkeypatch, capsys):
+    import user_update
+    table = throttled_table(1.0)
+    monkeypatch.setattr(user_update, 'table', ResilientTable(table))
+    event = {
+        'headers': {'Authorization': 'Bearer secret-token'},
+        'body': json.dumps({'email': 'someone@example.com'}),
+        'requestContext': {'authorizer': {'claims': {'sub': 'user-1'}}}
+    }
+
+    response = user_update.lambda_handler(event, None)
+
+    assert response['statusCode'] == 429
+    output = capsys.readouterr()
+    assert 'secret-token' not in output.out + output.err
+    assert 'someone@example.com' not in output.out + output.err
+
+
+@pytest.fixture
+def aws_credentials(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'local')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'local')
+
+
+def test_threads_share_one_client_and_its_pool(aws_credentials):
+    import threading
+    resource = resilience.connect(pool_size=32)
+    table = resource.Table('JunkWunk-Users')
+    seen = []
+
+    def record():
+        seen.append((resource.meta.client, table.meta.client, resource.Table('JunkWunk-Users').meta.client))
+
+    workers = [threading.Thread(target=record) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    clients = {id(client) for clients in seen for client in clients}
+    assert clients == {id(resource.meta.client)}
+    assert resource.meta.client.meta.config.max_pool_connections == 32
+
+
+def test_condition_expressions_are_built_per_thread(aws_credentials):
+    import sys
+    import threading
+    from boto3.dynamodb.conditions import Attr, Key
+    client = resilience.connect(pool_size=8).meta.client
+    model = client.meta.service_model.operation_model('Query')
+    broken = []
+
+    def build():
+        for n in range(300):
+            params = {
+                'TableName': 'JunkWunk-Purchases',
+                'KeyConditionExpression': Key('userId').eq(f'user-{n}'),
+                'FilterExpression': Attr('timestamp').between(0, n) & Attr('status').eq('completed')
+            }
+            client.meta.events.emit('before-parameter-build.dynamodb.Query', params=params, model=model)
+            if len(params['ExpressionAttributeNames']) != 3 or len(params['ExpressionAttributeValues']) != 4:
+                broken.append(params)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        workers = [threading.Thread(target=build) for _ in range(8)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert broken == []
+
+
+def test_retry_quota_is_sized_for_concurrent_requests():
+    quota = resilience.size_retry_quota(32)
+
+    assert resilience.retry_quota is quota
+    assert quota.capacity == resilience.RETRY_QUOTA * 32
+    assert quota.rate == 0
+    assert RetryBudget().quota is quota
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+import saved_searches_create
+from resilience import ResilientTable
+from saved_search_index import SavedSearchIndex
+
+
+@pytest.fixture
+def searches(local_dynamodb, monkeypatch):
+    table = local_dynamodb.create_table('JunkWunk-SavedSearches', 'userId', 'searchId')
+    monkeypatch.setattr(saved_searches_create, 'table', ResilientTable(table))
+    return table
+
+
+def create(body):
+    event = {'body': json.dumps(body), 'requestContext': {'authorizer': {'claims': {'sub': 'user-1'}}}}
+    return saved_searches_create.lambda_handler(event, None)
+
+
+@pytest.mark.parametrize('body', [
+    {},
+    {'radiusKm': 10},
+    {'coordinates': {'lat': 12.97, 'lng': 77.59}},
+    {'keywords': ['a', 'the']},
+    {'keywords': ['x', 'y']},
+    {'coordinates': {'lat': 12.97, 'lng': 77.59}, 'radiusKm': 500},
+    {'city': ['Pune']}
+])
+def test_searches_without_usable_criteria_are_rejected(searches, body):
+    assert create(body)['statusCode'] == 400
+    assert searches.items == {}
+
+
+def test_only_matching_listings_are_returned(searches):
+    for body in [{'keywords': ['sofa']}, {'maxPrice': 100},
+                 {'coordinates': {'lat': 0, 'lng': 0}, 'radiusKm': 5}]:
+        assert create(body)['statusCode'] == 200
+    index = SavedSearchIndex()
+    for search in searches.items.values():
+        index.add(search)
+
+    lamp = {'title': 'Desk lamp', 'price': 500, 'coordinates': {'lat': 12.97, 'lng': 77.59}}
+    near_origin = {'title': 'Desk lamp', 'price': 500, 'coordinates': {'lat': 0.01, 'lng': 0.01}}
+
+    assert index.match(lamp) == []
+    assert len(index.match(near_origin)) == 1
+
+
+def test_index_refuses_stored_searches_without_criteria():
+    with pytest.raises(ValueError):
+        SavedSearchIndex().add({'searchId': 's1', 'radiusKm': 10})
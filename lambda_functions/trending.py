@@ -0,0 +1,92 @@
+import os
+import random
+import time
+from decimal import Decimal
+
+from resilience import dynamodb_resource
+
+dynamodb = dynamodb_resource()
+# counterId = <itemId>#<landmark>#<shard>; TTL on expiresAt
+counters_table = dynamodb.Table(os.environ.get('TRENDING_COUNTERS_TABLE', 'JunkWunk-TrendingCounters'))
+
+# Every event lands on one of SHARDS counter rows for its item, so a hot
+# listing spreads its writes over several partitions instead of one
+SHARDS = int(os.environ.get('TRENDING_SHARDS', '8'))
+EVENT_WEIGHTS = {'view': 1, 'cart_add': 5, 'purchase': 20}
+HALF_LIFE = 24 * 3600
+
+# Forward decay: an event at time t adds weight * 2^((t - landmark) / HALF_LIFE),
+# so counters only ever ADD and the decay is applied once, at compaction.
+# The landmark moves weekly to keep the stored numbers bounded; rows from
+# the previous landmark are still read until their TTL removes them.
+LANDMARK_PERIOD = 7 * 24 * 3600
+# Rows stay readable for one period after their landmark is replaced
+COUNTER_TTL = 2 * LANDMARK_PERIOD
+
+
+def landmark(now):
+    return int(now // LANDMARK_PERIOD * LANDMARK_PERIOD)
+
+
+def counter_id(item_id, base, shard):
+    return f'{item_id}#{base}#{shard}'
+
+
+def boost(now, base):
+    return 2 ** ((now - base) / HALF_LIFE)
+
+
+def decayed(score, base, now):
+    # Score of a counter row as seen at `now`
+    return float(score) / boost(now, base)
+
+
+def record_event(item, event, count=1, now=None):
+    """Add an event to one random shard of the item's counter.
+
+    Best effort: a single attempt, and failures are logged rather than
+    failing the request that triggered them.
+    """
+    now = time.time() if now is None else now
+    base = landmark(now)
+    score = EVENT_WEIGHTS[event] * count * boost(now, base)
+    try:
+        counters_table.update_item(
+            Key={'counterId': counter_id(item['itemId'], base, random.randrange(SHARDS))},
+            UpdateExpression='ADD #score :score SET itemId = :itemId, #landmark = :landmark, '
+                             '#city = :city, categories = :categories, expiresAt = :expiresAt',
+            ExpressionAttributeNames={'#score': 'score', '#landmark': 'landmark', '#city': 'city'},
+            ExpressionAttributeValues={
+                ':score': Decimal(str(round(score, 6))),
+                ':itemId': item['itemId'],
+                ':landmark': base,
+                ':city': item.get('city', ''),
+                ':categories': item.get('categories', []),
+                ':expiresAt': base + COUNTER_TTL
+            }
+        )
+    except Exception as e:
+        print(f"Could not record {event} for {item.get('itemId')}: {str(e)}")
+
+
+def list_key(city=None, category=None):
+    # Key of a precomputed list in JunkWunk-Trending
+    parts = ['trending']
+    if city:
+        parts.append(f'city={city.strip().lower()}')
+    if category:
+        parts.append(f'category={category.strip().lower()}')
+    return '#'.join(parts)
+
+
+def list_keys_for(city, categories):
+    # Every list an item competes in: global, its city, each of its
+    # categories, and each city/category pair
+    keys = [list_key()]
+    if city:
+        keys.append(list_key(city=city))
+    for category in dict.fromkeys(categories or []):
+        keys.append(list_key(category=category))
+        if city:
+            keys.append(list_key(city=city, category=category))
+    return keys
@@ -0,0 +1,183 @@
+import heapq
+import json
+import os
+import time
+from decimal import Decimal
+
+from resilience import ResilientTable, TokenBucket, batch_get_all, dynamodb_resource
+from trending import decayed, list_keys_for
+
+dynamodb = dynamodb_resource()
+counters_table = ResilientTable(dynamodb.Table(os.environ.get('TRENDING_COUNTERS_TABLE', 'JunkWunk-TrendingCounters')))
+# listKey -> precomputed list, served by items_trending with one GetItem
+trending_table = dynamodb.Table(os.environ.get('TRENDING_TABLE', 'JunkWunk-Trending'))
+lists_table = ResilientTable(trending_table)
+
+ITEMS_TABLE = 'JunkWunk-Items'
+TOP_N = int(os.environ.get('TRENDING_TOP_N', '50'))
+# Decayed score below which an item is too quiet to be called trending
+MIN_SCORE = 1.0
+# Lists outlive a few missed runs of the schedule, then disappear
+LIST_TTL = 6 * 3600
+CARD_FIELDS = ['itemId', 'title', 'price', 'imageUrl', 'imageRenditions', 'city',
+               'categories', 'sellerName', 'status']
+
+page_pacer = TokenBucket(float(os.environ.get('SCAN_PAGES_PER_SECOND', '5')), 2)
+
+
+def counter_rows():
+    scan_kwargs = {'ProjectionExpression': 'itemId, score, landmark, city, categories'}
+    while True:
+        page_pacer.acquire()
+        response = counters_table.scan(**scan_kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def merge_shards(rows, now):
+    # Sum every shard (and landmark) of an item into one decayed score
+    scores = {}
+    groups = {}
+    for row in rows:
+        item_id = row['itemId']
+        scores[item_id] = scores.get(item_id, 0.0) + decayed(row['score'], int(row['landmark']), now)
+        groups[item_id] = (row.get('city', ''), row.get('categories', []))
+    return scores, groups
+
+
+def rank(scores, groups, limit):
+    # Top `limit` item ids for every list an item belongs to
+    candidates = {}
+    for item_id, score in scores.items():
+        if score < MIN_SCORE:
+            continue
+        for key in list_keys_for(*groups[item_id]):
+            candidates.setdefault(key, []).append((score, item_id))
+    return {key: heapq.nlargest(limit, entries) for key, entries in candidates.items()}
+
+
+def load_cards(item_ids):
+    # Current listing details; sold or removed items drop out here
+    cards = {}
+    item_ids = list(item_ids)
+    for start in range(0, len(item_ids), 100):
+        responses = batch_get_all(dynamodb, {ITEMS_TABLE: {
+            'Keys': [{'itemId': item_id} for item_id in item_ids[start:start + 100]],
+            'ProjectionExpression': ', '.join(f'#{f}' for f in CARD_FIELDS),
+            'ExpressionAttributeNames': {f'#{f}': f for f in CARD_FIELDS}
+        }})
+        for item in responses.get(ITEMS_TABLE, []):
+            if item.get('status') == 'active':
+                cards[item['itemId']] = item
+    return cards
+
+
+def list_keys():
+    scan_kwargs = {'ProjectionExpression': 'listKey'}
+    keys = set()
+    while True:
+        response = lists_table.scan(**scan_kwargs)
+        keys.update(row['listKey'] for row in response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return keys
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def lambda_handler(event, context):
+    # Scheduled (EventBridge, every few minutes)
+    start = time.time()
+    now = int(start)
+    scores, groups = merge_shards(counter_rows(), now)
+    # Over-fetch so lists stay full after inactive items are dropped
+    ranked = rank(scores, groups, TOP_N * 2)
+    cards = load_cards({item_id for entries in ranked.values() for _, item_id in entries})
+    # Lists with no candidates left are emptied rather than left to expire
+    for key in list_keys() - set(ranked):
+        ranked[key] = []
+
+    with trending_table.batch_writer(overwrite_by_pkeys=['listKey']) as batch:
+        for key, entries in ranked.items():
+            items = [
+                dict(cards[item_id], trendingScore=Decimal(str(round(score, 3))))
+                for score, item_id in entries if item_id in cards
+            ][:TOP_N]
+            batch.put_item(Item={
+                'listKey': key,
+                'items': items,
+                'generatedAt': now,
+                'expiresAt': now + LIST_TTL
+            })
+
+    summary = {
+        'items': len(scores),
+        'lists': len(ranked),
+        'seconds': round(time.time() - start, 2)
+    }
+    print(json.dumps(summary))
+    return summary
+
+
+if __name__ == '__main__':
+    # Simulate a burst of events with a skewed popularity curve, compact it
+    # and serve a list, against the in-process stand-ins:
+    #   python trending_compactor.py --items 5000 --events 200000
+    import argparse
+    import random
+    import trending
+    import items_trending
+    from local_stores import LocalDynamoDB
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=5000)
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--shards', type=int, default=trending.SHARDS)
+    args = parser.parse_args()
+
+    random.seed(3)
+    trending.SHARDS = args.shards
+    local = LocalDynamoDB()
+    items_table = local.create_table(ITEMS_TABLE, 'itemId')
+    trending.counters_table = local.create_table('JunkWunk-TrendingCounters', 'counterId')
+    counters_table = ResilientTable(trending.counters_table)
+    trending_table = items_trending.table = local.create_table('JunkWunk-Trending', 'listKey')
+    lists_table = ResilientTable(trending_table)
+    dynamodb = local
+
+    cities = ['Bengaluru', 'Mumbai', 'Pune', 'Delhi', 'Chennai']
+    categories = ['furniture', 'electronics', 'books', 'clothing', 'kitchen', 'sports']
+    items = []
+    for n in range(args.items):
+        item = {
+            'itemId': f'item-{n}', 'title': f'Listing {n}', 'price': Decimal(n % 500 + 10),
+            'city': random.choice(cities), 'categories': random.sample(categories, 2), 'status': 'active'
+        }
+        items_table.items[(item['itemId'],)] = item
+        items.append(item)
+
+    # Zipf-like popularity: a handful of listings attract most of the traffic
+    weights = [1.0 / (rank_ + 1) for rank_ in range(args.items)]
+    events = random.choices(['view'] * 20 + ['cart_add'] * 3 + ['purchase'], k=args.events)
+    start = time.perf_counter()
+    now = time.time()
+    for event, item in zip(events, random.choices(items, weights=weights, k=args.events)):
+        trending.record_event(item, event, now=now - random.uniform(0, 3 * 24 * 3600))
+    recorded = time.perf_counter() - start
+
+    hot_rows = [row for row in trending.counters_table.items.values() if row['itemId'] == 'item-0']
+    hot_writes = args.events * weights[0] / sum(weights)
+    print(f"Recorded {args.events} events in {recorded:.2f}s into {len(trending.counters_table.items)} counter rows; "
+          f"hottest item ~{hot_writes:.0f} writes spread over {len(hot_rows)} rows "
+          f"(~{hot_writes / max(len(hot_rows), 1):.0f} per row)")
+
+    start = time.perf_counter()
+    summary = lambda_handler({}, None)
+    print(f"Compacted {summary['items']} items into {summary['lists']} lists in {time.perf_counter() - start:.2f}s")
+
+    response = items_trending.lambda_handler(
+        {'queryStringParameters': {'city': 'Pune', 'category': 'books', 'limit': '5'}}, None)
+    body = json.loads(response['body'])
+    print(f"GET /items/trending?city=Pune&category=books -> {body['count']} items, "
+          f"{trending_table.calls.get('GetItem', 0)} read: "
+          + ', '.join(f"{i['title']} ({i['trendingScore']:.0f})" for i in body['items']))
@@ -1,10 +1,11 @@
 import json
-import boto3
 from decimal import Decimal
 from datetime import datetime
 
-dynamodb = boto3.resource('dynamodb', region_name='ap-south-1')
-table = dynamodb.Table('JunkWunk-Users')
+from resilience import ResilientTable, dynamodb_resource, error_response, with_retry_budget
+
+dynamodb = dynamodb_resource()
+table = ResilientTable(dynamodb.Table('JunkWunk-Users'))
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -12,10 +13,9 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super(DecimalEncoder, self).default(obj)
 
+@with_retry_budget
 def lambda_handler(event, context):
     try:
-        debugPrint(f"Event received: {json.dumps(event)}")
-        
         # Get userId from Cognito authorizer
         user_id = event.get('requestContext', {}).get('authorizer', {}).get('claims', {}).get('sub')
         
@@ -32,11 +32,8 @@ def lambda_handler(event, context):
                 'body': json.dumps({'error': 'userId is required'})
             }
         
-        debugPrint(f"Updating user: {user_id}")
-        
         # Parse request body
         body = json.loads(event.get('body', '{}'))
-        debugPrint(f"Request body: {json.dumps(body)}")
         
         # Build update expression
         update_expr = "SET updatedAt = :updatedAt"
@@ -58,9 +55,6 @@ def lambda_handler(event, context):
                     expr_names[f'#{field}'] = field
                     expr_values[f':{field}'] = body[field]
         
-        debugPrint(f"Update expression: {update_expr}")
-        debugPrint(f"Expression values: {json.dumps(expr_values, default=str)}")
-        
         response = table.update_item(
             Key={'userId': user_id},
             UpdateExpression=update_expr,
@@ -69,8 +63,6 @@ def lambda_handler(event, context):
             ReturnValues='ALL_NEW'
         )
         
-        debugPrint(f"Update successful. New attributes: {json.dumps(response['Attributes'], cls=DecimalEncoder)}")
-        
         return {
             'statusCode': 200,
             'headers': {
@@ -81,14 +73,6 @@ def lambda_handler(event, context):
         }
         
     except Exception as e:
-        debugPrint(f"Error: {str(e)}")
         import traceback
         traceback.print_exc()
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': str(e)})
-        }
+        return error_response(e)
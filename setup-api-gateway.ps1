@@ -65,6 +65,33 @@ $itemIdResource = aws apigateway create-resource `
 $itemIdResourceId = $itemIdResource.id
 Write-Host "+ Created /items/{itemId} resource: $itemIdResourceId" -ForegroundColor Green
 
+# Create /items/suggest resource
+$suggestResource = aws apigateway create-resource `
+    --rest-api-id $ApiId `
+    --parent-id $itemsResourceId `
+    --path-part "suggest" `
+    --region $Region | ConvertFrom-Json
+$suggestResourceId = $suggestResource.id
+Write-Host "+ Created /items/suggest resource: $suggestResourceId" -ForegroundColor Green
+
+# Create /items/trending resource
+$trendingResource = aws apigateway create-resource `
+    --rest-api-id $ApiId `
+    --parent-id $itemsResourceId `
+    --path-part "trending" `
+    --region $Region | ConvertFrom-Json
+$trendingResourceId = $trendingResource.id
+Write-Host "+ Created /items/trending resource: $trendingResourceId" -ForegroundColor Green
+
+# Create /items/browse resource
+$browseResource = aws apigateway create-resource `
+    --rest-api-id $ApiId `
+    --parent-id $itemsResourceId `
+    --path-part "browse" `
+    --region $Region | ConvertFrom-Json
+$browseResourceId = $browseResource.id
+Write-Host "+ Created /items/browse resource: $browseResourceId" -ForegroundColor Green
+
 # Create /cart resource
 $cartResource = aws apigateway create-resource `
     --rest-api-id $ApiId `
@@ -101,6 +128,60 @@ $purchasesResource = aws apigateway create-resource `
 $purchasesResourceId = $purchasesResource.id
 Write-Host "+ Created /purchases resource: $purchasesResourceId" -ForegroundColor Green
 
+# Create /images resource
+$imagesResource = aws apigateway create-resource `
+    --rest-api-id $ApiId `
+    --parent-id $RootResourceId `
+    --path-part "images" `
+    --region $Region | ConvertFrom-Json
+$imagesResourceId = $imagesResource.id
+Write-Host "+ Created /images resource: $imagesResourceId" -ForegroundColor Green
+
+# Create /images/upload-url resource
+$uploadUrlResource = aws apigateway create-resource `
+    --rest-api-id $ApiId `
+    --parent-id $imagesResourceId `
+    --path-part "upload-url" `
+    --region $Region | ConvertFrom-Json
+$uploadUrlResourceId = $uploadUrlResource.id
+Write-Host "+ Created /images/upload-url resource: $uploadUrlResourceId" -ForegroundColor Green
+
+# Create /saved-searches resource
+$savedSearchesResource = aws apigateway create-resource `
+    --rest-api-id $ApiId `
+    --parent-id $RootResourceId `
+    --path-part "saved-searches" `
+    --region $Region | ConvertFrom-Json
+$savedSearchesResourceId = $savedSearchesResource.id
+Write-Host "+ Created /saved-searches resource: $savedSearchesResourceId" -ForegroundColor Green
+
+# Create /saved-searches/{searchId} resource
+$savedSearchIdResource = aws apigateway create-resource `
+    --rest-api-id $ApiId `
+    --parent-id $savedSearchesResourceId `
+    --path-part "{searchId}" `
+    --region $Region | ConvertFrom-Json
+$savedSearchIdResourceId = $savedSearchIdResource.id
+Write-Host "+ Created /saved-searches/{searchId} resource: $savedSearchIdResourceId" -ForegroundColor Green
+
+# Create /routes resource
+$routesResource = aws apigateway create-resource `
+    --rest-api-id $ApiId `
+    --parent-id $RootResourceId `
+    --path-part "routes" `
+    --region $Region | ConvertFrom-Json
+$routesResourceId = $routesResource.id
+Write-Host "+ Created /routes resource: $routesResourceId" -ForegroundColor Green
+
+# Create /routes/plan resource
+$routePlanResource = aws apigateway create-resource `
+    --rest-api-id $ApiId `
+    --parent-id $routesResourceId `
+    --path-part "plan" `
+    --region $Region | ConvertFrom-Json
+$routePlanResourceId = $routePlanResource.id
+Write-Host "+ Created /routes/plan resource: $routePlanResourceId" -ForegroundColor Green
+
 Write-Host ""
 
 # Step 3: Create Methods and Integrations
@@ -182,7 +263,7 @@ function Enable-CORS {
     
     # Create integration response
     $corsHeaders = @{
-        "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+        "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,Idempotency-Key'"
         "method.response.header.Access-Control-Allow-Methods" = "'GET,POST,PUT,DELETE,OPTIONS'"
         "method.response.header.Access-Control-Allow-Origin" = "'*'"
     }
@@ -204,6 +285,9 @@ Add-LambdaMethod -ResourceId $userIdResourceId -HttpMethod "PUT" -LambdaFunction
 # Items endpoints
 Add-LambdaMethod -ResourceId $itemsResourceId -HttpMethod "GET" -LambdaFunctionName "junkwunk-items-list" -ResourcePath "/items"
 Add-LambdaMethod -ResourceId $itemIdResourceId -HttpMethod "GET" -LambdaFunctionName "junkwunk-items-get" -ResourcePath "/items/{itemId}"
+Add-LambdaMethod -ResourceId $suggestResourceId -HttpMethod "GET" -LambdaFunctionName "junkwunk-items-suggest" -ResourcePath "/items/suggest"
+Add-LambdaMethod -ResourceId $trendingResourceId -HttpMethod "GET" -LambdaFunctionName "junkwunk-items-trending" -ResourcePath "/items/trending"
+Add-LambdaMethod -ResourceId $browseResourceId -HttpMethod "GET" -LambdaFunctionName "junkwunk-items-browse" -ResourcePath "/items/browse"
 
 # Cart endpoints
 Add-LambdaMethod -ResourceId $cartResourceId -HttpMethod "GET" -LambdaFunctionName "junkwunk-cart-list" -ResourcePath "/cart"
@@ -214,6 +298,17 @@ Add-LambdaMethod -ResourceId $checkoutResourceId -HttpMethod "POST" -LambdaFunct
 # Purchases endpoints
 Add-LambdaMethod -ResourceId $purchasesResourceId -HttpMethod "GET" -LambdaFunctionName "junkwunk-purchases-list" -ResourcePath "/purchases"
 
+# Image endpoints
+Add-LambdaMethod -ResourceId $uploadUrlResourceId -HttpMethod "POST" -LambdaFunctionName "junkwunk-images-upload-url" -ResourcePath "/images/upload-url"
+
+# Saved search endpoints
+Add-LambdaMethod -ResourceId $savedSearchesResourceId -HttpMethod "GET" -LambdaFunctionName "junkwunk-saved-searches-list" -ResourcePath "/saved-searches"
+Add-LambdaMethod -ResourceId $savedSearchesResourceId -HttpMethod "POST" -LambdaFunctionName "junkwunk-saved-searches-create" -ResourcePath "/saved-searches"
+Add-LambdaMethod -ResourceId $savedSearchIdResourceId -HttpMethod "DELETE" -LambdaFunctionName "junkwunk-saved-searches-delete" -ResourcePath "/saved-searches/{searchId}"
+
+# Route planning endpoints
+Add-LambdaMethod -ResourceId $routePlanResourceId -HttpMethod "POST" -LambdaFunctionName "junkwunk-routes-plan" -ResourcePath "/routes/plan"
+
 Write-Host ""
 
 # Step 4: Enable CORS on all resources
@@ -221,10 +316,17 @@ Write-Host "Step 4: Enabling CORS..." -ForegroundColor Yellow
 Enable-CORS -ResourceId $userIdResourceId
 Enable-CORS -ResourceId $itemsResourceId
 Enable-CORS -ResourceId $itemIdResourceId
+Enable-CORS -ResourceId $suggestResourceId
+Enable-CORS -ResourceId $trendingResourceId
+Enable-CORS -ResourceId $browseResourceId
 Enable-CORS -ResourceId $cartResourceId
 Enable-CORS -ResourceId $cartItemResourceId
 Enable-CORS -ResourceId $checkoutResourceId
 Enable-CORS -ResourceId $purchasesResourceId
+Enable-CORS -ResourceId $uploadUrlResourceId
+Enable-CORS -ResourceId $savedSearchesResourceId
+Enable-CORS -ResourceId $savedSearchIdResourceId
+Enable-CORS -ResourceId $routePlanResourceId
 Write-Host "+ CORS enabled on all endpoints" -ForegroundColor Green
 Write-Host ""
 
@@ -254,11 +356,19 @@ Write-Host "  GET    $ApiEndpoint/users/{userId}" -ForegroundColor White
 Write-Host "  PUT    $ApiEndpoint/users/{userId}" -ForegroundColor White
 Write-Host "  GET    $ApiEndpoint/items" -ForegroundColor White
 Write-Host "  GET    $ApiEndpoint/items/{itemId}" -ForegroundColor White
+Write-Host "  GET    $ApiEndpoint/items/suggest?q=" -ForegroundColor White
+Write-Host "  GET    $ApiEndpoint/items/trending?city=&category=" -ForegroundColor White
+Write-Host "  GET    $ApiEndpoint/items/browse?minPrice=&maxPrice=&city=&category=" -ForegroundColor White
 Write-Host "  GET    $ApiEndpoint/cart" -ForegroundColor White
 Write-Host "  POST   $ApiEndpoint/cart" -ForegroundColor White
 Write-Host "  DELETE $ApiEndpoint/cart/{itemId}" -ForegroundColor White
 Write-Host "  POST   $ApiEndpoint/cart/checkout" -ForegroundColor White
 Write-Host "  GET    $ApiEndpoint/purchases" -ForegroundColor White
+Write-Host "  POST   $ApiEndpoint/images/upload-url" -ForegroundColor White
+Write-Host "  GET    $ApiEndpoint/saved-searches" -ForegroundColor White
+Write-Host "  POST   $ApiEndpoint/saved-searches" -ForegroundColor White
+Write-Host "  DELETE $ApiEndpoint/saved-searches/{searchId}" -ForegroundColor White
+Write-Host "  POST   $ApiEndpoint/routes/plan" -ForegroundColor White
 Write-Host ""
 Write-Host "Save this endpoint URL - you'll need it in Flutter!" -ForegroundColor Cyan
 Write-Host ""